@@ -0,0 +1,44 @@
+"""add user hot-path indexes
+
+Revision ID: 1f4c9a7d2e3b
+Revises: d4b91b3decd0
+Create Date: 2026-10-18 10:12:41.304512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f4c9a7d2e3b'
+down_revision: Union[str, Sequence[str], None] = 'd4b91b3decd0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дашборд и лента транзакций: user_id + type + диапазон дат (covering по amount/to_category_id)
+    op.create_index(
+        'ix_transaction_user_id_type_transaction_date',
+        'transaction',
+        ['user_id', 'type', 'transaction_date'],
+        postgresql_include=['amount', 'to_category_id'],
+    )
+    op.create_index('ix_income_user_id_transaction_date', 'income', ['user_id', 'transaction_date'])
+    op.create_index('ix_expense_user_id_transaction_date', 'expense', ['user_id', 'transaction_date'])
+    op.create_index('ix_wallet_user_id', 'wallet', ['user_id'])
+    op.create_index('ix_goal_user_id', 'goal', ['user_id'])
+    op.create_index('ix_category_user_id', 'category', ['user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_category_user_id', table_name='category')
+    op.drop_index('ix_goal_user_id', table_name='goal')
+    op.drop_index('ix_wallet_user_id', table_name='wallet')
+    op.drop_index('ix_expense_user_id_transaction_date', table_name='expense')
+    op.drop_index('ix_income_user_id_transaction_date', table_name='income')
+    op.drop_index('ix_transaction_user_id_type_transaction_date', table_name='transaction')
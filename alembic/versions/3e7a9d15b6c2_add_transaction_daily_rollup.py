@@ -0,0 +1,47 @@
+"""add transaction daily rollup
+
+Revision ID: 3e7a9d15b6c2
+Revises: 8b2e61f0c4a9
+Create Date: 2026-10-18 12:40:03.118245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7a9d15b6c2'
+down_revision: Union[str, Sequence[str], None] = '8b2e61f0c4a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'transaction_daily_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('tx_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'day', 'type', 'category_id', name='uq_transaction_daily_rollup_key'),
+    )
+    # Бэкфилл из существующей истории (то же, что app.scripts.rebuild_rollups)
+    op.execute(
+        'INSERT INTO transaction_daily_rollup (user_id, day, type, category_id, amount, tx_count) '
+        'SELECT user_id, transaction_date, type, COALESCE(to_category_id, 0), SUM(amount), COUNT(*) '
+        'FROM "transaction" WHERE amount > 0 '
+        'GROUP BY user_id, transaction_date, type, COALESCE(to_category_id, 0)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('transaction_daily_rollup')
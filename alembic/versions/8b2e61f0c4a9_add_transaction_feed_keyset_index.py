@@ -0,0 +1,33 @@
+"""add transaction feed keyset index
+
+Revision ID: 8b2e61f0c4a9
+Revises: 1f4c9a7d2e3b
+Create Date: 2026-10-18 11:02:17.554930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e61f0c4a9'
+down_revision: Union[str, Sequence[str], None] = '1f4c9a7d2e3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset-пагинация GET /transactions: ORDER BY transaction_date DESC, id DESC
+    op.create_index(
+        'ix_transaction_user_id_transaction_date_id',
+        'transaction',
+        ['user_id', 'transaction_date', 'id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transaction_user_id_transaction_date_id', table_name='transaction')
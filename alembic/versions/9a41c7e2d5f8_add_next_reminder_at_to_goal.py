@@ -0,0 +1,31 @@
+"""add next_reminder_at to goal
+
+Revision ID: 9a41c7e2d5f8
+Revises: c5d0e8a4f217
+Create Date: 2026-10-18 15:02:37.418562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a41c7e2d5f8'
+down_revision: Union[str, Sequence[str], None] = 'c5d0e8a4f217'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Ближайшее напоминание по цели; заполняется `python -m app.scripts.schedule_reminders`
+    op.add_column('goal', sa.Column('next_reminder_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_goal_next_reminder_at'), 'goal', ['next_reminder_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_goal_next_reminder_at'), table_name='goal')
+    op.drop_column('goal', 'next_reminder_at')
@@ -0,0 +1,29 @@
+"""add data_version to user
+
+Revision ID: c5d0e8a4f217
+Revises: 3e7a9d15b6c2
+Create Date: 2026-10-18 13:21:46.270391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d0e8a4f217'
+down_revision: Union[str, Sequence[str], None] = '3e7a9d15b6c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Версия данных пользователя для ETag / If-None-Match
+    op.add_column('user', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'data_version')
@@ -1,15 +1,20 @@
-from typing import Generator, Optional
+import hmac
+import ipaddress
+from typing import AsyncGenerator, Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError, BaseModel
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import models, schemas
 from app.core import security
+from app.core.cache import user_cache, user_cache_key
 from app.core.config import settings
-from app.db.session import engine
+from app.db.session import engine, AsyncSessionLocal
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -19,26 +24,97 @@ class TokenData(BaseModel):
 
 
 def get_db() -> Generator:
-    with Session(engine, expire_on_commit=True) as session:
+    # Один коммит на запрос, после успешного эндпоинта (CRUD только flush-ит).
+    # Если эндпоинт упал, исключение приходит сюда, коммита нет — закрытие
+    # сессии откатывает транзакцию.
+    with Session(engine, expire_on_commit=False) as session:
         yield session
+        session.commit()
 
 
-def get_current_active_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as session:
+        yield session
+        await session.commit()
+
+
+def _decode_user_id(token: str) -> int:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
         token_data = TokenData(**payload)
-    except (JWTError, ValidationError) as e:
+        return int(token_data.sub)
+    except (JWTError, ValidationError, TypeError, ValueError) as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.get(models.User, token_data.sub)
+
+
+def _check_user(user: Optional[models.User]) -> models.User:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user.")
     return user
+
+
+def _cached_user(user_id: int) -> Optional[models.User]:
+    snapshot = user_cache.get(user_cache_key(user_id))
+    if snapshot is None:
+        return None
+    # Каждому запросу — свой detached-объект: можно передать в CRUD или db.merge()
+    user = models.User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+def _remember_user(user: Optional[models.User]) -> Optional[models.User]:
+    if user is not None and settings.AUTH_CACHE_TTL_SECONDS > 0:
+        user_cache.set(user_cache_key(user.id), user.model_dump(), settings.AUTH_CACHE_TTL_SECONDS)
+    return user
+
+
+def get_current_active_user(token: str = Depends(reusable_oauth2)) -> models.User:
+    """
+    Пользователь из короткоживущего кэша снимков; сессия открывается только при промахе.
+    Записи через crud_user и удаление аккаунта сбрасывают снимок (app.db.changes).
+    """
+    user_id = _decode_user_id(token)
+    user = _cached_user(user_id)
+    if user is None:
+        with Session(engine) as db:
+            user = _remember_user(db.get(models.User, user_id))
+    return _check_user(user)
+
+
+async def get_current_active_user_async(token: str = Depends(reusable_oauth2)) -> models.User:
+    user_id = _decode_user_id(token)
+    user = _cached_user(user_id)
+    if user is None:
+        async with AsyncSessionLocal() as db:
+            user = _remember_user(await db.get(models.User, user_id))
+    return _check_user(user)
+
+
+def _in_ops_networks(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(net, strict=False) for net in settings.OPS_ALLOWED_NETWORKS)
+
+
+def require_ops_access(request: Request) -> None:
+    """
+    Служебные эндпоинты (/metrics, /health/*): Bearer OPS_TOKEN или адрес
+    из OPS_ALLOWED_NETWORKS. Иначе 404 — не раскрываем, что они есть.
+    """
+    if settings.OPS_TOKEN:
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(credentials.encode(), settings.OPS_TOKEN.encode()):
+            return
+    if request.client is not None and _in_ops_networks(request.client.host):
+        return
+    raise HTTPException(status_code=404, detail="Not Found")
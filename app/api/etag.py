@@ -0,0 +1,79 @@
+import hashlib
+
+from fastapi import Depends, Request, Response
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import models
+from app.api import deps
+from app.db.changes import read_data_version, read_data_version_async
+
+
+class NotModified(Exception):
+    """
+    Клиентская копия актуальна — main.py отвечает 304 без тела.
+    """
+
+    def __init__(self, etag: str) -> None:
+        self.etag = etag
+
+
+def make_etag(user_id: int, data_version: int, resource: str, query: str = "") -> str:
+    # Слабый ETag: ответ зависит только от версии данных пользователя и параметров запроса
+    query_hash = hashlib.blake2s(query.encode(), digest_size=6).hexdigest()
+    return f'W/"{user_id}-{data_version}-{resource}-{query_hash}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Слабое сравнение: W/ не учитывается
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def check_etag(request: Request, response: Response, etag: str) -> None:
+    """
+    304, если If-None-Match совпадает с etag; иначе ставит ETag в ответ.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        raise NotModified(etag)
+    response.headers["ETag"] = etag
+
+
+def etag_guard(resource: str, *, use_async: bool = False):
+    """
+    Зависимость для GET-эндпоинта: ставит ETag в ответ и прерывает запрос
+    с 304, если If-None-Match совпадает — до обращения к данным.
+    Прочитанная версия остаётся в request.state.data_version для ключа кэша.
+    """
+    if use_async:
+
+        async def guard_async(
+            request: Request,
+            response: Response,
+            db: AsyncSession = Depends(deps.get_async_db),
+            current_user: models.User = Depends(deps.get_current_active_user_async),
+        ) -> str:
+            version = await read_data_version_async(db, current_user.id)
+            request.state.data_version = version
+            etag = make_etag(current_user.id, version, resource, request.url.query)
+            check_etag(request, response, etag)
+            return etag
+
+        return guard_async
+
+    def guard(
+        request: Request,
+        response: Response,
+        db: Session = Depends(deps.get_db),
+        current_user: models.User = Depends(deps.get_current_active_user),
+    ) -> str:
+        version = read_data_version(db, current_user.id)
+        request.state.data_version = version
+        etag = make_etag(current_user.id, version, resource, request.url.query)
+        check_etag(request, response, etag)
+        return etag
+
+    return guard
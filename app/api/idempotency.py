@@ -0,0 +1,114 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app import models
+from app.api import deps
+from app.core.config import settings
+
+HEADER = "Idempotency-Key"
+
+
+class IdempotentReplay(Exception):
+    """
+    Запрос с этим Idempotency-Key уже выполнен — main.py отдаёт сохранённый ответ.
+    """
+
+    def __init__(self, status_code: int, body: Any) -> None:
+        self.status_code = status_code
+        self.body = body
+
+
+class IdempotencyConflict(Exception):
+    """
+    Ключ уже использован для другого запроса или запрос с ним ещё выполняется (409).
+    """
+
+    def __init__(self, detail: str) -> None:
+        self.detail = detail
+
+
+class Idempotency:
+    """
+    Возвращается зависимостью idempotency_guard. Если клиент прислал ключ,
+    запись о нём уже добавлена в сессию и закоммитится вместе с операцией;
+    после успеха эндпоинт вызывает save(ответ).
+    """
+
+    def __init__(self, db: Session, record: Optional[models.IdempotencyKey]) -> None:
+        self.db = db
+        self.record = record
+
+    def save(self, response: Any, status_code: int = 200) -> Any:
+        if self.record is None:
+            return response
+        self.record.response_status = status_code
+        self.record.response_body = jsonable_encoder(response)
+        # Коммит — вместе с операцией, в deps.get_db
+        self.db.add(self.record)
+        return response
+
+
+def _request_hash(request: Request, body: bytes) -> str:
+    digest = hashlib.blake2s(digest_size=16)
+    digest.update(f"{request.method} {request.url.path}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _begin(db: Session, user_id: int, key: str, request_hash: str) -> models.IdempotencyKey:
+    fresh_after = datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+    existing = db.exec(
+        select(models.IdempotencyKey).where(
+            models.IdempotencyKey.user_id == user_id,
+            models.IdempotencyKey.key == key,
+        )
+    ).first()
+    if existing is not None:
+        if existing.created_at < fresh_after:
+            # Истёкший ключ можно переиспользовать
+            db.delete(existing)
+            db.flush()
+        elif existing.request_hash != request_hash:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        elif existing.response_status is None:
+            raise IdempotencyConflict("A request with this Idempotency-Key is already in progress")
+        else:
+            raise IdempotentReplay(existing.response_status, existing.response_body)
+    record = models.IdempotencyKey(user_id=user_id, key=key, request_hash=request_hash)
+    db.add(record)
+    try:
+        # Вставка сразу: параллельный запрос с тем же ключом ждёт на уникальном
+        # индексе до нашего коммита и получает 409, а не выполняет операцию
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise IdempotencyConflict("A request with this Idempotency-Key is already in progress")
+    return record
+
+
+async def idempotency_guard(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Idempotency:
+    """
+    Зависимость для мутирующих эндпоинтов: повтор запроса с тем же
+    Idempotency-Key возвращает первый ответ, не выполняя операцию снова.
+    Без заголовка ничего не делает.
+    """
+    key = request.headers.get(HEADER)
+    if not key:
+        return Idempotency(db, None)
+    if len(key) > 255:
+        raise IdempotencyConflict("Idempotency-Key is too long")
+    request_hash = _request_hash(request, await request.body())
+    record = await run_in_threadpool(_begin, db, current_user.id, key, request_hash)
+    return Idempotency(db, record)
+
@@ -1,11 +1,14 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import date
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
 from app import crud, models
 from app.api import deps
+from app.schemas.transaction import ExpenseCreate, IncomeCreate
+from app.services.ai_context import PERIODS, build_expense_summary
+from app.services.ai_parser import get_keyword_map_async
 from app.services.ai_service import ai_service
-from app.crud import crud_wallet, category, expense, income
 router = APIRouter()
 
 class AIMessageRequest(BaseModel):
@@ -13,15 +16,15 @@ class AIMessageRequest(BaseModel):
 
 class AIMessageResponse(BaseModel):
     type: str
-    transaction: dict = None
+    transaction: Optional[dict] = None
     response: str
     success: bool = True
 
 @router.post("/process-message", response_model=AIMessageResponse)
-def process_ai_message(
+async def process_ai_message(
     *,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
     request: AIMessageRequest
 ) -> Any:
     """
@@ -29,69 +32,76 @@ def process_ai_message(
     """
     try:
         # Получаем данные пользователя
-        categories = crud_category.get_multi_by_user(db=db, user=current_user)
-        wallets = crud_wallet.get_multi_by_user(db=db, user_id=current_user.id)
-        
+        categories = await crud.category.get_multi_by_user_async(db=db, user=current_user)
+        wallets = await crud.crud_wallet.get_multi_by_user_async(db=db, user_id=current_user.id)
+
         user_data = {
             "categories": [{"id": c.id, "name": c.name, "type": c.type} for c in categories],
             "wallets": [{"id": w.id, "name": w.name} for w in wallets],
             "currency": "KZT"
         }
-        
+
         # Обрабатываем сообщение через AI
-        result = ai_service.process_message(request.message, user_data)
-        
+        keywords = await get_keyword_map_async(db, current_user.id)
+        result = await ai_service.process_message(
+            request.message, user_data, user_id=current_user.id, keywords=keywords
+        )
+
         # Если это транзакция, создаем её
         if result.get("type") == "transaction" and result.get("transaction"):
             transaction_data = result["transaction"]
-            
+
             # Находим категорию
             category_obj = None
             if transaction_data.get("category"):
                 category_obj = next((c for c in categories if c.name.lower() == transaction_data["category"].lower()), None)
-            
+
             # Находим кошелек
             wallet = None
             if transaction_data.get("wallet"):
                 wallet = next((w for w in wallets if w.name.lower() == transaction_data["wallet"].lower()), wallets[0] if wallets else None)
             else:
                 wallet = wallets[0] if wallets else None
-            
+
             if transaction_data["type"] == "expense":
                 # Создаем расход
-                expense_obj = crud_expense.create(
+                expense_obj = await crud.expense.create_with_user_async(
                     db=db,
-                    obj_in=models.ExpenseCreate(
+                    obj_in=ExpenseCreate(
                         name=transaction_data.get("description", "Расход"),
+                        icon="cart.fill",
+                        color="#FF0000",
                         amount=transaction_data["amount"],
                         category_id=category_obj.id if category_obj else None,
                         wallet_id=wallet.id if wallet else None,
-                        user_id=current_user.id
-                    )
+                    ),
+                    user=current_user,
                 )
                 result["transaction_id"] = expense_obj.id
-                
+
             elif transaction_data["type"] == "income":
                 # Создаем доход
-                income_obj = crud_income.create(
+                income_obj = await crud.income.create_with_user_async(
                     db=db,
-                    obj_in=models.IncomeCreate(
+                    obj_in=IncomeCreate(
                         name=transaction_data.get("description", "Доход"),
+                        icon="dollarsign.circle.fill",
+                        color="#00FF00",
                         amount=transaction_data["amount"],
                         category_id=category_obj.id if category_obj else None,
-                        wallet_id=wallet.id if wallet else None,
-                        user_id=current_user.id
-                    )
+                    ),
+                    user=current_user,
+                    wallet_id=wallet.id if wallet else None,
                 )
                 result["transaction_id"] = income_obj.id
-        
+
         return AIMessageResponse(
             type=result.get("type", "error"),
             transaction=result.get("transaction"),
             response=result.get("response", "Ошибка обработки"),
             success=result.get("type") != "error"
         )
-        
+
     except Exception as e:
         return AIMessageResponse(
             type="error",
@@ -100,47 +110,29 @@ def process_ai_message(
         )
 
 @router.get("/analyze-expenses")
-def analyze_expenses(
+async def analyze_expenses(
     *,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
-    period: str = "month"
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
+    period: str = Query("month", pattern=f"^({'|'.join(PERIODS)})$")
 ) -> Any:
     """
     Анализирует расходы пользователя и дает рекомендации
     """
     try:
-        # Получаем транзакции за период
-        transactions = crud.transaction.get_multi_by_user(db=db, user=current_user)
-        
-        # Фильтруем по периоду (упрощенно)
-        if period == "week":
-            # Логика для недели
-            pass
-        elif period == "month":
-            # Логика для месяца
-            pass
-        
-        # Конвертируем в JSON для AI
-        transactions_data = []
-        for t in transactions:
-            transactions_data.append({
-                "id": t.id,
-                "type": t.type,
-                "amount": t.amount,
-                "category": t.category.name if t.category else None,
-                "description": t.name,
-                "date": t.date.isoformat() if t.date else None
-            })
-        
+        # Сводка за период (агрегаты в SQL, размер ограничен бюджетом токенов)
+        summary, transactions_count = await build_expense_summary(
+            db, user_id=current_user.id, period=period, today=date.today()
+        )
+
         # Анализируем через AI
-        analysis = ai_service.analyze_expenses(transactions_data, period)
-        
+        analysis = await ai_service.analyze_expenses(summary, period)
+
         return {
             "analysis": analysis,
             "period": period,
-            "transactions_count": len(transactions_data)
+            "transactions_count": transactions_count
         }
-        
+
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ошибка анализа: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Ошибка анализа: {str(e)}")
@@ -6,7 +6,6 @@ from sqlmodel import Session
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from pydantic import BaseModel, EmailStr
-from datetime import date
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
@@ -14,12 +13,10 @@ from app import crud, schemas
 from app.api import deps
 from app.core import security
 from app.core.config import settings
+from app.db.changes import forget_user
 from app.schemas.token import GoogleToken, AppleToken
+from app.services import onboarding
 from app.services.email_service import send_verification_code_email, send_password_reset_email
-from app.models.category import CategoryType
-from app.schemas.wallet import WalletCreate
-from app.schemas.category import CategoryCreate
-from app.schemas.transaction import IncomeCreate, ExpenseCreate
 from app.schemas.user import PasswordResetRequest, PasswordResetConfirm
 
 router = APIRouter()
@@ -40,58 +37,13 @@ async def register_user(
             status_code=400,
             detail="The user with this username already exists in the system.",
         )
-    user = crud.user.create(db, obj_in=user_in)
-
-    # ДЕФОЛТНЫЕ КОШЕЛЬКИ
-    wallet1 = crud.crud_wallet.create_with_user(db, WalletCreate(name="Карта", balance=0, icon_name="card", color_hex="#4F8A8B", currency="KZT"), user.id)
-    wallet2 = crud.crud_wallet.create_with_user(db, WalletCreate(name="Наличные", balance=0, icon_name="cash", color_hex="#F9B208", currency="KZT"), user.id)
-
-    # ДЕФОЛТНЫЕ КАТЕГОРИИ
-    cat_income1 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Зарплата", type=CategoryType.INCOME), user=user)
-    cat_expense1 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Еда", type=CategoryType.EXPENSE), user=user)
-    cat_expense2 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Транспорт", type=CategoryType.EXPENSE), user=user)
-    cat_expense3 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Продукты", type=CategoryType.EXPENSE), user=user)
-    cat_expense4 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Развлечения", type=CategoryType.EXPENSE), user=user)
-    cat_expense5 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Здоровье", type=CategoryType.EXPENSE), user=user)
-    cat_expense6 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Связь", type=CategoryType.EXPENSE), user=user)
-    cat_expense7 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Путешествия", type=CategoryType.EXPENSE), user=user)
-    cat_expense8 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Одежда", type=CategoryType.EXPENSE), user=user)
-    cat_expense9 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Красота", type=CategoryType.EXPENSE), user=user)
-    
-
+    # bcrypt — в пуле хэширования, не на event loop
+    hashed_password = await security.get_password_hash_async(user_in.password)
+    user = crud.user.create(db, obj_in=user_in, hashed_password=hashed_password)
 
-    # ДЕФОЛТНЫЕ ДОХОДЫ
-    crud.income.create_with_user(db, obj_in=IncomeCreate(
-        name="Зарплата",
-        icon="dollarsign.circle.fill",
-        color="#00FF00",
-        amount=0,
-        transaction_date=date.today(),
-        category_id=cat_income1.id
-    ), user=user)
-
-    # ДЕФОЛТНЫЕ РАСХОДЫ
-    expense_templates = [
-        ("Еда", "cart.fill", "#FF0000", cat_expense1.id),
-        ("Транспорт", "car.fill", "#00FF00", cat_expense2.id),
-        ("Продукты", "cart.fill", "#00FF00", cat_expense3.id),
-        ("Развлечения", "gamecontroller.fill", "#00FF00", cat_expense4.id),
-        ("Здоровье", "cross.case.fill", "#00FF00", cat_expense5.id),
-        ("Связь", "phone.fill", "#00FF00", cat_expense6.id),
-        ("Путешествия", "airplane", "#00FF00", cat_expense7.id),
-        ("Одежда", "tshirt.fill", "#00FF00", cat_expense8.id),
-        ("Красота", "scissors", "#00FF00", cat_expense9.id),
-    ]
-    for name, icon, color, category_id in expense_templates:
-        crud.expense.create_with_user(db, obj_in=ExpenseCreate(
-            name=name,
-            icon=icon,
-            color=color,
-            amount=0,
-            transaction_date=date.today(),
-            category_id=category_id,
-            wallet_id=wallet1.id
-        ), user=user)
+    onboarding.create_default_data(db, user)
+    # Пользователь и код должны быть в базе до отправки письма
+    db.commit()
 
     await send_verification_code_email(
         email_to=user.email,
@@ -102,15 +54,19 @@ async def register_user(
 
 
 @router.post("/login", response_model=schemas.Token)
-def login(
+async def login(
     db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     Get an access token for a user.
     """
-    user = crud.user.authenticate(
-        db, email=form_data.username, password=form_data.password
-    )
+    user = crud.user.get_by_email(db, email=form_data.username)
+    # bcrypt — в пуле хэширования, не на event loop
+    if user and not (
+        user.hashed_password
+        and await security.verify_password_async(form_data.password, user.hashed_password)
+    ):
+        user = None
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
@@ -122,7 +78,6 @@ def login(
     refresh_token = security.create_refresh_token(user.id)
     user.refresh_token = refresh_token
     db.add(user)
-    db.commit()
 
     return {
         "access_token": access_token,
@@ -161,55 +116,10 @@ def auth_google(
         user = crud.user.create_with_google(
             db, full_name=full_name, email=email, google_id=google_id
         )
-        # ДЕФОЛТНЫЕ КОШЕЛЬКИ
-        wallet1 = crud.crud_wallet.create_with_user(db, WalletCreate(name="Карта", balance=0, icon_name="card", color_hex="#4F8A8B", currency="KZT"), user.id)
-        wallet2 = crud.crud_wallet.create_with_user(db, WalletCreate(name="Наличные", balance=0, icon_name="cash", color_hex="#F9B208", currency="KZT"), user.id)
-        # ДЕФОЛТНЫЕ КАТЕГОРИИ
-        cat_income1 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Зарплата", type=CategoryType.INCOME), user=user)
-        cat_expense1 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Еда", type=CategoryType.EXPENSE), user=user)
-        cat_expense2 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Транспорт", type=CategoryType.EXPENSE), user=user)
-        cat_expense3 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Продукты", type=CategoryType.EXPENSE), user=user)
-        cat_expense4 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Развлечения", type=CategoryType.EXPENSE), user=user)
-        cat_expense5 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Здоровье", type=CategoryType.EXPENSE), user=user)
-        cat_expense6 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Связь", type=CategoryType.EXPENSE), user=user)
-        cat_expense7 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Путешествия", type=CategoryType.EXPENSE), user=user)
-        cat_expense8 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Одежда", type=CategoryType.EXPENSE), user=user)
-        cat_expense9 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Красота", type=CategoryType.EXPENSE), user=user)
-        # ДЕФОЛТНЫЕ ДОХОДЫ
-        crud.income.create_with_user(db, obj_in=IncomeCreate(
-            name="Зарплата",
-            icon="dollarsign.circle.fill",
-            color="#00FF00",
-            amount=0,
-            transaction_date=date.today(),
-            category_id=cat_income1.id
-        ), user=user)
-        # ДЕФОЛТНЫЕ РАСХОДЫ
-        expense_templates = [
-            ("Еда", "cart.fill", "#FF0000", cat_expense1.id),
-            ("Транспорт", "car.fill", "#00FF00", cat_expense2.id),
-            ("Продукты", "cart.fill", "#00FF00", cat_expense3.id),
-            ("Развлечения", "gamecontroller.fill", "#00FF00", cat_expense4.id),
-            ("Здоровье", "cross.case.fill", "#00FF00", cat_expense5.id),
-            ("Связь", "phone.fill", "#00FF00", cat_expense6.id),
-            ("Путешествия", "airplane", "#00FF00", cat_expense7.id),
-            ("Одежда", "tshirt.fill", "#00FF00", cat_expense8.id),
-            ("Красота", "scissors", "#00FF00", cat_expense9.id),
-        ]
-        for name, icon, color, category_id in expense_templates:
-            crud.expense.create_with_user(db, obj_in=ExpenseCreate(
-                name=name,
-                icon=icon,
-                color=color,
-                amount=0,
-                transaction_date=date.today(),
-                category_id=category_id,
-                wallet_id=wallet1.id
-            ), user=user)
+        onboarding.create_default_data(db, user)
     refresh_token = security.create_refresh_token(user.id)
     user.refresh_token = refresh_token
     db.add(user)
-    db.commit()
     return {
         "access_token": security.create_access_token(user.id),
         "refresh_token": refresh_token,
@@ -253,52 +163,10 @@ def auth_apple(
             user = crud.user.create_with_apple(
                 db, full_name=full_name, email=email, apple_id=apple_id
             )
-            # ... (создание кошельков, категорий и т.д. как раньше)
-            wallet1 = crud.crud_wallet.create_with_user(db, WalletCreate(name="Карта", balance=0, icon_name="card", color_hex="#4F8A8B", currency="KZT"), user.id)
-            wallet2 = crud.crud_wallet.create_with_user(db, WalletCreate(name="Наличные", balance=0, icon_name="cash", color_hex="#F9B208", currency="KZT"), user.id)
-            cat_income1 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Зарплата", type=CategoryType.INCOME), user=user)
-            cat_expense1 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Еда", type=CategoryType.EXPENSE), user=user)
-            cat_expense2 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Транспорт", type=CategoryType.EXPENSE), user=user)
-            cat_expense3 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Продукты", type=CategoryType.EXPENSE), user=user)
-            cat_expense4 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Развлечения", type=CategoryType.EXPENSE), user=user)
-            cat_expense5 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Здоровье", type=CategoryType.EXPENSE), user=user)
-            cat_expense6 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Связь", type=CategoryType.EXPENSE), user=user)
-            cat_expense7 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Путешествия", type=CategoryType.EXPENSE), user=user)
-            cat_expense8 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Одежда", type=CategoryType.EXPENSE), user=user)
-            cat_expense9 = crud.category.create_with_user(db, obj_in=CategoryCreate(name="Красота", type=CategoryType.EXPENSE), user=user)
-            crud.income.create_with_user(db, obj_in=IncomeCreate(
-                name="Зарплата",
-                icon="dollarsign.circle.fill",
-                color="#00FF00",
-                amount=0,
-                transaction_date=date.today(),
-                category_id=cat_income1.id
-            ), user=user)
-            expense_templates = [
-                ("Еда", "cart.fill", "#FF0000", cat_expense1.id),
-                ("Транспорт", "car.fill", "#00FF00", cat_expense2.id),
-                ("Продукты", "cart.fill", "#00FF00", cat_expense3.id),
-                ("Развлечения", "gamecontroller.fill", "#00FF00", cat_expense4.id),
-                ("Здоровье", "cross.case.fill", "#00FF00", cat_expense5.id),
-                ("Связь", "phone.fill", "#00FF00", cat_expense6.id),
-                ("Путешествия", "airplane", "#00FF00", cat_expense7.id),
-                ("Одежда", "tshirt.fill", "#00FF00", cat_expense8.id),
-                ("Красота", "scissors", "#00FF00", cat_expense9.id),
-            ]
-            for name, icon, color, category_id in expense_templates:
-                crud.expense.create_with_user(db, obj_in=ExpenseCreate(
-                    name=name,
-                    icon=icon,
-                    color=color,
-                    amount=0,
-                    transaction_date=date.today(),
-                    category_id=category_id,
-                    wallet_id=wallet1.id
-                ), user=user)
+            onboarding.create_default_data(db, user)
     refresh_token = security.create_refresh_token(user.id)
     user.refresh_token = refresh_token
     db.add(user)
-    db.commit()
     return {
         "access_token": security.create_access_token(user.id),
         "refresh_token": refresh_token,
@@ -338,6 +206,8 @@ async def resend_code(
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     code = crud.user.resend_verification_code(db, email=data.email)
+    # Код должен быть в базе до отправки письма
+    db.commit()
     await send_verification_code_email(
         email_to=user.email,
         full_name=user.full_name or user.email,
@@ -386,7 +256,6 @@ def logout(
         return JSONResponse(status_code=status.HTTP_200_OK, content={"message": "Already logged out"})
     user.refresh_token = None
     db.add(user)
-    db.commit()
     return {"message": "Logged out"}
 
 @router.post("/reset-password-request")
@@ -398,6 +267,8 @@ async def reset_password_request(
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь с таким email не найден")
     token = crud.user.generate_reset_password_token(db, email=data.email)
+    # Токен должен быть в базе до отправки письма
+    db.commit()
     await send_password_reset_email(
         email_to=user.email,
         full_name=user.full_name or user.email,
@@ -473,6 +344,8 @@ def delete_account(
         db.execute(text('DELETE FROM income WHERE user_id NOT IN (SELECT id FROM "user") OR wallet_id IS NULL OR category_id IS NULL'))
         
         db.commit()
+        # Пользователь удалён сырым SQL — мимо ORM-слушателей
+        forget_user(user_id)
         print(f"[DELETE_ACCOUNT] Successfully deleted user {user_id} and all related data")
         
     except Exception as e:
@@ -1,22 +1,33 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import Session
 from app import crud, models, schemas
 from app.api import deps
+from app.api.etag import etag_guard
+from app.core.cache import response_cache
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[schemas.Category])
+@router.get(
+    "/",
+    response_model=List[schemas.Category],
+    dependencies=[Depends(etag_guard("categories"))],
+)
 def read_categories(
+    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve categories for the current user.
     """
+    cache_key = response_cache.key("categories", current_user.id, version=request.state.data_version)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
     categories = crud.category.get_multi_by_user(db=db, user=current_user)
-    return categories
+    return response_cache.set(cache_key, categories)
 
 
 @router.post("/", response_model=schemas.Category)
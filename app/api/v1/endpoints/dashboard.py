@@ -1,19 +1,23 @@
 from typing import Any
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date, timedelta
 
 from app import models, schemas
 from app.api import deps
-from app.crud.crud_dashboard import get_dashboard_data
+from app.api.etag import check_etag, make_etag, read_data_version_async
+from app.core.cache import response_cache
+from app.crud.crud_dashboard import get_dashboard_data_async
 
 router = APIRouter()
 
 
 @router.get("/", response_model=schemas.DashboardData)
-def read_dashboard_data(
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+async def read_dashboard_data(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
     start_date: date = None,
     end_date: date = None,
 ) -> Any:
@@ -26,6 +30,15 @@ def read_dashboard_data(
         start_date = today.replace(day=1)
         end_date = (start_date + timedelta(days=31)).replace(day=1) - timedelta(days=1)
 
-    return get_dashboard_data(
+    # ETag по фактическому периоду: без дат он зависит от текущего месяца
+    version = await read_data_version_async(db, current_user.id)
+    check_etag(request, response, make_etag(current_user.id, version, "dashboard", f"{start_date}:{end_date}"))
+
+    cache_key = response_cache.key("dashboard", current_user.id, start_date, end_date, version=version)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    data = await get_dashboard_data_async(
         db=db, user=current_user, start_date=start_date, end_date=end_date
     )
+    return response_cache.set(cache_key, data)
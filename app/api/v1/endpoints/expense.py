@@ -2,11 +2,13 @@ from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.routing import APIRouter
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date
 import math
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.etag import etag_guard
 from app.schemas.page import Page
 from app.schemas.transaction import ExpenseCreate, ExpenseUpdate, ExpenseAssign
 from app.crud.crud_expense import expense as crud_expense
@@ -16,10 +18,14 @@ from app.schemas.transaction import TransactionRead
 router = APIRouter()
 
 
-@router.get("/", response_model=Page[schemas.Expense])
-def read_expenses(
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+@router.get(
+    "/",
+    response_model=Page[schemas.Expense],
+    dependencies=[Depends(etag_guard("expenses", use_async=True))],
+)
+async def read_expenses(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Page size"),
     start_date: Optional[date] = None,
@@ -28,7 +34,7 @@ def read_expenses(
     """
     Retrieve expenses for the current user with pagination and filtering.
     """
-    items, total = crud_expense.get_multi_by_user(
+    items, total = await crud_expense.get_multi_by_user_async(
         db=db,
         user=current_user,
         page=page,
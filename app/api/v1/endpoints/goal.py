@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import Session
 from typing import List
 from app import crud, models, schemas
 from app.api import deps
+from app.api.etag import etag_guard
+from app.core.cache import response_cache
 from app.schemas.goal import GoalCreate, GoalUpdate
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Goal])
-def read_goals(db: Session = Depends(deps.get_db), current_user: models.User = Depends(deps.get_current_active_user)):
-    return crud.goal.get_multi_by_user(db=db, user=current_user)
+@router.get("/", response_model=List[schemas.Goal], dependencies=[Depends(etag_guard("goals"))])
+def read_goals(request: Request, db: Session = Depends(deps.get_db), current_user: models.User = Depends(deps.get_current_active_user)):
+    cache_key = response_cache.key("goals", current_user.id, version=request.state.data_version)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    return response_cache.set(cache_key, crud.goal.get_multi_by_user(db=db, user=current_user))
 
 @router.post("/", response_model=schemas.Goal)
 def create_goal(goal_in: GoalCreate, db: Session = Depends(deps.get_db), current_user: models.User = Depends(deps.get_current_active_user)):
@@ -20,7 +26,7 @@ def update_goal(id: int, goal_in: GoalUpdate, db: Session = Depends(deps.get_db)
     goal = crud.goal.get(db=db, id=id)
     if not goal or goal.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Goal not found")
-    return crud.goal.update(db=db, db_obj=goal, obj_in=goal_in)
+    return crud.goal.update(db=db, db_obj=goal, obj_in=goal_in, user_timezone=current_user.timezone)
 
 @router.delete("/{id}", response_model=schemas.Goal)
 def delete_goal(id: int, db: Session = Depends(deps.get_db), current_user: models.User = Depends(deps.get_current_active_user)):
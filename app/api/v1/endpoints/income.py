@@ -1,11 +1,14 @@
 from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date
 import math
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.etag import etag_guard
+from app.api.idempotency import Idempotency, idempotency_guard
 from app.schemas.page import Page
 from app.schemas.transaction import IncomeCreate, IncomeUpdate, IncomeAssign
 from app.crud.crud_income import income as crud_income
@@ -20,10 +23,14 @@ class IncomeAssignResponse(BaseModel):
     wallet: Wallet
 
 
-@router.get("/", response_model=Page[schemas.Income])
-def read_incomes(
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+@router.get(
+    "/",
+    response_model=Page[schemas.Income],
+    dependencies=[Depends(etag_guard("incomes", use_async=True))],
+)
+async def read_incomes(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Page size"),
     start_date: Optional[date] = None,
@@ -32,7 +39,7 @@ def read_incomes(
     """
     Retrieve incomes for the current user with pagination and filtering.
     """
-    items, total = crud_income.get_multi_by_user(
+    items, total = await crud_income.get_multi_by_user_async(
         db=db,
         user=current_user,
         page=page,
@@ -109,6 +116,7 @@ def assign_income(
     id: int,
     assign_in: IncomeAssign,
     current_user: models.User = Depends(deps.get_current_active_user),
+    idempotency: Idempotency = Depends(idempotency_guard),
 ) -> Any:
     """
     Assign income to wallet (and optionally category).
@@ -118,10 +126,12 @@ def assign_income(
         raise HTTPException(status_code=404, detail="Income not found")
     if income.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    income = crud_income.assign_income_to_wallet(db=db, income_id=id, wallet_id=assign_in.wallet_id, amount=assign_in.amount, category_id=assign_in.category_id)
+    try:
+        income = crud_income.assign_income_to_wallet(db=db, income_id=id, wallet_id=assign_in.wallet_id, amount=assign_in.amount, category_id=assign_in.category_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     wallet = db.get(models.Wallet, assign_in.wallet_id)
-    db.refresh(wallet)
-    return IncomeAssignResponse(
+    return idempotency.save(IncomeAssignResponse(
         income=schemas.Income.model_validate(income),
         wallet=schemas.Wallet.model_validate(wallet)
-    )
+    ))
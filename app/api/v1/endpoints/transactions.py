@@ -1,14 +1,64 @@
-from fastapi import APIRouter, Depends, Request, HTTPException
-from sqlmodel import Session
+import base64
+import csv
+import io
+import json
+from datetime import date
+from typing import Literal, Optional, Tuple, get_args
+
+from fastapi import APIRouter, Depends, Request, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app import models
 from app.api import deps
+from app.api.etag import etag_guard
+from app.db.session import AsyncSessionLocal
 from app.crud.crud_transaction import transaction
+from app.schemas.page import CursorPage
 from app.schemas.transaction import TransactionRead
 import inspect
 import sys
 
 router = APIRouter()
 
+# Типы, которые показываются в ленте
+FeedType = Literal["income", "expense", "goal_transfer"]
+FEED_TYPES = get_args(FeedType)
+
+# Колонки выгрузки истории (GET /transactions/export)
+EXPORT_COLUMNS = (
+    "id",
+    "transaction_date",
+    "type",
+    "amount",
+    "name",
+    "comment",
+    "wallet_name",
+    "goal_name",
+    "from_wallet_id",
+    "to_wallet_id",
+    "from_goal_id",
+    "to_goal_id",
+    "from_category_id",
+    "to_category_id",
+)
+EXPORT_BATCH_SIZE = 1000
+
+
+def _encode_cursor(transaction_date: date, id: int) -> str:
+    raw = f"{transaction_date.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.delete("/{transaction_id}")
 def delete_transaction(
     transaction_id: int,
@@ -34,94 +84,135 @@ def delete_transaction(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete transaction: {str(e)}")
 
-@router.get("/", response_model=list[dict])
-def get_transactions(
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
-):
-    txs = transaction.get_multi_by_user(db, user_id=current_user.id)
-    # Собираем id-шники для батч-запроса
-    wallet_ids = set()
-    income_ids = set()
-    expense_ids = set()
-    goal_ids = set()
-    for tx in txs:
-        if tx.from_wallet_id:
-            wallet_ids.add(tx.from_wallet_id)
-        if tx.to_wallet_id:
-            wallet_ids.add(tx.to_wallet_id)
-        if tx.type == "income" and tx.to_category_id:
-            income_ids.add(tx.to_category_id)
-        if tx.type == "expense" and tx.to_category_id:
-            expense_ids.add(tx.to_category_id)
-        if tx.type == "goal_transfer" and tx.to_goal_id:
-            goal_ids.add(tx.to_goal_id)
-    # Получаем объекты
-    wallets = {w.id: w for w in db.query(models.Wallet).filter(models.Wallet.id.in_(wallet_ids)).all()}
-    incomes = {i.category_id: i for i in db.query(models.Income).filter(models.Income.category_id.in_(income_ids)).all()}
-    expenses = {e.category_id: e for e in db.query(models.Expense).filter(models.Expense.category_id.in_(expense_ids)).all()}
-    goals = {g.id: g for g in db.query(models.Goal).filter(models.Goal.id.in_(goal_ids)).all()}
-    result = []
-    for tx in txs:
-        # Доход
-        if tx.type == "income":
-            income = incomes.get(tx.to_category_id)
-            wallet = wallets.get(tx.to_wallet_id)
-            result.append({
-                "id": tx.id,
-                "date": tx.transaction_date.strftime("%Y-%m-%dT%H:%M:%SZ") if tx.transaction_date else None,
-                "type": tx.type,
-                "amount": tx.amount,
-                "note": tx.comment,
-                "title": tx.name or (income.name if income else "Удалено"),
-                "icon": tx.icon or (income.icon if income else "dollarsign.circle.fill"),
-                "color": tx.color or (income.color if income else "#00FF00"),
-                "wallet_name": tx.wallet_name if tx.wallet_name else (wallet.name if wallet else "Удалено"),
-                "wallet_icon": wallet.icon_name if wallet else "creditcard",
-                "wallet_color": wallet.color_hex if wallet else "#CCCCCC",
-            })
-        # Расход
-        elif tx.type == "expense":
-            expense = expenses.get(tx.to_category_id)
-            wallet = wallets.get(tx.from_wallet_id)
-            result.append({
-                "id": tx.id,
-                "date": tx.transaction_date.strftime("%Y-%m-%dT%H:%M:%SZ") if tx.transaction_date else None,
-                "type": tx.type,
-                "amount": tx.amount,
-                "note": tx.comment,
-                "title": tx.name or (expense.name if expense else "Удалено"),
-                "icon": tx.icon or (expense.icon if expense else "cart.fill"),
-                "color": tx.color or (expense.color if expense else "#FF0000"),
-                "wallet_name": tx.wallet_name if tx.wallet_name else (wallet.name if wallet else "Удалено"),
-                "wallet_icon": wallet.icon_name if wallet else "creditcard",
-                "wallet_color": wallet.color_hex if wallet else "#CCCCCC",
-            })
-        # Цель
-        elif tx.type == "goal_transfer":
-            goal = goals.get(tx.to_goal_id)
-            wallet = wallets.get(tx.from_wallet_id)
-            result.append({
-                "id": tx.id,
-                "date": tx.transaction_date.strftime("%Y-%m-%dT%H:%M:%SZ") if tx.transaction_date else None,
-                "type": tx.type,
-                "amount": tx.amount,
-                "note": tx.comment,
-                "title": tx.goal_name if tx.goal_name else (goal.name if goal else "Удалено"),
-                "icon": tx.icon or (goal.icon if goal else "leaf.circle.fill"),
-                "color": tx.color or (goal.color if goal else "#00FF00"),
-                "wallet_name": tx.wallet_name if tx.wallet_name else (wallet.name if wallet else "Удалено"),
-                "wallet_icon": wallet.icon_name if wallet else "creditcard",
-                "wallet_color": wallet.color_hex if wallet else "#CCCCCC",
-                "goal_id": tx.to_goal_id,
-            })
-        # Остальные типы (wallet_transfer и т.д.) можно добавить по аналогии
-    return result
 
+_feed_etag = etag_guard("transactions", use_async=True)
+
+
+@router.get("/", response_model=CursorPage[dict], dependencies=[Depends(_feed_etag)])
 # Явный endpoint без редиректа
-@router.get("", response_model=list[dict], include_in_schema=False)
-def get_transactions_noslash(
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+@router.get("", response_model=CursorPage[dict], include_in_schema=False, dependencies=[Depends(_feed_etag)])
+async def get_transactions(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100, description="Page size"),
+    type: Optional[FeedType] = Query(None, description="income | expense | goal_transfer"),
+    wallet_id: Optional[int] = None,
+    goal_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
 ):
-    return get_transactions(db=db, current_user=current_user) 
\ No newline at end of file
+    """
+    Лента транзакций пользователя, новые сверху.
+    Постраничная выдача по курсору: next_cursor передаётся в ?cursor= для следующей страницы.
+    """
+    rows, has_more = await transaction.get_feed_page_async(
+        db,
+        user_id=current_user.id,
+        limit=limit,
+        after=_decode_cursor(cursor) if cursor else None,
+        types=(type,) if type else FEED_TYPES,
+        wallet_id=wallet_id,
+        goal_id=goal_id,
+        category_id=category_id,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    result = [_feed_item(*row) for row in rows]
+    next_cursor = None
+    if has_more:
+        last = rows[-1][0]
+        next_cursor = _encode_cursor(last.transaction_date, last.id)
+    return CursorPage(items=result, next_cursor=next_cursor)
+
+
+# Иконка/цвет по умолчанию, если у транзакции нет своих и источник удалён
+_FEED_DEFAULTS = {
+    "income": ("dollarsign.circle.fill", "#00FF00"),
+    "expense": ("cart.fill", "#FF0000"),
+    "goal_transfer": ("leaf.circle.fill", "#00FF00"),
+}
+# Для типов вне FEED_TYPES (wallet_transfer и будущих) — нейтральные
+_FEED_FALLBACK = ("arrow.left.arrow.right.circle.fill", "#CCCCCC")
+
+
+def _feed_item(
+    tx: models.Transaction,
+    wallet_name: Optional[str],
+    wallet_icon: Optional[str],
+    wallet_color: Optional[str],
+    ref_name: Optional[str],
+    ref_icon: Optional[str],
+    ref_color: Optional[str],
+) -> dict:
+    # wallet_* и ref_* пришли из LEFT JOIN; ref_name is None — кошелёк/цель/шаблон удалены
+    wallet_found = wallet_name is not None
+    ref_found = ref_name is not None
+    default_icon, default_color = _FEED_DEFAULTS.get(tx.type, _FEED_FALLBACK)
+    own_title = tx.goal_name if tx.type == "goal_transfer" else tx.name
+    item = {
+        "id": tx.id,
+        "date": tx.transaction_date.strftime("%Y-%m-%dT%H:%M:%SZ") if tx.transaction_date else None,
+        "type": tx.type,
+        "amount": tx.amount,
+        "note": tx.comment,
+        "title": own_title or (ref_name if ref_found else "Удалено"),
+        "icon": tx.icon or (ref_icon if ref_found else default_icon),
+        "color": tx.color or (ref_color if ref_found else default_color),
+        "wallet_name": tx.wallet_name if tx.wallet_name else (wallet_name if wallet_found else "Удалено"),
+        "wallet_icon": wallet_icon if wallet_found else "creditcard",
+        "wallet_color": wallet_color if wallet_found else "#CCCCCC",
+    }
+    if tx.type == "goal_transfer":
+        item["goal_id"] = tx.to_goal_id
+    return item
+
+
+async def _export_chunks(
+    user_id: int, format: str, start_date: Optional[date], end_date: Optional[date]
+):
+    # Сессия живёт столько же, сколько стрим: зависимость get_db закрывается раньше,
+    # чем StreamingResponse начинает отдавать тело.
+    async with AsyncSessionLocal() as db:
+        if format == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(EXPORT_COLUMNS)
+            yield buf.getvalue()
+        async for rows in transaction.stream_by_user_async(
+            db,
+            user_id=user_id,
+            columns=EXPORT_COLUMNS,
+            batch_size=EXPORT_BATCH_SIZE,
+            start_date=start_date,
+            end_date=end_date,
+        ):
+            if format == "csv":
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                writer.writerows([row[c] for c in EXPORT_COLUMNS] for row in rows)
+                yield buf.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(row), ensure_ascii=False, default=str) + "\n"
+                    for row in rows
+                )
+
+
+@router.get("/export")
+async def export_transactions(
+    current_user: models.User = Depends(deps.get_current_active_user_async),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    """
+    Выгрузка всей истории транзакций потоком (NDJSON или CSV), память не зависит от объёма.
+    """
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_chunks(current_user.id, format, start_date, end_date),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'},
+    )
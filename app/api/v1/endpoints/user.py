@@ -1,7 +1,7 @@
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
-from app import models, schemas
+from app import crud, models, schemas
 from app.api import deps
 
 router = APIRouter()
@@ -26,8 +26,9 @@ def delete_current_user(
     Delete current user and all associated data.
     """
     try:
-        # Удаляем пользователя (каскадное удаление удалит все связанные данные)
-        db.delete(current_user)
+        # Удаляем пользователя (каскадное удаление удалит все связанные данные);
+        # current_user — снимок из кэша аутентификации, delete_by_id грузит пользователя со связями
+        crud.user.delete_by_id(db, current_user.id)
         db.commit()
         return {"message": "User and all associated data deleted successfully"}
     except Exception as e:
@@ -1,19 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 from app import crud, models, schemas
 from app.models.wallet import Wallet
 from app.api import deps
-from app.schemas.wallet import WalletAssignGoal, WalletAssignExpense
+from app.api.etag import etag_guard
+from app.api.idempotency import Idempotency, idempotency_guard
+from app.core.cache import response_cache
+from app.schemas.wallet import WalletAssignGoal, WalletAssignExpense, WalletAssignBatch
 from app.models.goal import Goal
 from app.models.transaction import Expense
 from pydantic import BaseModel
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Wallet])
-def read_wallets(db: Session = Depends(deps.get_db), current_user: models.User = Depends(deps.get_current_active_user)):
-    return crud.crud_wallet.get_multi_by_user(db=db, user_id=current_user.id)
+@router.get("/", response_model=List[schemas.Wallet], dependencies=[Depends(etag_guard("wallets", use_async=True))])
+async def read_wallets(request: Request, db: AsyncSession = Depends(deps.get_async_db), current_user: models.User = Depends(deps.get_current_active_user_async)):
+    cache_key = response_cache.key("wallets", current_user.id, version=request.state.data_version)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    wallets = await crud.crud_wallet.get_multi_by_user_async(db=db, user_id=current_user.id)
+    return response_cache.set(cache_key, wallets)
 
 @router.post("/", response_model=schemas.Wallet)
 def create_wallet(wallet_in: schemas.WalletCreate, db: Session = Depends(deps.get_db), current_user: models.User = Depends(deps.get_current_active_user)):
@@ -48,24 +57,27 @@ def assign_goal(
     id: int,
     assign_in: WalletAssignGoal,
     current_user: models.User = Depends(deps.get_current_active_user),
+    idempotency: Idempotency = Depends(idempotency_guard),
 ):
     wallet = db.get(Wallet, id)
     if not wallet or wallet.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Wallet not found")
-    wallet = crud.crud_wallet.assign_goal(
-        db=db,
-        wallet_id=id,
-        goal_id=assign_in.goal_id,
-        amount=assign_in.amount,
-        date=assign_in.date,
-        comment=assign_in.comment,
-    )
+    try:
+        wallet = crud.crud_wallet.assign_goal(
+            db=db,
+            wallet_id=id,
+            goal_id=assign_in.goal_id,
+            amount=assign_in.amount,
+            date=assign_in.date,
+            comment=assign_in.comment,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     goal = db.get(Goal, assign_in.goal_id)
-    db.refresh(goal)
-    return WalletAssignGoalResponse(
+    return idempotency.save(WalletAssignGoalResponse(
         goal=schemas.Goal.model_validate(goal),
         wallet=schemas.Wallet.model_validate(wallet)
-    )
+    ))
 
 class WalletAssignExpenseResponse(BaseModel):
     expense: Expense
@@ -78,21 +90,53 @@ def assign_expense(
     id: int,
     assign_in: WalletAssignExpense,
     current_user: models.User = Depends(deps.get_current_active_user),
+    idempotency: Idempotency = Depends(idempotency_guard),
 ):
     wallet = db.get(Wallet, id)
     if not wallet or wallet.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Wallet not found")
-    wallet = crud.crud_wallet.assign_expense(
-        db=db,
-        wallet_id=id,
-        expense_id=assign_in.expense_id,
-        amount=assign_in.amount,
-        date=assign_in.date,
-        comment=assign_in.comment,
-    )
+    try:
+        wallet = crud.crud_wallet.assign_expense(
+            db=db,
+            wallet_id=id,
+            expense_id=assign_in.expense_id,
+            amount=assign_in.amount,
+            date=assign_in.date,
+            comment=assign_in.comment,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     expense = db.get(Expense, assign_in.expense_id)
-    db.refresh(expense)
-    return WalletAssignExpenseResponse(
+    return idempotency.save(WalletAssignExpenseResponse(
         expense=schemas.Expense.model_validate(expense),
         wallet=schemas.Wallet.model_validate(wallet)
-    ) 
\ No newline at end of file
+    ))
+
+class WalletAssignBatchResponse(BaseModel):
+    wallets: List[schemas.Wallet]
+    goals: List[schemas.Goal]
+    expenses: List[schemas.Expense]
+
+@router.post("/assign-batch", response_model=WalletAssignBatchResponse)
+def assign_batch(
+    *,
+    db: Session = Depends(deps.get_db),
+    batch_in: WalletAssignBatch,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    idempotency: Idempotency = Depends(idempotency_guard),
+):
+    """
+    Несколько перемещений кошелёк → цель/расход в одной транзакции БД:
+    применяются все или ни одного.
+    """
+    try:
+        wallets, goals, expenses = crud.crud_wallet.assign_batch(
+            db=db, user_id=current_user.id, items=batch_in.items
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return idempotency.save(WalletAssignBatchResponse(
+        wallets=[schemas.Wallet.model_validate(w) for w in wallets],
+        goals=[schemas.Goal.model_validate(g) for g in goals],
+        expenses=[schemas.Expense.model_validate(e) for e in expenses],
+    ))
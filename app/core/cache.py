@@ -0,0 +1,190 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """
+    LRU + TTL кэш в памяти процесса (у каждого воркера свой).
+    """
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: dict = {}
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_counter(self, key: str) -> int:
+        # Счётчики (версии) хранятся отдельно и не вытесняются LRU:
+        # сброс версии в 0 мог бы «воскресить» старые записи
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class RedisCache:
+    """
+    Общий для всех воркеров кэш в Redis (или совместимом сервере).
+    """
+
+    # Версии живут дольше любой записи, так что истёкшая версия не вернёт старые данные
+    COUNTER_TTL = 30 * 24 * 3600
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self._client.set(key, json.dumps(value, ensure_ascii=False), ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+    def get_counter(self, key: str) -> int:
+        raw = self._client.get(key)
+        return int(raw) if raw is not None else 0
+
+    def incr(self, key: str) -> int:
+        pipe = self._client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, self.COUNTER_TTL)
+        return pipe.execute()[0]
+
+    def clear(self) -> None:
+        self._client.flushdb()
+
+
+class ResponseCache:
+    """
+    Кэш ответов GET-эндпоинтов по пользователю и пространству имён
+    ("dashboard", "wallets", ...). Инвалидация — увеличение версии
+    пространства пользователя: старые ключи просто перестают читаться
+    и вытесняются по TTL/LRU.
+
+    Счётчики версий MemoryCache — свои в каждом воркере, а invalidate
+    вызывается только в том, что обработал запись. Поэтому, где версия
+    данных пользователя из БД (User.data_version) уже прочитана, её нужно
+    передавать в key(version=...): она общая для всех процессов.
+    """
+
+    def __init__(self, backend, ttl: int, prefix: str = "growfi") -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _version_key(self, namespace: str, user_id: int) -> str:
+        return f"{self.prefix}:v:{namespace}:{user_id}"
+
+    def key(self, namespace: str, user_id: int, *params: Hashable, version: Optional[int] = None) -> Optional[str]:
+        """
+        None — версию прочитать не удалось: get/set такой ключ пропускают.
+        """
+        if version is not None:
+            # data_version из БД растёт при любом изменении данных пользователя
+            version_part = f"d{version}"
+        else:
+            try:
+                version_part = self.backend.get_counter(self._version_key(namespace, user_id))
+            except Exception as e:
+                logger.warning("Cache unavailable, %s served uncached: %s", namespace, e)
+                return None
+        suffix = ":".join(str(p) for p in params)
+        return f"{self.prefix}:{namespace}:{user_id}:{version_part}:{suffix}"
+
+    def get(self, key: Optional[str]) -> Optional[Any]:
+        if key is None:
+            return None
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            # Недоступный кэш не должен ронять запрос
+            logger.warning("Cache get failed: %s", e)
+            return None
+
+    def set(self, key: Optional[str], value: Any, ttl: Optional[int] = None) -> Any:
+        """
+        Кладёт JSON-совместимую копию value и возвращает её.
+        """
+        payload = jsonable_encoder(value)
+        if key is None:
+            return payload
+        try:
+            self.backend.set(key, payload, ttl or self.ttl)
+        except Exception as e:
+            logger.warning("Cache set failed: %s", e)
+        return payload
+
+    def invalidate(self, user_id: int, namespaces: Iterable[str]) -> None:
+        # Вызывается после коммита: ошибка кэша не должна превращать
+        # уже выполненную запись в 500
+        for namespace in namespaces:
+            try:
+                self.backend.incr(self._version_key(namespace, user_id))
+            except Exception as e:
+                logger.warning("Cache invalidation failed for %s of user %s: %s", namespace, user_id, e)
+
+
+def _make_backend():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(settings.REDIS_URL)
+    return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(_make_backend(), ttl=settings.CACHE_TTL_SECONDS)
+
+# Снимки пользователей для аутентификации (deps.get_current_active_user).
+# Всегда в памяти процесса: TTL короткий, а промах стоит один SELECT по PK.
+user_cache = MemoryCache(max_entries=settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+def user_cache_key(user_id: int) -> str:
+    return f"user:{user_id}"
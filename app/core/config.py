@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import EmailStr
 from pydantic_settings import BaseSettings
 import os
@@ -25,6 +25,29 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    ASYNC_SQLALCHEMY_DATABASE_URI: Optional[str] = None
+
+    # Connection pool (per worker process)
+    DB_POOL_ENABLED: bool = True  # False -> NullPool (например, за pgbouncer)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # секунды
+    DB_POOL_PRE_PING: bool = True
+
+    # Response cache: "memory" (per worker) or "redis" (shared)
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_ENTRIES: int = 10_000
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Authenticated-user snapshot cache (per worker); 0 — выключен
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10_000
+
+    # bcrypt worker pool (per worker process)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64  # сверх этого — 503
 
     # Google Auth
     GOOGLE_CLIENT_ID: Optional[str] = None
@@ -41,11 +64,55 @@ class Settings(BaseSettings):
     EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS: int = 48
     EMAIL_TEMPLATES_DIR: str = "/app/templates/email"
     MAIL_CONSOLE: Optional[bool] = False
+    # Background delivery queue (app/services/email_service.py)
+    MAIL_QUEUE_MAX_SIZE: int = 1000
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_MAX_RETRIES: int = 5
+    MAIL_IDLE_TIMEOUT: float = 30.0  # закрыть SMTP-соединение после простоя, сек
+    MAIL_TIMEOUT: float = 30.0
 
     AZURE_OPENAI_API_KEY: str = ""
     AZURE_OPENAI_ENDPOINT: str = ""
     AZURE_OPENAI_MODEL: str = ""
     AZURE_OPENAI_API_VERSION: str = ""
+    # AI client (app/services/ai_service.py)
+    AI_TIMEOUT_SECONDS: float = 20.0
+    AI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    AI_MAX_CONNECTIONS: int = 20
+    AI_MAX_CONCURRENCY: int = 10  # одновременных запросов к модели на воркер
+    AI_QUEUE_TIMEOUT_SECONDS: float = 5.0  # ожидание свободного слота
+    AI_BREAKER_FAILURES: int = 5
+    AI_BREAKER_RESET_SECONDS: float = 30.0
+    AI_CACHE_TTL_SECONDS: int = 24 * 3600
+    AI_PARSER_MIN_CONFIDENCE: float = 0.8  # ниже — сообщение разбирает модель
+    AI_CONTEXT_MAX_TOKENS: int = 600  # бюджет сводки для /ai/analyze-expenses
+
+    # Background jobs (app/worker.py). В API-процессе — только при SCHEDULER_ENABLED
+    SCHEDULER_ENABLED: bool = False
+    REMINDER_TICK_SECONDS: float = 60.0
+    REMINDER_BATCH_SIZE: int = 500
+    REMINDER_SENDER: str = "log"  # "log" | "firebase"
+    FIREBASE_CREDENTIALS: str = ""  # путь к service account JSON
+
+    # Idempotency-Key для мутирующих эндпоинтов (app/api/idempotency.py)
+    IDEMPOTENCY_TTL_HOURS: int = 24
+
+    # Метрики запросов (app/core/metrics.py): /metrics и заголовок Server-Timing
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+    # Доступ к /metrics и /health/* (публичен только /health): Bearer OPS_TOKEN
+    # или адрес клиента из OPS_ALLOWED_NETWORKS; без настроек — закрыты (404).
+    # Адрес берётся с учётом X-Forwarded-For — FORWARDED_ALLOW_IPS
+    # (gunicorn.conf.py) тогда должен указывать только на свой прокси
+    OPS_TOKEN: str = ""
+    OPS_ALLOWED_NETWORKS: List[str] = []  # CIDR, например ["10.0.0.0/8"]
+
+    # Отладка SQL (app/db/query_debug.py): "off" | "warn" | "raise" (для тестов)
+    QUERY_DEBUG: str = "off"
+    QUERY_BUDGET: int = 20  # запросов на HTTP-запрос
+    QUERY_BUDGETS: Dict[str, int] = {}  # шаблон маршрута -> свой бюджет
+    QUERY_REPEAT_LIMIT: int = 3  # одинаковых запросов на HTTP-запрос
+    SLOW_QUERY_MS: float = 100.0  # медленнее — в лог с EXPLAIN
 
     class Config:
         case_sensitive = True
@@ -60,3 +127,17 @@ if not settings.SQLALCHEMY_DATABASE_URI:
         f"postgresql+psycopg2://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@"
         f"{settings.POSTGRES_SERVER}/{settings.POSTGRES_DB}"
     )
+
+# Async (asyncpg / aiosqlite) URI for the AsyncEngine, derived from the sync one
+_ASYNC_DRIVERS = {
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "postgresql://": "postgresql+asyncpg://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+if not settings.ASYNC_SQLALCHEMY_DATABASE_URI:
+    for sync_prefix, async_prefix in _ASYNC_DRIVERS.items():
+        if settings.SQLALCHEMY_DATABASE_URI.startswith(sync_prefix):
+            settings.ASYNC_SQLALCHEMY_DATABASE_URI = (
+                async_prefix + settings.SQLALCHEMY_DATABASE_URI[len(sync_prefix):]
+            )
+            break
@@ -0,0 +1,290 @@
+"""
+Метрики запросов одного процесса (воркера): длительность по маршрутам,
+число SQL-запросов и время в БД на запрос, время во внешних сервисах
+(AI, почта).
+
+Отдаются в формате Prometheus на /metrics и коротко — в заголовке
+Server-Timing каждого ответа. Рост db_statements у маршрута после релиза —
+первый признак N+1.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield self.name, dict(zip(self.labels, label_values)), value
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label_values -> [счётчики по корзинам (не накопительные) + переполнение, сумма]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for label_values, counts, total in series:
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Gauge:
+    """
+    Значения снимаются при каждом рендере: func возвращает пары (метки, значение).
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, func: Callable[[], Iterable[Tuple[Dict[str, str], float]]]) -> None:
+        self.name = name
+        self.help = help
+        self.func = func
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self.func():
+            yield self.name, labels, value
+
+
+def stats_samples(stats: Dict[str, Any], **labels: str) -> Iterator[Tuple[Dict[str, str], float]]:
+    """
+    Числовые поля словаря stats() (пул, хэширование, почта...) — как метки stat="...".
+    """
+    for key, value in stats.items():
+        if isinstance(value, (bool, int, float)):
+            yield {**labels, "stat": key}, float(value)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, func: Callable[[], Iterable[Tuple[Dict[str, str], float]]]) -> Gauge:
+        return self._register(Gauge(name, help, func))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    label_str = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                    lines.append(f"{name}{{{label_str}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "growfi_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+REQUEST_SECONDS = registry.histogram(
+    "growfi_http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+REQUEST_DB_STATEMENTS = registry.histogram(
+    "growfi_http_request_db_statements", "SQL statements per request", ("method", "route"), STATEMENT_BUCKETS
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "growfi_http_request_db_seconds", "Time spent in SQL per request", ("method", "route")
+)
+DB_STATEMENTS = registry.counter(
+    "growfi_db_statements_total", "SQL statements, including background jobs"
+)
+DB_SECONDS = registry.counter(
+    "growfi_db_seconds_total", "Time spent in SQL, including background jobs"
+)
+EXTERNAL_SECONDS = registry.histogram(
+    "growfi_external_call_duration_seconds", "Calls to external services (ai, email)", ("service",)
+)
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Счётчики текущего запроса. Через contextvar доступны и в потоке
+    sync-эндпоинта: threadpool копирует контекст вместе с этим объектом.
+    """
+
+    db_statements: int = 0
+    db_seconds: float = 0.0
+    external: Dict[str, float] = field(default_factory=dict)
+
+    def server_timing(self, total: float) -> str:
+        parts = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_statements} queries"']
+        parts += [f"{service};dur={seconds * 1000:.1f}" for service, seconds in self.external.items()]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current_request() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+@contextmanager
+def timed(service: str) -> Iterator[None]:
+    """
+    Замер вызова внешнего сервиса; время попадает и в Server-Timing запроса.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        EXTERNAL_SECONDS.observe(elapsed, service)
+        request = _current.get()
+        if request is not None:
+            request.external[service] = request.external.get(service, 0.0) + elapsed
+
+
+_QUERY_START = "metrics_query_start"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_QUERY_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info[_QUERY_START].pop()
+    DB_STATEMENTS.inc()
+    DB_SECONDS.inc(amount=elapsed)
+    request = _current.get()
+    if request is not None:
+        request.db_statements += 1
+        request.db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute для упавшего запроса не вызывается
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_QUERY_START):
+        conn.info[_QUERY_START].pop()
+
+
+def instrument_queries(engine: Engine) -> None:
+    """
+    Считает запросы и время в БД. Для AsyncEngine передавать engine.sync_engine.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    Чистый ASGI-middleware (без BaseHTTPMiddleware — не буферизует стримы).
+    Маршрут берётся из scope["route"] после роутинга — шаблон пути
+    (/wallet/{id}), а не сам путь, чтобы число серий не росло.
+    """
+
+    def __init__(self, app, server_timing: bool = True) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = RequestMetrics()
+        token = _current.set(request)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    value = request.server_timing(time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", value.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            REQUESTS.inc(method, route, str(status_code))
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method, route)
+            REQUEST_DB_STATEMENTS.observe(request.db_statements, method, route)
+            REQUEST_DB_SECONDS.observe(request.db_seconds, method, route)
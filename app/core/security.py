@@ -1,5 +1,9 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Dict, Union
 
 from jose import jwt
 from passlib.context import CryptContext
@@ -39,9 +43,111 @@ def create_refresh_token(
     return encoded_jwt
 
 
+class HashingPoolSaturated(Exception):
+    """
+    Очередь bcrypt переполнена — запрос отклоняется (503), а не ждёт.
+    """
+
+
+class PasswordHasher:
+    """
+    Ограниченный пул потоков для bcrypt (~250 мс CPU на операцию).
+    bcrypt отпускает GIL, поэтому потоков достаточно; лимит очереди
+    не даёт всплеску логинов занять все воркеры и event loop.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.pending_peak = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.busy_total = 0.0
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingPoolSaturated()
+            self.pending += 1
+            self.submitted += 1
+            self.pending_peak = max(self.pending_peak, self.pending)
+        queued_at = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.pending -= 1
+                    self.completed += 1
+                    self.wait_total += started - queued_at
+                    self.busy_total += finished - started
+
+        return self._executor.submit(run)
+
+    def hash(self, password: str) -> str:
+        return self._submit(pwd_context.hash, password).result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(pwd_context.verify, plain_password, hashed_password).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(
+            self._submit(pwd_context.verify, plain_password, hashed_password)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "pending_peak": self.pending_peak,
+                "saturation": round(self.pending / self.max_pending, 3)
+                if self.max_pending
+                else 1.0,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_avg_seconds": round(self.wait_total / self.completed, 6)
+                if self.completed
+                else 0.0,
+                "busy_avg_seconds": round(self.busy_total / self.completed, 6)
+                if self.completed
+                else 0.0,
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+# Синхронные версии — для sync-эндпоинтов (они уже в threadpool и просто ждут пул)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify_async(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.hash_async(password)
@@ -1,7 +1,7 @@
 from .base import CRUDBase  # noqa
 from .crud_user import user  # noqa
 from .crud_category import category  # noqa
-from .crud_dashboard import get_dashboard_data  # noqa
+from .crud_dashboard import get_dashboard_data, get_dashboard_data_async  # noqa
 from .crud_goal import goal  # noqa
 from .crud_wallet import crud_wallet
 from .crud_income import income
@@ -1,8 +1,10 @@
 from typing import List
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.category import Category
 from app.models.user import User
 from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.crud import crud_rollup
 from app.crud.base import CRUDBase
 
 
@@ -12,8 +14,7 @@ class CRUDCategory(CRUDBase[Category, CategoryCreate, CategoryUpdate]):
     ) -> Category:
         db_obj = Category(name=obj_in.name, type=obj_in.type.value, user_id=user.id)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
     def get_multi_by_user(
@@ -27,16 +28,28 @@ class CRUDCategory(CRUDBase[Category, CategoryCreate, CategoryUpdate]):
         )
         return db.exec(statement).all()
 
+    async def get_multi_by_user_async(
+        self, db: AsyncSession, *, user: User, skip: int = 0, limit: int = 100
+    ) -> List[Category]:
+        statement = (
+            select(Category)
+            .where(Category.user_id == user.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return (await db.exec(statement)).all()
+
     def update(
         self, db: Session, *, db_obj: Category, obj_in: CategoryUpdate
     ) -> Category:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
+            update_data = obj_in.model_dump(exclude_unset=True)
         return super().update(db, db_obj=db_obj, obj_in=update_data)
 
     def remove(self, db: Session, *, id: int) -> Category:
+        crud_rollup.remove_category(db, id)
         return super().remove(db, id=id)
 
 
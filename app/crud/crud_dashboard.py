@@ -1,56 +1,46 @@
 from datetime import date
 from sqlalchemy import func
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models import Income, Expense, User, Category
 from app.schemas.dashboard import DashboardData, CategoryExpense
-from app.models.transaction import Transaction
+from app.models.rollup import TransactionDailyRollup
 
 
-def get_dashboard_data(
-    db: Session, *, user: User, start_date: date, end_date: date
-) -> DashboardData:
-
-    # Total Income
-    total_income_query = select(func.sum(Transaction.amount)).where(
-        Transaction.user_id == user.id,
-        Transaction.type == "income",
-        Transaction.amount > 0,
-        Transaction.transaction_date >= start_date,
-        Transaction.transaction_date <= end_date,
-    )
-    total_income = db.exec(total_income_query).one_or_none() or 0.0
-
-    # Total Expense
-    total_expense_query = select(func.sum(Transaction.amount)).where(
-        Transaction.user_id == user.id,
-        Transaction.type == "expense",
-        Transaction.amount > 0,
-        Transaction.transaction_date >= start_date,
-        Transaction.transaction_date <= end_date,
-    )
-    total_expense = db.exec(total_expense_query).one_or_none() or 0.0
-
-    # Expenses by Category
-    # (если нужно, можно добавить join с Category по to_category_id)
-    expenses_by_cat_query = (
-        select(Category.name, func.sum(Transaction.amount))
-        .join(Category, Transaction.to_category_id == Category.id)
+def _dashboard_query(user: User, start_date: date, end_date: date):
+    # Читаем дневную сводку, а не сырые транзакции: стоимость зависит
+    # от числа дней × категорий в периоде, а не от числа транзакций.
+    return (
+        select(
+            Category.name,
+            func.sum(TransactionDailyRollup.amount).filter(TransactionDailyRollup.type == "income"),
+            func.sum(TransactionDailyRollup.amount).filter(TransactionDailyRollup.type == "expense"),
+        )
+        .select_from(TransactionDailyRollup)
+        .outerjoin(Category, TransactionDailyRollup.category_id == Category.id)
         .where(
-            Transaction.user_id == user.id,
-            Transaction.type == "expense",
-            Transaction.amount > 0,
-            Transaction.transaction_date >= start_date,
-            Transaction.transaction_date <= end_date,
+            TransactionDailyRollup.user_id == user.id,
+            TransactionDailyRollup.type.in_(("income", "expense")),
+            TransactionDailyRollup.day >= start_date,
+            TransactionDailyRollup.day <= end_date,
         )
         .group_by(Category.name)
     )
-    expenses_by_cat_result = db.exec(expenses_by_cat_query).all()
 
-    expenses_by_category = [
-        CategoryExpense(category_name=name, amount=amount)
-        for name, amount in expenses_by_cat_result
-    ]
+
+def _build_dashboard(rows) -> DashboardData:
+    total_income = 0.0
+    total_expense = 0.0
+    expenses_by_category = []
+    for name, income_sum, expense_sum in rows:
+        total_income += income_sum or 0.0
+        total_expense += expense_sum or 0.0
+        # Расходы без категории (или с удалённой) идут только в итог
+        if name is not None and expense_sum is not None:
+            expenses_by_category.append(
+                CategoryExpense(category_name=name, amount=expense_sum)
+            )
 
     # Balance
     balance = total_income - total_expense
@@ -61,3 +51,16 @@ def get_dashboard_data(
         balance=balance,
         expenses_by_category=expenses_by_category,
     )
+
+
+def get_dashboard_data(
+    db: Session, *, user: User, start_date: date, end_date: date
+) -> DashboardData:
+    return _build_dashboard(db.exec(_dashboard_query(user, start_date, end_date)).all())
+
+
+async def get_dashboard_data_async(
+    db: AsyncSession, *, user: User, start_date: date, end_date: date
+) -> DashboardData:
+    result = await db.exec(_dashboard_query(user, start_date, end_date))
+    return _build_dashboard(result.all())
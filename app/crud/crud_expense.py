@@ -1,16 +1,22 @@
 from typing import List, Tuple, Optional
 from datetime import date
 from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.crud.base import CRUDBase
 from app.models import Expense, User
 from app.schemas.transaction import ExpenseCreate, ExpenseUpdate
 
 class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
     def create_with_user(self, db: Session, *, obj_in: ExpenseCreate, user: User) -> Expense:
-        db_obj = Expense(**obj_in.dict(), user_id=user.id)
+        db_obj = Expense(**obj_in.model_dump(), user_id=user.id)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
+        return db_obj
+
+    async def create_with_user_async(self, db: AsyncSession, *, obj_in: ExpenseCreate, user: User) -> Expense:
+        db_obj = Expense(**obj_in.model_dump(), user_id=user.id)
+        db.add(db_obj)
+        await db.flush()
         return db_obj
 
     def get_multi_by_user(
@@ -23,15 +29,46 @@ class CRUDExpense(CRUDBase[Expense, ExpenseCreate, ExpenseUpdate]):
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
     ) -> Tuple[List[Expense], int]:
+        count_query, items_query = self._user_page_queries(
+            user=user, page=page, size=size, start_date=start_date, end_date=end_date
+        )
+        total = db.exec(count_query).one()
+        items = db.exec(items_query).all()
+        return items, total
+
+    async def get_multi_by_user_async(
+        self,
+        db: AsyncSession,
+        *,
+        user: User,
+        page: int = 1,
+        size: int = 100,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Tuple[List[Expense], int]:
+        count_query, items_query = self._user_page_queries(
+            user=user, page=page, size=size, start_date=start_date, end_date=end_date
+        )
+        total = (await db.exec(count_query)).one()
+        items = (await db.exec(items_query)).all()
+        return items, total
+
+    def _user_page_queries(
+        self,
+        *,
+        user: User,
+        page: int,
+        size: int,
+        start_date: Optional[date],
+        end_date: Optional[date],
+    ):
         query = select(self.model).where(self.model.user_id == user.id)
         if start_date:
             query = query.where(self.model.transaction_date >= start_date)
         if end_date:
             query = query.where(self.model.transaction_date <= end_date)
         count_query = select(func.count()).select_from(query.subquery())
-        total = db.exec(count_query).one()
         items_query = query.offset((page - 1) * size).limit(size)
-        items = db.exec(items_query).all()
-        return items, total
+        return count_query, items_query
 
 expense = CRUDExpense(Expense) 
\ No newline at end of file
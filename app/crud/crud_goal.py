@@ -1,6 +1,13 @@
+from datetime import datetime
+from typing import Any, Dict, Union
+
 from app.crud.base import CRUDBase
 from app.models.goal import Goal
+from app.models.user import User
 from app.schemas.goal import GoalCreate, GoalUpdate
+from app.services.reminders import next_reminder_at, schedule_goal
+
+REMINDER_FIELDS = ("reminder_period", "selected_weekday", "selected_month_day", "selected_time")
 
 class CRUDGoal(CRUDBase[Goal, GoalCreate, GoalUpdate]):
     def create_with_user(self, db, obj_in, user):
@@ -19,12 +26,24 @@ class CRUDGoal(CRUDBase[Goal, GoalCreate, GoalUpdate]):
             selected_month_day=getattr(obj_in, 'selected_month_day', None),
             selected_time=getattr(obj_in, 'selected_time', None)
         )
+        schedule_goal(db_obj, user.timezone)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
+    def update(self, db, *, db_obj: Goal, obj_in: Union[GoalUpdate, Dict[str, Any]], user_timezone: str = None) -> Goal:
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=False)
+        if any(field in update_data for field in REMINDER_FIELDS):
+            if user_timezone is None:
+                user_timezone = db.get(User, db_obj.user_id).timezone
+            schedule = {field: update_data.get(field, getattr(db_obj, field)) for field in REMINDER_FIELDS}
+            update_data = {
+                **update_data,
+                "next_reminder_at": next_reminder_at(**schedule, user_timezone=user_timezone, after=datetime.utcnow()),
+            }
+        return super().update(db, db_obj=db_obj, obj_in=update_data)
+
     def get_multi_by_user(self, db, user, skip=0, limit=100):
         return db.query(Goal).filter(Goal.user_id == user.id).offset(skip).limit(limit).all()
 
-goal = CRUDGoal(Goal) 
\ No newline at end of file
+goal = CRUDGoal(Goal) 
@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.idempotency import IdempotencyKey
+
+
+def purge_expired() -> int:
+    """
+    Удаляет ключи старше IDEMPOTENCY_TTL_HOURS (периодическая задача воркера).
+    """
+    expired_before = datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+    with Session(engine) as db:
+        result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < expired_before))
+        db.commit()
+    return result.rowcount
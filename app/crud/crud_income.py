@@ -1,21 +1,31 @@
 from typing import List, Tuple, Optional
 from datetime import date
+from sqlalchemy import update
 from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.crud.base import CRUDBase
 from app.models import Income, User, Wallet
 from app.schemas.transaction import IncomeCreate, IncomeUpdate
-from app.crud.crud_transaction import transaction
-from app.schemas.transaction import TransactionCreate
+from app.crud import crud_rollup
+from app.db.changes import track_change
+from app.models.transaction import Transaction
 
 import logging
 logger = logging.getLogger(__name__)
 
 class CRUDIncome(CRUDBase[Income, IncomeCreate, IncomeUpdate]):
     def create_with_user(self, db: Session, *, obj_in: IncomeCreate, user: User) -> Income:
-        db_obj = Income(**obj_in.dict(), user_id=user.id)
+        db_obj = Income(**obj_in.model_dump(), user_id=user.id)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
+        return db_obj
+
+    async def create_with_user_async(
+        self, db: AsyncSession, *, obj_in: IncomeCreate, user: User, **extra
+    ) -> Income:
+        db_obj = Income(**obj_in.model_dump(), **extra, user_id=user.id)
+        db.add(db_obj)
+        await db.flush()
         return db_obj
 
     def get_multi_by_user(
@@ -28,16 +38,47 @@ class CRUDIncome(CRUDBase[Income, IncomeCreate, IncomeUpdate]):
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
     ) -> Tuple[List[Income], int]:
+        count_query, items_query = self._user_page_queries(
+            user=user, page=page, size=size, start_date=start_date, end_date=end_date
+        )
+        total = db.exec(count_query).one()
+        items = db.exec(items_query).all()
+        return items, total
+
+    async def get_multi_by_user_async(
+        self,
+        db: AsyncSession,
+        *,
+        user: User,
+        page: int = 1,
+        size: int = 100,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Tuple[List[Income], int]:
+        count_query, items_query = self._user_page_queries(
+            user=user, page=page, size=size, start_date=start_date, end_date=end_date
+        )
+        total = (await db.exec(count_query)).one()
+        items = (await db.exec(items_query)).all()
+        return items, total
+
+    def _user_page_queries(
+        self,
+        *,
+        user: User,
+        page: int,
+        size: int,
+        start_date: Optional[date],
+        end_date: Optional[date],
+    ):
         query = select(self.model).where(self.model.user_id == user.id)
         if start_date:
             query = query.where(self.model.transaction_date >= start_date)
         if end_date:
             query = query.where(self.model.transaction_date <= end_date)
         count_query = select(func.count()).select_from(query.subquery())
-        total = db.exec(count_query).one()
         items_query = query.offset((page - 1) * size).limit(size)
-        items = db.exec(items_query).all()
-        return items, total
+        return count_query, items_query
 
     def assign_income_to_wallet(
         self, db: Session, *, income_id: int, wallet_id: int, amount: float, category_id: Optional[int] = None
@@ -47,29 +88,26 @@ class CRUDIncome(CRUDBase[Income, IncomeCreate, IncomeUpdate]):
             if not income:
                 logger.warning(f"Income not found: income_id={income_id}")
                 raise ValueError("Income not found")
-            wallet = db.get(Wallet, wallet_id)
+            # Начисление — одним UPDATE, без чтения баланса в Python
+            wallet = db.scalars(
+                update(Wallet)
+                .where(Wallet.id == wallet_id, Wallet.user_id == income.user_id)
+                .values(balance=Wallet.balance + amount)
+                .returning(Wallet)
+            ).one_or_none()
             if not wallet:
                 logger.warning(f"Wallet not found: wallet_id={wallet_id}")
                 raise ValueError("Wallet not found")
-            wallet.balance += amount
-            db.add(wallet)
-            income.wallet_id = wallet_id
-            income.amount += amount
+            values = {"wallet_id": wallet_id, "amount": Income.amount + amount}
             if category_id is not None:
-                income.category_id = category_id
-            db.add(income)
-            db.commit()
-            db.expire_all()
-            db.refresh(income)
-            db.refresh(wallet)
-            # Создаём Transaction
-            transaction_obj = TransactionCreate(
+                values["category_id"] = category_id
+            income = db.scalars(
+                update(Income).where(Income.id == income_id).values(**values).returning(Income)
+            ).one()
+            # Транзакция, сводка и балансы — одним коммитом
+            transaction_obj = Transaction(
                 user_id=income.user_id,
-                from_wallet_id=None,
                 to_wallet_id=wallet_id,
-                from_goal_id=None,
-                to_goal_id=None,
-                from_category_id=None,
                 to_category_id=category_id,
                 amount=amount,
                 transaction_date=income.transaction_date or date.today(),
@@ -79,10 +117,15 @@ class CRUDIncome(CRUDBase[Income, IncomeCreate, IncomeUpdate]):
                 icon=income.icon,
                 color=income.color
             )
-            transaction.create(db, obj_in=transaction_obj)
+            db.add(transaction_obj)
+            db.flush()
+            crud_rollup.add_transaction(db, transaction_obj)
+            track_change(db, income.user_id, "wallets", "incomes")
+            db.flush()
             logger.info(f"Income assigned and transaction created: income_id={income_id}")
             return income
         except Exception as e:
+            db.rollback()
             logger.exception(f"assign_income_to_wallet error: {e}")
             raise
 
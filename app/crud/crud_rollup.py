@@ -0,0 +1,134 @@
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.models.rollup import TransactionDailyRollup
+from app.models.transaction import Transaction
+
+_KEY = ("user_id", "day", "type", "category_id")
+
+
+def _rollup_key(tx: Transaction) -> dict:
+    return {
+        "user_id": tx.user_id,
+        "day": tx.transaction_date,
+        "type": tx.type,
+        "category_id": tx.to_category_id or 0,
+    }
+
+
+def _counted(tx: Transaction) -> bool:
+    # Как и дашборд, учитываем только положительные суммы
+    return tx.amount is not None and tx.amount > 0
+
+
+def _key_clause(tx: Transaction) -> list:
+    return [getattr(TransactionDailyRollup, name) == value for name, value in _rollup_key(tx).items()]
+
+
+# Диалекты с INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _add_portable(db: Session, tx: Transaction) -> None:
+    # Без ON CONFLICT: UPDATE, а если строки ещё нет — INSERT. Если ту же строку
+    # параллельно вставил другой запрос, сработает уникальный ключ — тогда UPDATE
+    bump = (
+        update(TransactionDailyRollup)
+        .where(*_key_clause(tx))
+        .values(
+            amount=TransactionDailyRollup.amount + tx.amount,
+            tx_count=TransactionDailyRollup.tx_count + 1,
+        )
+    )
+    if db.execute(bump).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(TransactionDailyRollup).values(**_rollup_key(tx), amount=tx.amount, tx_count=1))
+    except IntegrityError:
+        db.execute(bump)
+
+
+def add_transaction(db: Session, tx: Transaction) -> None:
+    """
+    Добавляет транзакцию в дневную сводку. Не коммитит — вызывается
+    в той же транзакции БД, что и вставка самой Transaction.
+    """
+    if not _counted(tx):
+        return
+    insert_ = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert_ is None:
+        _add_portable(db, tx)
+        return
+    stmt = insert_(TransactionDailyRollup).values(**_rollup_key(tx), amount=tx.amount, tx_count=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(_KEY),
+        set_={
+            "amount": TransactionDailyRollup.amount + stmt.excluded.amount,
+            "tx_count": TransactionDailyRollup.tx_count + stmt.excluded.tx_count,
+        },
+    )
+    db.execute(stmt)
+
+
+def remove_transaction(db: Session, tx: Transaction) -> None:
+    """
+    Вычитает транзакцию из дневной сводки; опустевшие строки удаляются. Не коммитит.
+    """
+    if not _counted(tx):
+        return
+    key = _key_clause(tx)
+    db.execute(
+        update(TransactionDailyRollup)
+        .where(*key)
+        .values(
+            amount=TransactionDailyRollup.amount - tx.amount,
+            tx_count=TransactionDailyRollup.tx_count - 1,
+        )
+    )
+    db.execute(delete(TransactionDailyRollup).where(*key, TransactionDailyRollup.tx_count <= 0))
+
+
+def remove_category(db: Session, category_id: int) -> None:
+    """
+    Транзакции категории удаляются каскадом в БД — вместе с ними уходят и её строки сводки.
+    """
+    db.execute(delete(TransactionDailyRollup).where(TransactionDailyRollup.category_id == category_id))
+
+
+def rebuild(db: Session, *, user_id: Optional[int] = None) -> int:
+    """
+    Пересобирает сводку из истории транзакций (всех или одного пользователя)
+    одним INSERT ... SELECT. Возвращает число строк сводки; коммит — за вызывающим.
+    """
+    category_id = func.coalesce(Transaction.to_category_id, 0)
+    source = (
+        select(
+            Transaction.user_id,
+            Transaction.transaction_date,
+            Transaction.type,
+            category_id,
+            func.sum(Transaction.amount),
+            func.count(),
+        )
+        .where(Transaction.amount > 0)
+        .group_by(Transaction.user_id, Transaction.transaction_date, Transaction.type, category_id)
+    )
+    clear = delete(TransactionDailyRollup)
+    if user_id is not None:
+        source = source.where(Transaction.user_id == user_id)
+        clear = clear.where(TransactionDailyRollup.user_id == user_id)
+    db.execute(clear)
+    result = db.execute(
+        insert(TransactionDailyRollup).from_select(
+            [*_KEY, "amount", "tx_count"], source
+        )
+    )
+    return result.rowcount
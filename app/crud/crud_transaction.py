@@ -1,10 +1,14 @@
-from typing import List, Tuple, Optional
+from typing import AsyncIterator, List, Tuple, Optional, Sequence
 from datetime import date
 
+from sqlalchemy import RowMapping, and_, case, or_, tuple_
+from sqlalchemy import select as sa_select
 from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.crud import crud_rollup
 from app.crud.base import CRUDBase
-from app.models import Income, Expense, User
+from app.models import Income, Expense, User, Wallet, Goal
 from app.schemas.transaction import (
     IncomeCreate,
     ExpenseCreate,
@@ -21,4 +25,188 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionRead])
     def get_multi_by_user(self, db: Session, user_id: int) -> list[Transaction]:
         return db.query(Transaction).filter(Transaction.user_id == user_id).all()
 
+    def create(self, db: Session, *, obj_in: TransactionCreate) -> Transaction:
+        # Транзакция и её вклад в дневную сводку коммитятся вместе
+        db_obj = Transaction(**obj_in.model_dump())
+        db.add(db_obj)
+        db.flush()
+        crud_rollup.add_transaction(db, db_obj)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> Optional[Transaction]:
+        obj = db.get(Transaction, id)
+        db.delete(obj)
+        crud_rollup.remove_transaction(db, obj)
+        db.flush()
+        return obj
+
+    async def get_feed_page_async(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        limit: int = 50,
+        after: Optional[Tuple[date, int]] = None,
+        types: Sequence[str] = (),
+        wallet_id: Optional[int] = None,
+        goal_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Tuple[list, bool]:
+        """
+        Keyset page of the user's feed, newest first (transaction_date DESC, id DESC),
+        enriched in the same statement with the wallet and the title/icon/color source
+        (goal for goal_transfer, first income/expense of the category otherwise).
+        `after` is the (transaction_date, id) of the last row of the previous page.
+
+        Rows are (Transaction, wallet_name, wallet_icon, wallet_color,
+        ref_name, ref_icon, ref_color); returns the rows and whether there is a next page.
+        """
+        income_tpl = self._category_template(Income, user_id)
+        expense_tpl = self._category_template(Expense, user_id)
+        wallet_id_col = case(
+            (Transaction.type == "income", Transaction.to_wallet_id),
+            else_=Transaction.from_wallet_id,
+        )
+        query = (
+            select(
+                Transaction,
+                Wallet.name,
+                Wallet.icon_name,
+                Wallet.color_hex,
+                func.coalesce(Goal.name, income_tpl.c.name, expense_tpl.c.name),
+                func.coalesce(Goal.icon, income_tpl.c.icon, expense_tpl.c.icon),
+                func.coalesce(Goal.color, income_tpl.c.color, expense_tpl.c.color),
+            )
+            .outerjoin(Wallet, Wallet.id == wallet_id_col)
+            .outerjoin(
+                Goal,
+                and_(Transaction.type == "goal_transfer", Goal.id == Transaction.to_goal_id),
+            )
+            .outerjoin(
+                income_tpl,
+                and_(Transaction.type == "income", income_tpl.c.category_id == Transaction.to_category_id),
+            )
+            .outerjoin(
+                expense_tpl,
+                and_(Transaction.type == "expense", expense_tpl.c.category_id == Transaction.to_category_id),
+            )
+            .where(
+                *self._user_filters(
+                    user_id=user_id,
+                    types=types,
+                    wallet_id=wallet_id,
+                    goal_id=goal_id,
+                    category_id=category_id,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+            )
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(Transaction.transaction_date, Transaction.id) < tuple_(*after)
+            )
+        query = query.order_by(
+            Transaction.transaction_date.desc(), Transaction.id.desc()
+        ).limit(limit + 1)
+        rows = (await db.exec(query)).all()
+        return rows[:limit], len(rows) > limit
+
+    @staticmethod
+    def _category_template(model, user_id: int):
+        # Одна запись income/expense на категорию (с минимальным id) — источник
+        # названия/иконки/цвета для транзакций без своих. Аналог DISTINCT ON (category_id),
+        # но работает и на sqlite.
+        first_ids = (
+            select(func.min(model.id))
+            .where(model.user_id == user_id, model.category_id.is_not(None))
+            .group_by(model.category_id)
+        )
+        return (
+            select(model.category_id, model.name, model.icon, model.color)
+            .where(model.id.in_(first_ids))
+            .subquery()
+        )
+
+    async def stream_by_user_async(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        columns: Sequence[str],
+        batch_size: int = 1000,
+        types: Sequence[str] = (),
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> AsyncIterator[List[RowMapping]]:
+        """
+        Full history in batches through a server-side cursor (yield_per),
+        oldest first. Rows are plain mappings of the requested columns.
+        """
+        table = Transaction.__table__
+        query = (
+            sa_select(*(table.c[name] for name in columns))
+            .where(
+                *self._user_filters(
+                    user_id=user_id, types=types, start_date=start_date, end_date=end_date
+                )
+            )
+            .order_by(table.c.transaction_date, table.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream(query)
+        async for rows in result.mappings().partitions():
+            yield rows
+
+    async def get_category_phrases_async(
+        self, db: AsyncSession, *, user_id: int
+    ) -> List[Tuple[Optional[str], Optional[str], int, int]]:
+        """
+        (name, comment, category_id, count) по доходам/расходам пользователя —
+        сырьё для словаря ключевых слов локального AI-парсера.
+        """
+        query = (
+            select(Transaction.name, Transaction.comment, Transaction.to_category_id, func.count())
+            .where(
+                *self._user_filters(user_id=user_id, types=("income", "expense")),
+                Transaction.to_category_id.is_not(None),
+            )
+            .group_by(Transaction.name, Transaction.comment, Transaction.to_category_id)
+        )
+        return (await db.exec(query)).all()
+
+    @staticmethod
+    def _user_filters(
+        *,
+        user_id: int,
+        types: Sequence[str] = (),
+        wallet_id: Optional[int] = None,
+        goal_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> list:
+        filters = [Transaction.user_id == user_id]
+        if types:
+            filters.append(Transaction.type.in_(types))
+        if wallet_id is not None:
+            filters.append(
+                or_(Transaction.from_wallet_id == wallet_id, Transaction.to_wallet_id == wallet_id)
+            )
+        if goal_id is not None:
+            filters.append(
+                or_(Transaction.from_goal_id == goal_id, Transaction.to_goal_id == goal_id)
+            )
+        if category_id is not None:
+            filters.append(
+                or_(Transaction.from_category_id == category_id, Transaction.to_category_id == category_id)
+            )
+        if start_date:
+            filters.append(Transaction.transaction_date >= start_date)
+        if end_date:
+            filters.append(Transaction.transaction_date <= end_date)
+        return filters
+
 transaction = CRUDTransaction(Transaction)
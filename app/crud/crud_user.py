@@ -4,8 +4,10 @@ import uuid
 import random
 from datetime import datetime, timedelta
 
-from sqlmodel import Session
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
 from app.core.security import get_password_hash, verify_password
+from app.models.category import Category
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.crud.base import CRUDBase
@@ -21,18 +23,20 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def get_by_apple_id(self, db: Session, *, apple_id: str) -> Optional[User]:
         return db.query(User).filter(User.apple_id == apple_id).first()
 
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
+    def create(
+        self, db: Session, *, obj_in: UserCreate, hashed_password: Optional[str] = None
+    ) -> User:
+        # hashed_password — если хэш уже посчитан асинхронно (async-эндпоинты)
         code = str(random.randint(100000, 999999))
         db_obj = User(
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=hashed_password or get_password_hash(obj_in.password),
             full_name=obj_in.full_name,
             email_verification_code=code,
             email_verification_code_sent_at=datetime.utcnow(),
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
     def create_with_google(
@@ -45,8 +49,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             is_email_verified=True,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
     def create_with_apple(
@@ -59,12 +62,11 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             is_email_verified=True,
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
     def update(self, db: Session, *, db_obj: User, obj_in: UserUpdate) -> User:
-        update_data = obj_in.dict(exclude_unset=True)
+        update_data = obj_in.model_dump(exclude_unset=True)
         return super().update(db, db_obj=db_obj, obj_in=update_data)
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
@@ -91,8 +93,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user.email_verification_code = None
         user.email_verification_code_sent_at = None
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        db.flush()
         return True
 
     def resend_verification_code(self, db: Session, *, email: str) -> Optional[str]:
@@ -103,8 +104,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user.email_verification_code = code
         user.email_verification_code_sent_at = datetime.utcnow()
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        db.flush()
         return code
 
     def generate_reset_password_token(self, db: Session, *, email: str) -> Optional[str]:
@@ -115,8 +115,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user.reset_password_token = token
         user.reset_password_token_sent_at = datetime.utcnow()
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        db.flush()
         return token
 
     def reset_password(self, db: Session, *, token: str, new_password: str) -> bool:
@@ -130,17 +129,27 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user.reset_password_token = None
         user.reset_password_token_sent_at = None
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        db.flush()
         return True
 
     def delete_by_id(self, db: Session, user_id: int) -> None:
-        user = db.query(User).filter(User.id == user_id).first()
+        # ORM-каскаду нужны все связи, включая доходы/расходы каждой категории:
+        # selectinload грузит их одним запросом на связь, а не по запросу на объект
+        user = db.exec(
+            select(User)
+            .where(User.id == user_id)
+            .options(
+                selectinload(User.wallets),
+                selectinload(User.goals),
+                selectinload(User.expenses),
+                selectinload(User.incomes),
+                selectinload(User.categories).selectinload(Category.expenses),
+                selectinload(User.categories).selectinload(Category.incomes),
+            )
+        ).first()
         if user:
-            # Force-load все связи для ORM-каскада
-            _ = user.wallets, user.goals, user.categories, user.expenses, user.incomes
             db.delete(user)
-            db.commit()
+            db.flush()
 
 
 user = CRUDUser(User)
@@ -1,31 +1,46 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import update
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.wallet import Wallet
 from app.schemas.wallet import WalletCreate, WalletUpdate
 from app.models.goal import Goal
-from app.models.transaction import Expense
-from app.crud.crud_transaction import transaction
-from app.schemas.transaction import TransactionCreate
-from datetime import date
+from app.models.transaction import Expense, Transaction
+from app.crud import crud_rollup
+from app.schemas.wallet import WalletAssignItem
+from datetime import date, datetime
+from app.db.changes import track_change
+
+
+def _as_date(value) -> date:
+    # Дата приходит строкой из запроса ("2026-10-18" или ISO datetime)
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(value).date()
+
 
 class CRUDWallet:
     def get_multi_by_user(self, db: Session, user_id: int) -> List[Wallet]:
         return db.exec(select(Wallet).where(Wallet.user_id == user_id)).all()
 
+    async def get_multi_by_user_async(self, db: AsyncSession, user_id: int) -> List[Wallet]:
+        result = await db.exec(select(Wallet).where(Wallet.user_id == user_id))
+        return result.all()
+
     def create_with_user(self, db: Session, obj_in: WalletCreate, user_id: int) -> Wallet:
-        db_obj = Wallet(**obj_in.dict(), user_id=user_id)
+        db_obj = Wallet(**obj_in.model_dump(), user_id=user_id)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
     def update(self, db: Session, db_obj: Wallet, obj_in: WalletUpdate) -> Wallet:
-        obj_data = obj_in.dict(exclude_unset=True)
+        obj_data = obj_in.model_dump(exclude_unset=True)
         for field, value in obj_data.items():
             setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
     def remove(self, db: Session, id: int) -> Optional[Wallet]:
@@ -50,7 +65,7 @@ class CRUDWallet:
                 
                 # Теперь удаляем сам кошелек
                 db.delete(obj)
-                db.commit()
+                db.flush()
                 
             except Exception as e:
                 db.rollback()
@@ -58,96 +73,204 @@ class CRUDWallet:
                 raise e
         return obj
 
+    @staticmethod
+    def _debit(db: Session, *, wallet_id: int, amount: float) -> Wallet:
+        # Проверка баланса и списание — одним UPDATE: параллельные списания
+        # не теряются и не уводят баланс в минус
+        wallet = db.scalars(
+            update(Wallet)
+            .where(Wallet.id == wallet_id, Wallet.balance >= amount)
+            .values(balance=Wallet.balance - amount)
+            .returning(Wallet)
+        ).one_or_none()
+        if wallet is None:
+            if db.get(Wallet, wallet_id) is None:
+                raise ValueError("Wallet not found")
+            raise ValueError("Not enough funds in wallet")
+        return wallet
+
+    @staticmethod
+    def _record(db: Session, tx: Transaction, *namespaces: str) -> None:
+        # Транзакция, её вклад в сводку и изменённые балансы — одним коммитом
+        db.add(tx)
+        db.flush()
+        crud_rollup.add_transaction(db, tx)
+        # UPDATE мимо flush — отмечаем изменения для кэша и data_version явно
+        track_change(db, tx.user_id, *namespaces)
+        db.flush()
+
     def assign_goal(self, db: Session, *, wallet_id: int, goal_id: int, amount: float, date: str, comment: str = None):
-        wallet = db.get(Wallet, wallet_id)
-        goal = db.get(Goal, goal_id)
-        
-        if not wallet:
-            raise ValueError("Wallet not found")
-        if not goal:
-            raise ValueError("Goal not found")
-        
-        # Проверяем базовые условия
         if amount <= 0:
             raise ValueError("Amount must be positive")
-        if wallet.balance < amount:
-            raise ValueError("Not enough funds in wallet")
-        
-        # Проверяем, не достигнута ли уже цель
-        if goal.current_amount >= goal.target_amount:
-            raise ValueError("Goal is already completed")
-        
-        # Проверяем, не превысит ли сумма целевую
-        remaining_amount = goal.target_amount - goal.current_amount
-        if amount > remaining_amount:
-            raise ValueError(f"Amount exceeds remaining goal amount. Max available: {remaining_amount}")
-        
-        wallet.balance -= amount
-        goal.current_amount += amount
-        db.add(wallet)
-        db.add(goal)
-        db.commit()
-        db.expire_all()
-        db.refresh(wallet)
-        db.refresh(goal)
-        # Создаём Transaction
-        transaction_obj = TransactionCreate(
-            user_id=wallet.user_id,
-            from_wallet_id=wallet_id,
-            to_wallet_id=None,
-            from_goal_id=None,
-            to_goal_id=goal_id,
-            from_category_id=None,
-            to_category_id=None,
-            amount=amount,
-            transaction_date=date,
-            type="goal_transfer",
-            comment=comment,
-            goal_name=goal.name,
-            name=goal.name,
-            icon=goal.icon,
-            color=goal.color,
-            wallet_name=wallet.name
-        )
-        transaction.create(db, obj_in=transaction_obj)
+        try:
+            wallet = self._debit(db, wallet_id=wallet_id, amount=amount)
+            goal = db.scalars(
+                update(Goal)
+                .where(
+                    Goal.id == goal_id,
+                    Goal.user_id == wallet.user_id,
+                    Goal.current_amount < Goal.target_amount,
+                    Goal.current_amount + amount <= Goal.target_amount,
+                )
+                .values(current_amount=Goal.current_amount + amount, updated_at=datetime.utcnow())
+                .returning(Goal)
+            ).one_or_none()
+            if goal is None:
+                goal = db.get(Goal, goal_id)
+                if not goal or goal.user_id != wallet.user_id:
+                    raise ValueError("Goal not found")
+                if goal.current_amount >= goal.target_amount:
+                    raise ValueError("Goal is already completed")
+                remaining_amount = goal.target_amount - goal.current_amount
+                raise ValueError(f"Amount exceeds remaining goal amount. Max available: {remaining_amount}")
+            self._record(
+                db,
+                Transaction(
+                    user_id=wallet.user_id,
+                    from_wallet_id=wallet_id,
+                    to_goal_id=goal_id,
+                    amount=amount,
+                    transaction_date=_as_date(date),
+                    type="goal_transfer",
+                    comment=comment,
+                    wallet_name=wallet.name,
+                    goal_name=goal.name,
+                    name=goal.name,
+                    icon=goal.icon,
+                    color=goal.color,
+                ),
+                "wallets",
+                "goals",
+            )
+        except Exception:
+            db.rollback()
+            raise
         return wallet
 
     def assign_expense(self, db: Session, *, wallet_id: int, expense_id: int, amount: float, date: str, comment: str = None):
-        wallet = db.get(Wallet, wallet_id)
-        expense = db.get(Expense, expense_id)
-        if not wallet:
-            raise ValueError("Wallet not found")
-        if not expense:
-            raise ValueError("Expense not found")
-        if wallet.balance < amount:
-            raise ValueError("Not enough funds in wallet")
-        wallet.balance -= amount
-        expense.amount += amount
-        db.add(wallet)
-        db.add(expense)
-        db.commit()
-        db.expire_all()
-        db.refresh(wallet)
-        db.refresh(expense)
-        # Создаём Transaction
-        transaction_obj = TransactionCreate(
-            user_id=wallet.user_id,
-            from_wallet_id=wallet_id,
-            to_wallet_id=None,
-            from_goal_id=None,
-            to_goal_id=None,
-            from_category_id=None,
-            to_category_id=expense.category_id,
-            amount=amount,
-            transaction_date=date,
-            type="expense",
-            comment=comment,
-            name=expense.name,
-            icon=expense.icon,
-            color=expense.color,
-            wallet_name=wallet.name
-        )
-        transaction.create(db, obj_in=transaction_obj)
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        try:
+            wallet = self._debit(db, wallet_id=wallet_id, amount=amount)
+            expense = db.scalars(
+                update(Expense)
+                .where(Expense.id == expense_id, Expense.user_id == wallet.user_id)
+                .values(amount=Expense.amount + amount)
+                .returning(Expense)
+            ).one_or_none()
+            if expense is None:
+                raise ValueError("Expense not found")
+            self._record(
+                db,
+                Transaction(
+                    user_id=wallet.user_id,
+                    from_wallet_id=wallet_id,
+                    to_category_id=expense.category_id,
+                    amount=amount,
+                    transaction_date=_as_date(date),
+                    type="expense",
+                    comment=comment,
+                    wallet_name=wallet.name,
+                    name=expense.name,
+                    icon=expense.icon,
+                    color=expense.color,
+                ),
+                "wallets",
+                "expenses",
+            )
+        except Exception:
+            db.rollback()
+            raise
         return wallet
 
+    @staticmethod
+    def _lock(db: Session, model, ids, user_id: int) -> Dict[int, object]:
+        # Блокируем строки по возрастанию id: два пакета с пересекающимися
+        # кошельками/целями ждут друг друга, а не ловят взаимоблокировку
+        if not ids:
+            return {}
+        rows = db.exec(
+            select(model)
+            .where(model.id.in_(ids), model.user_id == user_id)
+            .order_by(model.id)
+            .with_for_update()
+        ).all()
+        return {row.id: row for row in rows}
+
+    def assign_batch(
+        self, db: Session, *, user_id: int, items: List[WalletAssignItem]
+    ) -> Tuple[List[Wallet], List[Goal], List[Expense]]:
+        """
+        Применяет все перемещения атомарно, одним коммитом: либо все, либо
+        ни одного (ValueError с номером пункта). Проверки — как в
+        assign_goal/assign_expense, по текущему балансу с учётом
+        предыдущих пунктов пакета.
+        """
+        wallets = self._lock(db, Wallet, sorted({i.wallet_id for i in items}), user_id)
+        goals = self._lock(db, Goal, sorted({i.goal_id for i in items if i.goal_id is not None}), user_id)
+        expenses = self._lock(db, Expense, sorted({i.expense_id for i in items if i.expense_id is not None}), user_id)
+
+        try:
+            transactions = []
+            for index, item in enumerate(items):
+                wallet = wallets.get(item.wallet_id)
+                if not wallet:
+                    raise ValueError(f"Item {index}: Wallet not found")
+                if item.amount <= 0:
+                    raise ValueError(f"Item {index}: Amount must be positive")
+                if wallet.balance < item.amount:
+                    raise ValueError(f"Item {index}: Not enough funds in wallet")
+                try:
+                    transaction_date = _as_date(item.date)
+                except ValueError:
+                    raise ValueError(f"Item {index}: Invalid date")
+
+                if item.goal_id is not None:
+                    goal = goals.get(item.goal_id)
+                    if not goal:
+                        raise ValueError(f"Item {index}: Goal not found")
+                    if goal.current_amount >= goal.target_amount:
+                        raise ValueError(f"Item {index}: Goal is already completed")
+                    remaining_amount = goal.target_amount - goal.current_amount
+                    if item.amount > remaining_amount:
+                        raise ValueError(
+                            f"Item {index}: Amount exceeds remaining goal amount. Max available: {remaining_amount}"
+                        )
+                    goal.current_amount += item.amount
+                    target = dict(
+                        to_goal_id=goal.id, type="goal_transfer", goal_name=goal.name,
+                        name=goal.name, icon=goal.icon, color=goal.color,
+                    )
+                else:
+                    expense = expenses.get(item.expense_id)
+                    if not expense:
+                        raise ValueError(f"Item {index}: Expense not found")
+                    expense.amount += item.amount
+                    target = dict(
+                        to_category_id=expense.category_id, type="expense",
+                        name=expense.name, icon=expense.icon, color=expense.color,
+                    )
+                wallet.balance -= item.amount
+                transactions.append(
+                    Transaction(
+                        user_id=user_id,
+                        from_wallet_id=wallet.id,
+                        wallet_name=wallet.name,
+                        amount=item.amount,
+                        transaction_date=transaction_date,
+                        comment=item.comment,
+                        **target,
+                    )
+                )
+
+            db.add_all(transactions)
+            db.flush()
+            for tx in transactions:
+                crud_rollup.add_transaction(db, tx)
+            db.flush()
+        except Exception:
+            db.rollback()
+            raise
+        return list(wallets.values()), list(goals.values()), list(expenses.values())
+
 crud_wallet = CRUDWallet() 
\ No newline at end of file
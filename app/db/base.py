@@ -11,3 +11,5 @@ from app.models.user import User  # noqa
 from app.models.category import Category  # noqa
 from app.models.transaction import Income, Expense  # noqa
 from app.models.wallet import Wallet  # noqa
+from app.models.rollup import TransactionDailyRollup  # noqa
+from app.models.idempotency import IdempotencyKey  # noqa
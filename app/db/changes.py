@@ -0,0 +1,111 @@
+import logging
+from collections import defaultdict
+
+from sqlalchemy import event, update
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import response_cache, user_cache, user_cache_key
+from app.models import Category, Expense, Goal, Income, Transaction, User, Wallet
+
+logger = logging.getLogger(__name__)
+
+# Какие ответы устаревают при изменении модели (лента подтягивает
+# названия/иконки кошельков, целей и шаблонов доходов/расходов)
+MODEL_NAMESPACES = {
+    Wallet: ("wallets", "transactions"),
+    Goal: ("goals", "transactions"),
+    Category: ("categories", "dashboard"),
+    Transaction: ("transactions", "dashboard"),
+    Income: ("incomes", "transactions"),
+    Expense: ("expenses", "transactions"),
+}
+
+_INFO_KEY = "changed_namespaces"
+_USERS_KEY = "changed_users"
+
+
+def pending_changes(session: Session) -> dict:
+    """
+    {user_id: {namespace, ...}} изменений текущей транзакции сессии.
+    """
+    return session.info.setdefault(_INFO_KEY, defaultdict(set))
+
+
+def forget_user(user_id: int) -> None:
+    """
+    Сбросить снимок пользователя в кэше аутентификации (этого процесса).
+    """
+    user_cache.delete(user_cache_key(user_id))
+
+
+# data_version читается из БД, а не из current_user: снимок пользователя
+# берётся из кэша аутентификации и может отставать на его TTL.
+# Это общая для всех воркеров версия — ею ключуются ETag и кэш ответов
+
+def read_data_version(db: Session, user_id: int) -> int:
+    return db.exec(select(User.data_version).where(User.id == user_id)).one()
+
+
+async def read_data_version_async(db: AsyncSession, user_id: int) -> int:
+    result = await db.exec(select(User.data_version).where(User.id == user_id))
+    return result.one()
+
+
+def track_change(session: Session, user_id: int, *namespaces: str) -> None:
+    """
+    Явно отметить изменение, прошедшее мимо ORM (bulk/raw SQL).
+    """
+    pending_changes(session)[user_id].update(namespaces)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session, flush_context, instances):
+    # Все CRUD-записи (create_with_user, update, remove, assign_*) идут через flush
+    changed = [*session.new, *session.deleted]
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in changed:
+        if isinstance(obj, User) and obj.id is not None:
+            session.info.setdefault(_USERS_KEY, set()).add(obj.id)
+            continue
+        namespaces = MODEL_NAMESPACES.get(type(obj))
+        user_id = getattr(obj, "user_id", None)
+        if namespaces and user_id is not None:
+            track_change(session, user_id, *namespaces)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_data_version(session):
+    # flush здесь, чтобы before_flush успел собрать изменения до UPDATE;
+    # версия растёт в той же транзакции, что и сами данные
+    session.flush()
+    user_ids = list(session.info.get(_INFO_KEY, ()))
+    if user_ids:
+        session.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(data_version=User.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cache(session):
+    # Инвалидируем только после коммита — иначе параллельный запрос
+    # успел бы закэшировать ещё не закоммиченное состояние
+    for user_id in session.info.pop(_USERS_KEY, ()):
+        forget_user(user_id)
+    changes = session.info.pop(_INFO_KEY, None)
+    if not changes:
+        return
+    for user_id, namespaces in changes.items():
+        try:
+            response_cache.invalidate(user_id, namespaces)
+        except Exception:
+            logger.exception("Cache invalidation failed for user %s", user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_INFO_KEY, None)
+    session.info.pop(_USERS_KEY, None)
@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """
+    Счётчики пула соединений одного процесса (воркера).
+    Нужны, чтобы подобрать DB_POOL_SIZE / DB_MAX_OVERFLOW под нагрузку.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.overflow_peak = 0
+
+    def record_checkout(self, waited: float, overflow: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+            if overflow > self.overflow_peak:
+                self.overflow_peak = overflow
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "wait_total_seconds": round(self.wait_total, 6),
+                "wait_avg_seconds": round(self.wait_total / self.checkouts, 6)
+                if self.checkouts
+                else 0.0,
+                "wait_max_seconds": round(self.wait_max, 6),
+                "overflow_peak": self.overflow_peak,
+            }
+
+
+class _CheckoutTimingMixin:
+    """
+    Замеряет время ожидания соединения при checkout из пула.
+    """
+
+    stats: PoolStats
+
+    def recreate(self):
+        # engine.dispose() пересоздаёт пул — счётчики переносим в новый
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        return new_pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - start, max(self.overflow(), 0))
+        return conn
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine) -> PoolStats:
+    """
+    Вешает счётчики на пул движка. Для NullPool считаются только connect/checkout/checkin.
+    """
+    stats = PoolStats()
+    pool = engine.pool
+    if isinstance(pool, _CheckoutTimingMixin):
+        pool.stats = stats
+    else:
+        event.listen(pool, "checkout", lambda *args: stats.record_checkout(0.0, 0))
+    event.listen(pool, "checkin", lambda *args: stats.record_checkin())
+    event.listen(pool, "connect", lambda *args: stats.record_connect())
+    return stats
+
+
+def pool_status(engine: Engine, stats: PoolStats) -> Dict[str, Any]:
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    status.update(stats.as_dict())
+    return status
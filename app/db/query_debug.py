@@ -0,0 +1,143 @@
+"""
+Отладочный режим SQL (QUERY_DEBUG=warn|raise, для разработки и тестов).
+
+Запоминает все запросы текущего HTTP-запроса и по его окончании проверяет:
+- число запросов не больше бюджета маршрута (QUERY_BUDGET / QUERY_BUDGETS);
+- один и тот же запрос (с точностью до параметров) повторяется не больше
+  QUERY_REPEAT_LIMIT раз — типичный след N+1 от ленивых связей.
+В режиме warn нарушения пишутся в лог, в raise — QueryBudgetExceeded
+(тест падает). Запросы медленнее SLOW_QUERY_MS логируются с планом EXPLAIN.
+
+При QUERY_DEBUG=off слушатели не вешаются и ничего не стоят.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_QUERY_START = "query_debug_start"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# IN (?, ?, ?) / IN ($1, $2) / IN (%(p_1)s, ...) — одна форма при любой длине списка
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*(?:\?|\$\d+|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|\$\d+|%\(\w+\)s|%s|:\w+))+\s*\)")
+
+EXPLAIN_PREFIX = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDER_LIST_RE.sub("(...)", _WHITESPACE_RE.sub(" ", statement).strip())
+
+
+@dataclass
+class QueryLog:
+    statements: Counter = field(default_factory=Counter)
+    total: int = 0
+
+    def problems(self, budget: int) -> List[str]:
+        found = []
+        if self.total > budget:
+            found.append(f"{self.total} queries, budget {budget}")
+        for shape, count in self.statements.most_common():
+            if count <= settings.QUERY_REPEAT_LIMIT:
+                break
+            found.append(f"{count}x same query (N+1?): {shape[:300]}")
+        return found
+
+
+_current: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    prefix = EXPLAIN_PREFIX.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    # Отдельный DBAPI-курсор на том же соединении: результат основного
+    # запроса не трогаем, слушатели движка на нём не срабатывают
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_QUERY_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info[_QUERY_START].pop()
+    log = _current.get()
+    if log is not None:
+        log.total += 1
+        log.statements[statement_shape(statement)] += 1
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        plan = None if executemany else _explain(conn, statement, parameters)
+        logger.warning(
+            "Slow query (%.1f ms): %s%s",
+            elapsed * 1000,
+            statement_shape(statement)[:1000],
+            f"\n{plan}" if plan else "",
+        )
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_QUERY_START):
+        conn.info[_QUERY_START].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Для AsyncEngine передавать engine.sync_engine. Без QUERY_DEBUG — ничего не делает.
+    """
+    if settings.QUERY_DEBUG == "off":
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryDebugMiddleware:
+    """
+    Чистый ASGI-middleware: QueryLog на каждый HTTP-запрос и проверка
+    после ответа. Бюджет — по шаблону маршрута из QUERY_BUDGETS или QUERY_BUDGET.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        log = QueryLog()
+        token = _current.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        problems = log.problems(settings.QUERY_BUDGETS.get(route, settings.QUERY_BUDGET))
+        if not problems:
+            return
+        message = f"{scope['method']} {route}: " + "; ".join(problems)
+        if settings.QUERY_DEBUG == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
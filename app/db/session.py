@@ -1,11 +1,56 @@
 from sqlmodel import create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
 from app.core.config import settings
+from app.core.metrics import instrument_queries
+from app.db import changes  # noqa: F401  (слушатели сессии: инвалидация кэша)
+from app.db import query_debug
+from app.db.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+    pool_status,
+)
+
+
+def _pool_kwargs(pool_class) -> dict:
+    if not settings.DB_POOL_ENABLED:
+        return {"poolclass": NullPool, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    return {
+        "poolclass": pool_class,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
 
-# engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), pool_pre_ping=True)
 
-from sqlalchemy.pool import NullPool
 engine = create_engine(
-    str(settings.SQLALCHEMY_DATABASE_URI),
-    pool_pre_ping=True,
-    poolclass=NullPool
-)
\ No newline at end of file
+    str(settings.SQLALCHEMY_DATABASE_URI), **_pool_kwargs(InstrumentedQueuePool)
+)
+engine_pool_stats = instrument_engine(engine)
+instrument_queries(engine)
+query_debug.instrument_engine(engine)
+
+# Async path (asyncpg) для эндпоинтов, которые работают прямо в event loop
+async_engine = create_async_engine(
+    str(settings.ASYNC_SQLALCHEMY_DATABASE_URI),
+    **_pool_kwargs(InstrumentedAsyncQueuePool),
+)
+async_engine_pool_stats = instrument_engine(async_engine.sync_engine)
+instrument_queries(async_engine.sync_engine)
+query_debug.instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+def get_pool_status() -> dict:
+    return {
+        "sync": pool_status(engine, engine_pool_stats),
+        "async": pool_status(async_engine.sync_engine, async_engine_pool_stats),
+    }
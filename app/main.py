@@ -1,13 +1,39 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, registry, stats_samples
+from app.core.security import HashingPoolSaturated, password_hasher
+from app.api.deps import require_ops_access
 from app.api.v1.api import api_router
+from app.api.etag import NotModified
+from app.api.idempotency import IdempotencyConflict, IdempotentReplay
+from app.db.query_debug import QueryDebugMiddleware
+from app.db.session import get_pool_status
+from app.services.ai_service import ai_service
+from app.services.email_service import email_queue
+from app.worker import scheduler
 import os
 from dotenv import load_dotenv
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    email_queue.start()
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
+    yield
+    await scheduler.stop()
+    await email_queue.stop()
+    await ai_service.aclose()
+
+
 app = FastAPI(
     title="GrowFi API",
+    lifespan=lifespan,
     openapi_url=None,  # отключаем OpenAPI для продакшена
     docs_url=None,     # отключаем Swagger UI для продакшена
     redoc_url=None     # отключаем ReDoc для продакшена
@@ -23,9 +49,102 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+
+if settings.QUERY_DEBUG != "off":
+    app.add_middleware(QueryDebugMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return Response(status_code=304, headers={"ETag": exc.etag})
+
+
+@app.exception_handler(IdempotentReplay)
+async def idempotent_replay_handler(request: Request, exc: IdempotentReplay):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=exc.body,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+@app.exception_handler(IdempotencyConflict)
+async def idempotency_conflict_handler(request: Request, exc: IdempotencyConflict):
+    return JSONResponse(status_code=409, content={"detail": exc.detail})
+
+
+@app.exception_handler(HashingPoolSaturated)
+async def hashing_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to GrowFi API"}
+
+
+@app.get("/health")
+def read_health():
+    # Liveness для балансировщика/оркестратора — публичный, без подробностей
+    return {"status": "ok"}
+
+
+@app.get("/health/db", dependencies=[Depends(require_ops_access)])
+def read_db_pool_status():
+    return {"pools": get_pool_status()}
+
+
+@app.get("/health/hashing", dependencies=[Depends(require_ops_access)])
+def read_hashing_pool_status():
+    return {"hashing": password_hasher.stats()}
+
+
+@app.get("/health/email", dependencies=[Depends(require_ops_access)])
+def read_email_queue_status():
+    return {"email": email_queue.stats()}
+
+
+@app.get("/health/ai", dependencies=[Depends(require_ops_access)])
+def read_ai_client_status():
+    return {"ai": ai_service.stats()}
+
+
+@app.get("/health/jobs", dependencies=[Depends(require_ops_access)])
+def read_scheduler_status():
+    return {"running": scheduler.running, "jobs": scheduler.stats()}
+
+
+# Те же счётчики, что и в /health/*, — в /metrics
+registry.gauge(
+    "growfi_db_pool", "Connection pool counters (see /health/db)",
+    lambda: (sample for name, pool in get_pool_status().items() for sample in stats_samples(pool, pool=name)),
+)
+registry.gauge(
+    "growfi_password_hasher", "Password hashing pool (see /health/hashing)",
+    lambda: stats_samples(password_hasher.stats()),
+)
+registry.gauge("growfi_email_queue", "Outgoing email queue (see /health/email)", lambda: stats_samples(email_queue.stats()))
+registry.gauge(
+    "growfi_ai_client", "AI client and circuit breaker (see /health/ai)",
+    lambda: stats_samples({**ai_service.stats(), "breaker_open": ai_service.breaker.state != "closed"}),
+)
+registry.gauge(
+    "growfi_scheduler_job", "Background job runs and failures (see /health/jobs)",
+    lambda: (sample for name, job in scheduler.stats().items() for sample in stats_samples(job, job=name)),
+)
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_ops_access)])
+def read_metrics():
+    # Счётчики — на процесс (воркер), как и в /health/*
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -2,4 +2,6 @@ from .user import User  # noqa
 from .category import Category  # noqa
 from .goal import Goal
 from .wallet import Wallet
-from .transaction import Expense, Income, Transaction  # noqa
\ No newline at end of file
+from .transaction import Expense, Income, Transaction  # noqa
+from .rollup import TransactionDailyRollup  # noqa
+from .idempotency import IdempotencyKey  # noqa
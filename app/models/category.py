@@ -18,7 +18,7 @@ class Category(SQLModel, table=True):
     name: str = Field(index=True)
     type: CategoryType = Field(sa_column=Column(Enum(CategoryType, native_enum=False)))
 
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     user: "User" = Relationship(back_populates="categories")
 
     expenses: List["Expense"] = Relationship(back_populates="category", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
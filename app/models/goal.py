@@ -13,7 +13,7 @@ class Goal(SQLModel, table=True):
     icon: str
     color: str
     currency: str = "KZT"
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     user: "User" = Relationship(back_populates="goals")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -24,4 +24,6 @@ class Goal(SQLModel, table=True):
     reminder_period: Optional[str] = Field(default=None, nullable=True)  # 'week', 'month', None
     selected_weekday: Optional[int] = Field(default=None, nullable=True) # 1-7
     selected_month_day: Optional[int] = Field(default=None, nullable=True) # 1-31
-    selected_time: Optional[str] = Field(default=None, nullable=True) # '09:00' 
\ No newline at end of file
+    selected_time: Optional[str] = Field(default=None, nullable=True) # '09:00'
+    # Ближайшее срабатывание напоминания (UTC); воркер выбирает по индексу next_reminder_at <= now
+    next_reminder_at: Optional[datetime] = Field(default=None, nullable=True, index=True)
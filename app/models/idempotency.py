@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import JSON, Column, ForeignKey, Integer, UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    Заголовок Idempotency-Key запроса и сохранённый ответ на него.
+    Запись вставляется в той же транзакции БД, что и сама операция,
+    так что повтор запроса с тем же ключом её не выполнит второй раз.
+    """
+
+    __tablename__ = "idempotency_key"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_key_user_id_key"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    )
+    key: str = Field(max_length=255)
+    # Хэш метода, пути и тела: тот же ключ с другим запросом — ошибка клиента
+    request_hash: str = Field(max_length=64)
+    # NULL — операция закоммичена, ответ ещё не сохранён (или процесс упал между ними)
+    response_status: Optional[int] = Field(default=None)
+    response_body: Optional[Any] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
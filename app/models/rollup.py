@@ -0,0 +1,29 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Column, ForeignKey, Integer, UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class TransactionDailyRollup(SQLModel, table=True):
+    """
+    Суммы транзакций пользователя за день по типу и категории.
+    Поддерживается инкрементально в CRUDTransaction; пересобирается
+    командой `python -m app.scripts.rebuild_rollups`.
+    """
+
+    __tablename__ = "transaction_daily_rollup"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", "type", "category_id", name="uq_transaction_daily_rollup_key"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    )
+    day: date = Field()
+    type: str = Field()
+    # 0 — без категории (NULL в уникальном ключе не схлопывался бы)
+    category_id: int = Field(default=0)
+    amount: float = Field(default=0)
+    tx_count: int = Field(default=0)
@@ -1,4 +1,5 @@
 from typing import TYPE_CHECKING, Optional
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 from datetime import date
 
@@ -10,6 +11,10 @@ if TYPE_CHECKING:
 
 
 class Income(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_income_user_id_transaction_date", "user_id", "transaction_date"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     icon: str
@@ -25,6 +30,10 @@ class Income(SQLModel, table=True):
 
 
 class Expense(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_expense_user_id_transaction_date", "user_id", "transaction_date"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     icon: str
@@ -40,6 +49,19 @@ class Expense(SQLModel, table=True):
 
 
 class Transaction(SQLModel, table=True):
+    __table_args__ = (
+        # Дашборд и лента: user_id + type + диапазон дат, суммы без обращения к таблице
+        Index(
+            "ix_transaction_user_id_type_transaction_date",
+            "user_id",
+            "type",
+            "transaction_date",
+            postgresql_include=["amount", "to_category_id"],
+        ),
+        # Keyset-пагинация ленты: ORDER BY transaction_date DESC, id DESC
+        Index("ix_transaction_user_id_transaction_date_id", "user_id", "transaction_date", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     from_wallet_id: Optional[int] = Field(default=None, foreign_key="wallet.id")
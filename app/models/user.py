@@ -29,6 +29,8 @@ class User(UserBase, table=True):
     reset_password_token: Optional[str] = Field(default=None, index=True)
     reset_password_token_sent_at: Optional[datetime] = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Растёт при каждом коммите, меняющем данные пользователя (ETag для GET)
+    data_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
     # Relationships
     categories: List["Category"] = Relationship(back_populates="user", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
@@ -11,7 +11,7 @@ class Wallet(SQLModel, table=True):
     icon_name: Optional[str] = None
     color_hex: Optional[str] = None
     currency: str = "KZT"
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
     user: "User" = Relationship(back_populates="wallets")
 
 class WalletCreate(SQLModel):
@@ -13,7 +13,7 @@ from .transaction import (
     TransactionRead,
 )
 from .dashboard import DashboardData, CategoryExpense
-from .page import Page
+from .page import Page, CursorPage
 from .goal import Goal, GoalCreate, GoalUpdate
 
 
@@ -37,6 +37,7 @@ __all__ = [
     "DashboardData",
     "CategoryExpense",
     "Page",
+    "CursorPage",
     "Goal",
     "GoalCreate",
     "GoalUpdate",
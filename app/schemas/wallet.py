@@ -1,5 +1,5 @@
-from typing import Optional
-from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 class WalletBase(BaseModel):
     name: str
@@ -25,10 +25,28 @@ class WalletAssignGoal(BaseModel):
 
 class WalletAssignExpense(BaseModel):
     expense_id: int
+    amount: float = Field(gt=0)
+    date: str
+    comment: Optional[str] = None
+
+class WalletAssignItem(BaseModel):
+    # Одно перемещение пакета: из wallet_id в цель (goal_id) или в расход (expense_id)
+    wallet_id: int
+    goal_id: Optional[int] = None
+    expense_id: Optional[int] = None
     amount: float
     date: str
     comment: Optional[str] = None
 
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.goal_id is None) == (self.expense_id is None):
+            raise ValueError("Exactly one of goal_id and expense_id must be set")
+        return self
+
+class WalletAssignBatch(BaseModel):
+    items: List[WalletAssignItem] = Field(min_length=1, max_length=500)
+
 class Wallet(WalletBase):
     id: int
     user_id: int
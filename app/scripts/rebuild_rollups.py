@@ -0,0 +1,29 @@
+"""
+Пересборка дневной сводки transaction_daily_rollup из истории транзакций.
+
+    python -m app.scripts.rebuild_rollups             # все пользователи
+    python -m app.scripts.rebuild_rollups --user 42   # один пользователь
+
+Нужна после массовых правок транзакций в обход CRUD (SQL-скрипты, импорт).
+"""
+import argparse
+
+from sqlmodel import Session
+
+from app.crud import crud_rollup
+from app.db.session import engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", type=int, default=None, help="id пользователя")
+    args = parser.parse_args()
+
+    with Session(engine) as db:
+        rows = crud_rollup.rebuild(db, user_id=args.user)
+        db.commit()
+    print(f"Rollup rebuilt: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Пересчёт goal.next_reminder_at для всех целей с напоминаниями.
+
+    python -m app.scripts.schedule_reminders
+
+Нужен один раз после миграции, добавившей next_reminder_at, и после
+правок настроек напоминаний или часовых поясов в обход CRUD.
+"""
+import argparse
+from datetime import datetime
+
+from sqlmodel import Session, select
+
+from app.db.session import engine
+from app.models import Goal, User
+from app.services.reminders import schedule_goal
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        rows = db.exec(
+            select(Goal, User.timezone)
+            .join(User, User.id == Goal.user_id)
+            .where(Goal.reminder_period.is_not(None))
+        ).all()
+        for goal, user_timezone in rows:
+            schedule_goal(goal, user_timezone, now)
+        db.commit()
+    print(f"Reminders scheduled: {len(rows)} goals")
+
+
+if __name__ == "__main__":
+    main()
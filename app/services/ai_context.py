@@ -0,0 +1,211 @@
+"""
+Контекст для /ai/analyze-expenses: вместо списка всех транзакций модель
+получает короткую сводку за период — итоги, расходы по категориям,
+по неделям и самые крупные статьи. Размер сводки ограничен
+AI_CONTEXT_MAX_TOKENS и не растёт с историей пользователя.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.db.changes import read_data_version_async
+from app.models import Category, Transaction, TransactionDailyRollup
+
+PERIODS = ("week", "month", "quarter", "year")
+
+TOP_NAMES_LIMIT = 10
+
+
+def period_range(period: str, today: date) -> Tuple[date, date]:
+    """
+    Календарные границы периода, в который входит today.
+    """
+    if period == "week":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if period == "month":
+        start = today.replace(day=1)
+    elif period == "quarter":
+        start = today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1)
+    elif period == "year":
+        return today.replace(month=1, day=1), today.replace(month=12, day=31)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    months = 1 if period == "month" else 3
+    month_index = start.month - 1 + months
+    next_start = start.replace(year=start.year + month_index // 12, month=month_index % 12 + 1)
+    return start, next_start - timedelta(days=1)
+
+
+@dataclass
+class ExpenseContext:
+    period: str
+    start_date: date
+    end_date: date
+    total_income: float = 0.0
+    total_expense: float = 0.0
+    tx_count: int = 0
+    # (название, сумма, число операций), по убыванию суммы
+    by_category: List[Tuple[str, float, int]] = field(default_factory=list)
+    # (понедельник недели, сумма расходов)
+    by_week: List[Tuple[date, float]] = field(default_factory=list)
+    top_names: List[Tuple[str, float, int]] = field(default_factory=list)
+
+
+async def load_context(
+    db: AsyncSession, *, user_id: int, period: str, start_date: date, end_date: date
+) -> ExpenseContext:
+    """
+    Три агрегирующих запроса; по категориям и неделям — из дневной сводки.
+    """
+    context = ExpenseContext(period=period, start_date=start_date, end_date=end_date)
+    in_period = (
+        TransactionDailyRollup.user_id == user_id,
+        TransactionDailyRollup.type.in_(("income", "expense")),
+        TransactionDailyRollup.day >= start_date,
+        TransactionDailyRollup.day <= end_date,
+    )
+
+    category_rows = (
+        await db.exec(
+            select(
+                TransactionDailyRollup.type,
+                Category.name,
+                func.sum(TransactionDailyRollup.amount),
+                func.sum(TransactionDailyRollup.tx_count),
+            )
+            .select_from(TransactionDailyRollup)
+            .outerjoin(Category, TransactionDailyRollup.category_id == Category.id)
+            .where(*in_period)
+            .group_by(TransactionDailyRollup.type, Category.name)
+        )
+    ).all()
+    for tx_type, name, amount, count in category_rows:
+        context.tx_count += count
+        if tx_type == "income":
+            context.total_income += amount
+        else:
+            context.total_expense += amount
+            context.by_category.append((name or "Без категории", amount, count))
+    context.by_category.sort(key=lambda row: row[1], reverse=True)
+
+    day_rows = (
+        await db.exec(
+            select(TransactionDailyRollup.day, func.sum(TransactionDailyRollup.amount))
+            .where(*in_period, TransactionDailyRollup.type == "expense")
+            .group_by(TransactionDailyRollup.day)
+        )
+    ).all()
+    weeks: dict = {}
+    for day, amount in day_rows:
+        monday = day - timedelta(days=day.weekday())
+        weeks[monday] = weeks.get(monday, 0.0) + amount
+    context.by_week = sorted(weeks.items())
+
+    total = func.sum(Transaction.amount)
+    context.top_names = [
+        tuple(row)
+        for row in (
+            await db.exec(
+                select(Transaction.name, total, func.count())
+                .where(
+                    Transaction.user_id == user_id,
+                    Transaction.type == "expense",
+                    Transaction.transaction_date >= start_date,
+                    Transaction.transaction_date <= end_date,
+                    Transaction.name.is_not(None),
+                )
+                .group_by(Transaction.name)
+                .order_by(total.desc())
+                .limit(TOP_NAMES_LIMIT)
+            )
+        ).all()
+    ]
+    return context
+
+
+def estimate_tokens(text: str) -> int:
+    # Грубая оценка без токенизатора: кириллица — около 3 символов на токен
+    return len(text) // 3 + 1
+
+
+def _money(value: float) -> str:
+    return f"{value:,.0f}".replace(",", " ")
+
+
+def _fold(rows: List[Tuple[str, float, int]], keep: int) -> List[Tuple[str, float, int]]:
+    # Хвост списка схлопывается в одну строку "другие"
+    if len(rows) <= keep:
+        return rows
+    rest = rows[keep:]
+    return rows[:keep] + [(f"другие ({len(rest)})", sum(r[1] for r in rest), sum(r[2] for r in rest))]
+
+
+def render_summary(context: ExpenseContext, max_tokens: int) -> str:
+    """
+    Текст сводки не длиннее max_tokens: при превышении укорачиваются
+    самые длинные списки (категории, недели, названия).
+    """
+    keep = {
+        "by_category": len(context.by_category),
+        "by_week": len(context.by_week),
+        "top_names": len(context.top_names),
+    }
+
+    def render() -> str:
+        total = context.total_expense or 1.0
+        lines = [
+            f"Период: {context.start_date}..{context.end_date} ({context.period})",
+            f"Доходы: {_money(context.total_income)}; расходы: {_money(context.total_expense)}; "
+            f"операций: {context.tx_count}",
+        ]
+        if context.by_category:
+            lines.append("Расходы по категориям (сумма, доля, операций):")
+            lines += [
+                f"- {name}: {_money(amount)}, {amount / total:.0%}, {count}"
+                for name, amount, count in _fold(context.by_category, keep["by_category"])
+            ]
+        if context.by_week and keep["by_week"]:
+            lines.append("Расходы по неделям:")
+            lines += [f"- с {monday}: {_money(amount)}" for monday, amount in context.by_week[-keep["by_week"]:]]
+        if context.top_names and keep["top_names"]:
+            lines.append("Крупнейшие статьи (сумма, операций):")
+            lines += [
+                f"- {name}: {_money(amount)}, {count}"
+                for name, amount, count in context.top_names[: keep["top_names"]]
+            ]
+        return "\n".join(lines)
+
+    summary = render()
+    while estimate_tokens(summary) > max_tokens and any(n > 1 for n in keep.values()):
+        longest = max(keep, key=keep.get)
+        keep[longest] -= 1
+        summary = render()
+    return summary
+
+
+async def build_expense_summary(
+    db: AsyncSession, *, user_id: int, period: str, today: date
+) -> Tuple[str, int]:
+    """
+    (сводка, число операций) за период; кэшируется на пользователя и период.
+    """
+    start_date, end_date = period_range(period, today)
+    # data_version растёт при изменении транзакций и категорий
+    version = await read_data_version_async(db, user_id)
+    cache_key = response_cache.key("dashboard", user_id, "ai-context", start_date, end_date, version=version)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached["summary"], cached["tx_count"]
+    context = await load_context(
+        db, user_id=user_id, period=period, start_date=start_date, end_date=end_date
+    )
+    summary = render_summary(context, settings.AI_CONTEXT_MAX_TOKENS)
+    response_cache.set(cache_key, {"summary": summary, "tx_count": context.tx_count})
+    return summary, context.tx_count
@@ -0,0 +1,217 @@
+"""
+Локальный разбор коротких сообщений вида "такси 2000" или
+"зарплата 300 000 на карту" без обращения к модели.
+
+Категория ищется по названиям категорий пользователя, а если не нашлась —
+по словарю ключевых слов, собранному из его же истории транзакций
+(слова из name/comment → категория). Модель вызывается только когда
+уверенность разбора ниже AI_PARSER_MIN_CONFIDENCE.
+"""
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.db.changes import read_data_version_async
+from app.crud.crud_transaction import transaction as crud_transaction
+
+# Окончания, которые отбрасываются при сравнении слов ("карту" = "карта").
+# Грубо, но для названий категорий и кошельков достаточно.
+_ENDINGS = sorted(
+    "ами ями ого его ому ему ыми ими ые ие ой ей ую юю ая яя ов ев ам ям ах ях ом ем ы и а я у ю е о ь й".split(),
+    key=len,
+    reverse=True,
+)
+_STOPWORDS = {
+    "на", "с", "со", "в", "во", "за", "из", "от", "до", "по", "и", "для", "тг", "тенге", "kzt",
+    "купил", "купила", "потратил", "потратила", "заплатил", "заплатила", "оплатил", "оплатила",
+}
+_INCOME_STEMS = ("зарплат", "доход", "получ", "преми", "аванс", "кешбэк", "кэшбэк", "стипенд")
+_TRANSFER_STEMS = ("перевод", "перевел", "перекин")
+# Вопросы ("сколько я потратил на еду в 2024?") — не транзакции, их разбирает модель
+_QUESTION_WORDS = {
+    "сколько", "как", "какой", "какая", "какие", "каких", "что", "чем", "почему", "зачем",
+    "где", "куда", "когда", "ли", "покажи", "посчитай", "подскажи", "посоветуй",
+}
+# Каждое слово, которое не объясняется категорией, кошельком или словарём,
+# снижает уверенность: при пороге 0.8 одного такого слова достаточно,
+# чтобы сообщение ушло к модели
+UNMATCHED_WORD_PENALTY = 0.2
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_AMOUNT_RE = re.compile(
+    r"(?<![\w.,])(\d{1,3}(?:[ \u00a0]\d{3})+|\d+)(?:[.,](\d+))?\s*(к|k|тыс\w*)?(?!\w)",
+    re.IGNORECASE,
+)
+
+# Слово считается ключевым для категории, если встречалось не реже
+# MIN_KEYWORD_COUNT раз и не менее чем в MIN_KEYWORD_SHARE случаев вело в неё
+MIN_KEYWORD_COUNT = 2
+MIN_KEYWORD_SHARE = 0.6
+
+
+def stem(word: str) -> str:
+    word = word.lower().replace("ё", "е")
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 2:
+            return word[: -len(ending)]
+    return word
+
+
+def stems(text: str) -> List[str]:
+    return [stem(w) for w in _WORD_RE.findall(text) if w.lower() not in _STOPWORDS]
+
+
+def parse_amount(text: str) -> List[float]:
+    amounts = []
+    for match in _AMOUNT_RE.finditer(text):
+        whole, fraction, thousands = match.groups()
+        value = float(re.sub(r"\s", "", whole) + ("." + fraction if fraction else ""))
+        if thousands:
+            value *= 1000
+        amounts.append(value)
+    return amounts
+
+
+@dataclass
+class ParsedMessage:
+    type: str
+    amount: float
+    category: Optional[Dict[str, Any]]
+    wallet: Optional[Dict[str, Any]]
+    description: str
+    confidence: float
+
+    def to_result(self) -> Dict[str, Any]:
+        """
+        Тот же формат, что возвращает модель в AIService.process_message.
+        """
+        amount = int(self.amount) if self.amount.is_integer() else self.amount
+        kind = "доход" if self.type == "income" else "расход"
+        category_name = self.category["name"] if self.category else None
+        return {
+            "type": "transaction",
+            "transaction": {
+                "type": self.type,
+                "amount": amount,
+                "category": category_name,
+                "description": self.description,
+                "wallet": self.wallet["name"] if self.wallet else None,
+            },
+            "response": f"Записал {kind} {amount}" + (f" ({category_name})" if category_name else ""),
+            "source": "local",
+        }
+
+
+def _find_by_name(items: List[Dict[str, Any]], message_stems: List[str]) -> Optional[Dict[str, Any]]:
+    # Самое длинное название, все слова которого есть в сообщении
+    best, best_len = None, 0
+    for item in items:
+        name_stems = stems(item["name"])
+        if name_stems and all(s in message_stems for s in name_stems) and len(name_stems) > best_len:
+            best, best_len = item, len(name_stems)
+    return best
+
+
+def parse_message(
+    message: str,
+    user_data: Dict[str, Any],
+    keywords: Optional[Dict[str, List]] = None,
+) -> Optional[ParsedMessage]:
+    """
+    Разбирает сообщение в транзакцию. None — разобрать не получилось
+    (нет суммы, несколько сумм, перевод, вопрос), решать должна модель.
+    """
+    if "?" in message or any(w.lower() in _QUESTION_WORDS for w in _WORD_RE.findall(message)):
+        return None
+    amounts = parse_amount(message)
+    if len(amounts) != 1 or amounts[0] <= 0:
+        return None
+    # Сумма ("3.5к", "300 000") в поиске слов не участвует
+    text = _AMOUNT_RE.sub(" ", message)
+    message_stems = stems(text)
+    if any(s.startswith(_TRANSFER_STEMS) for s in message_stems):
+        return None
+
+    confidence = 0.5
+    categories = user_data.get("categories", [])
+    category = _find_by_name(categories, message_stems)
+    if category is not None:
+        confidence += 0.4
+    elif keywords:
+        # Словарь: stem → [category_id, доля]; берём самое уверенное слово
+        by_id = {c["id"]: c for c in categories}
+        hits = [keywords[s] for s in message_stems if s in keywords and keywords[s][0] in by_id]
+        if hits:
+            category_id, share = max(hits, key=lambda hit: hit[1])
+            category = by_id[category_id]
+            confidence += 0.4 * share
+
+    income_hint = any(s.startswith(_INCOME_STEMS) for s in message_stems)
+    if category is not None:
+        tx_type = str(getattr(category["type"], "value", category["type"]))
+        if income_hint and tx_type != "income":
+            confidence -= 0.3
+    else:
+        tx_type = "income" if income_hint else "expense"
+
+    wallets = user_data.get("wallets", [])
+    wallet = _find_by_name(wallets, message_stems)
+
+    used = set(stems(category["name"])) if category else set()
+    if wallet is not None:
+        used |= set(stems(wallet["name"]))
+    words = [w for w in _WORD_RE.findall(text) if stem(w) not in used and w.lower() not in _STOPWORDS]
+    unmatched = [
+        w for w in words if not (keywords and stem(w) in keywords) and not stem(w).startswith(_INCOME_STEMS)
+    ]
+    confidence -= UNMATCHED_WORD_PENALTY * len(unmatched)
+    description = " ".join(words).capitalize() or (category["name"] if category else "")
+    if not description:
+        description = "Доход" if tx_type == "income" else "Расход"
+
+    return ParsedMessage(
+        type=tx_type,
+        amount=amounts[0],
+        category=category,
+        wallet=wallet,
+        description=description,
+        confidence=round(max(confidence, 0.0), 2),
+    )
+
+
+def build_keyword_map(rows) -> Dict[str, List]:
+    """
+    rows — (name, comment, category_id, count), см. get_category_phrases_async.
+    """
+    counts: Dict[str, Counter] = defaultdict(Counter)
+    for name, comment, category_id, count in rows:
+        for s in set(stems(f"{name or ''} {comment or ''}")):
+            if len(s) >= 3:
+                counts[s][category_id] += count
+    keywords = {}
+    for s, by_category in counts.items():
+        total = sum(by_category.values())
+        category_id, hits = by_category.most_common(1)[0]
+        if hits >= MIN_KEYWORD_COUNT and hits / total >= MIN_KEYWORD_SHARE:
+            keywords[s] = [category_id, round(hits / total, 2)]
+    return keywords
+
+
+async def get_keyword_map_async(db: AsyncSession, user_id: int) -> Dict[str, List]:
+    # data_version растёт при любой записи транзакции — словарь пересобирается
+    version = await read_data_version_async(db, user_id)
+    cache_key = response_cache.key("transactions", user_id, "ai-keywords", version=version)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    rows = await crud_transaction.get_category_phrases_async(db, user_id=user_id)
+    return response_cache.set(cache_key, build_keyword_map(rows))
+
+
+def is_confident(parsed: Optional[ParsedMessage]) -> bool:
+    return parsed is not None and parsed.confidence >= settings.AI_PARSER_MIN_CONFIDENCE
@@ -1,44 +1,204 @@
-import os
+import asyncio
+import hashlib
 import json
+import re
+import time
 from typing import Dict, Any, Optional
-from openai import AzureOpenAI
-from azure.identity import DefaultAzureCredential
-from app.models.transaction import Transaction, Income, Expense
-from app.models.category import Category
-from app.models.wallet import Wallet
-from datetime import datetime
-from app.crud import crud_wallet, crud_category, crud_expense, crud_income
+
+import httpx
+from openai import AsyncAzureOpenAI
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.metrics import timed
+from app.services.ai_parser import is_confident, parse_message
+
+
+class AIUnavailable(Exception):
+    """
+    Модель недоступна: открыт circuit breaker или исчерпан таймаут очереди.
+    """
+
+
+class CircuitBreaker:
+    """
+    После `failure_threshold` ошибок подряд перестаёт пускать запросы к модели
+    на `reset_timeout` секунд, затем пропускает один пробный (half-open).
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def normalize_message(message: str) -> str:
+    return re.sub(r"\s+", " ", message.strip().lower())
+
+
+def user_data_fingerprint(user_data: Dict[str, Any]) -> str:
+    # Ответ модели зависит от категорий/кошельков — их изменение меняет ключ кэша
+    payload = json.dumps(
+        [
+            sorted((c["id"], c["name"], str(c["type"])) for c in user_data.get("categories", [])),
+            sorted((w["id"], w["name"]) for w in user_data.get("wallets", [])),
+            user_data.get("currency", "KZT"),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.blake2s(payload.encode(), digest_size=8).hexdigest()
+
 
 class AIService:
+    """
+    Асинхронный клиент Azure OpenAI: один пул HTTP-соединений на процесс,
+    таймауты, лимит одновременных запросов и circuit breaker.
+    """
+
     def __init__(self):
-        self.client = AzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+        self._client: Optional[AsyncAzureOpenAI] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENCY)
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.AI_BREAKER_FAILURES,
+            reset_timeout=settings.AI_BREAKER_RESET_SECONDS,
         )
-        self.model = os.getenv("AZURE_OPENAI_MODEL", "gpt-35-turbo")
-    
-    def process_message(self, message: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.model = settings.AZURE_OPENAI_MODEL or "gpt-35-turbo"
+
+    @property
+    def client(self) -> AsyncAzureOpenAI:
+        # Создаётся лениво — уже в процессе воркера и его event loop
+        if self._client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.AI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.AI_MAX_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(settings.AI_TIMEOUT_SECONDS, connect=settings.AI_CONNECT_TIMEOUT_SECONDS),
+            )
+            self._client = AsyncAzureOpenAI(
+                api_key=settings.AZURE_OPENAI_API_KEY,
+                api_version=settings.AZURE_OPENAI_API_VERSION or "2024-12-01-preview",
+                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                http_client=self._http_client,
+                max_retries=1,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._client = None
+        self._http_client = None
+
+    async def _complete(self, messages: list, *, temperature: float, max_tokens: int) -> str:
+        if not self.breaker.allow():
+            raise AIUnavailable("AI service is temporarily unavailable")
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), settings.AI_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # Слот так и не освободился — модель тут не виновата
+            self.breaker.release_probe()
+            raise AIUnavailable("AI service is busy")
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        try:
+            with timed("ai"):
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Отмена (клиент ушёл, shutdown) ничего не говорит о модели,
+            # но пробный слот надо вернуть — иначе breaker навсегда half-open
+            self.breaker.release_probe()
+            raise
+        finally:
+            self._semaphore.release()
+        self.breaker.record_success()
+        return response.choices[0].message.content
+
+    async def process_message(
+        self,
+        message: str,
+        user_data: Dict[str, Any],
+        *,
+        user_id: int = 0,
+        keywords: Optional[Dict[str, list]] = None,
+    ) -> Dict[str, Any]:
         """
         Обрабатывает сообщение пользователя и возвращает структурированные данные
         """
+        # Короткие фразы вида "такси 2000" разбираются локально, без модели
+        parsed = parse_message(message, user_data, keywords)
+        if is_confident(parsed):
+            return parsed.to_result()
+
+        cache_key = response_cache.key(
+            "ai", user_id, hashlib.blake2s(normalize_message(message).encode(), digest_size=8).hexdigest(),
+            user_data_fingerprint(user_data),
+        )
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            # Копия: в памяти процесса кэш отдаёт тот же объект, а эндпоинт дополняет результат
+            return dict(cached)
+
         system_prompt = """
         Ты финансовый помощник. Анализируй сообщения пользователя и извлекай информацию о транзакциях.
-        
+
         Возможные типы транзакций:
         - expense: расходы (покупки, услуги)
         - income: доходы (зарплата, подарки)
         - transfer: переводы между кошельками
-        
+
         Для каждой транзакции определи:
         - type: тип транзакции
         - amount: сумма (только число)
         - category: категория (еда, транспорт, зарплата, etc.)
         - description: описание
         - wallet: кошелек (если указан)
-        
+
         Если это не транзакция, но финансовый вопрос - отвечай как консультант.
-        
+
         Возвращай JSON в формате:
         {
             "type": "transaction|question|analysis",
@@ -52,66 +212,66 @@ class AIService:
             "response": "ответ пользователю"
         }
         """
-        
+
         user_prompt = f"""
         Сообщение пользователя: "{message}"
-        
+
         Данные пользователя:
         - Категории: {user_data.get('categories', [])}
         - Кошельки: {user_data.get('wallets', [])}
         - Валюта: {user_data.get('currency', 'KZT')}
         """
-        
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            result = await self._complete(
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.1,
                 max_tokens=500
             )
-            
-            result = response.choices[0].message.content
-            return json.loads(result)
-            
+            parsed = json.loads(result)
         except Exception as e:
             return {
                 "type": "error",
                 "response": f"Ошибка обработки: {str(e)}"
             }
-    
-    def analyze_expenses(self, transactions: list, period: str = "month") -> str:
+        return dict(response_cache.set(cache_key, parsed, ttl=settings.AI_CACHE_TTL_SECONDS))
+
+    async def analyze_expenses(self, summary: str, period: str = "month") -> str:
         """
-        Анализирует расходы и дает рекомендации
+        Анализирует расходы и дает рекомендации.
+        summary — сводка за период из app.services.ai_context.
         """
         system_prompt = """
         Ты финансовый аналитик. Проанализируй расходы пользователя и дай полезные рекомендации.
         Будь конкретным и давай практические советы.
         """
-        
+
         user_prompt = f"""
-        Расходы за {period}:
-        {json.dumps(transactions, ensure_ascii=False, indent=2)}
-        
+        Сводка расходов за {period}:
+        {summary}
+
         Проанализируй и дай рекомендации по экономии.
         """
-        
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            return await self._complete(
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.3,
                 max_tokens=800
             )
-            
-            return response.choices[0].message.content
-            
         except Exception as e:
             return f"Ошибка анализа: {str(e)}"
 
-ai_service = AIService() 
\ No newline at end of file
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
+
+ai_service = AIService()
@@ -1,12 +1,39 @@
+"""
+Отправка писем через фоновую очередь.
+
+send_* только ставят письмо в очередь и сразу возвращаются. Воркер очереди
+(запускается в lifespan приложения) держит одно SMTP-соединение, отправляет
+письма пачками и повторяет неудачные с backoff.
+
+Для локальной проверки хватит отладочного SMTP-сервера:
+
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_STARTTLS=false
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
-from typing import Any, Dict, List
-from datetime import datetime
-import random
+from typing import Any, Dict, List, Optional
 
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pydantic import BaseModel, EmailStr
 
 from app.core.config import settings
+from app.core.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_FOLDER = Path(__file__).parent.parent / "templates" / "email"
+
+# Одно окружение на процесс: шаблоны компилируются при первом использовании и кэшируются
+templates = Environment(
+    loader=FileSystemLoader(TEMPLATE_FOLDER),
+    autoescape=select_autoescape(["html"]),
+)
 
 
 class EmailSchema(BaseModel):
@@ -14,19 +41,168 @@ class EmailSchema(BaseModel):
     body: Dict[str, Any]
 
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    TEMPLATE_FOLDER=Path(__file__).parent.parent / "templates" / "email",
-    USE_CREDENTIALS=True,
-    SUPPRESS_SEND=settings.MAIL_CONSOLE,
-)
+@dataclass
+class OutgoingEmail:
+    recipients: List[str]
+    subject: str
+    template_name: str
+    template_body: Dict[str, Any]
+    attempts: int = 0
+
+    def render(self) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+        message["To"] = ", ".join(self.recipients)
+        message["Subject"] = self.subject
+        html = templates.get_template(self.template_name).render(**self.template_body)
+        message.set_content(html, subtype="html")
+        return message
+
+
+class EmailQueue:
+    """
+    Очередь писем с одним переиспользуемым SMTP-соединением на процесс.
+    """
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=settings.MAIL_QUEUE_MAX_SIZE)
+        self._worker = asyncio.create_task(self._run(), name="email-queue")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Дожидается отправки того, что уже в очереди (не дольше timeout), и закрывает соединение.
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Email queue stopped with %s unsent messages", self._queue.qsize())
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        await self._disconnect()
+
+    async def enqueue(self, email: OutgoingEmail) -> None:
+        if not self.running:
+            # Вне приложения (скрипты, тесты без lifespan) — отправляем сразу
+            await self._deliver([email])
+            return
+        try:
+            self._queue.put_nowait(email)
+        except asyncio.QueueFull:
+            # Не держим HTTP-запрос, пока SMTP лежит и очередь забита повторами:
+            # письмо теряется (пользователь может запросить код ещё раз)
+            self.dropped += 1
+            logger.error("Email queue is full (%s), email to %s dropped", self._queue.maxsize, email.recipients)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "connected": self._smtp is not None and self._smtp.is_connected,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                email = await asyncio.wait_for(self._queue.get(), settings.MAIL_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                # Серверы рвут простаивающие соединения — закрываем сами
+                await self._disconnect()
+                continue
+            batch = [email]
+            while len(batch) < settings.MAIL_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._deliver(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, batch: List[OutgoingEmail]) -> None:
+        for email in batch:
+            try:
+                message = email.render()
+                if settings.MAIL_CONSOLE:
+                    logger.info("Email (console) to %s: %s", message["To"], message["Subject"])
+                else:
+                    with timed("email"):
+                        await self._send(message)
+                self.sent += 1
+            except Exception:
+                email.attempts += 1
+                if email.attempts >= settings.MAIL_MAX_RETRIES or not self.running:
+                    self.failed += 1
+                    logger.exception("Email to %s dropped after %s attempts", email.recipients, email.attempts)
+                else:
+                    logger.warning("Email to %s failed, retry %s", email.recipients, email.attempts, exc_info=True)
+                    asyncio.get_running_loop().call_later(
+                        2 ** email.attempts, self._requeue, email
+                    )
+
+    def _requeue(self, email: OutgoingEmail) -> None:
+        if self.running:
+            try:
+                self._queue.put_nowait(email)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                logger.error("Email to %s dropped: queue is full on retry", email.recipients)
+        else:
+            self.failed += 1
+            logger.error("Email to %s dropped: queue stopped before retry", email.recipients)
+
+    async def _send(self, message: EmailMessage) -> None:
+        if self._smtp is None or not self._smtp.is_connected:
+            await self._connect()
+        try:
+            await self._smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # Соединение закрылось между письмами — переподключаемся один раз
+            await self._connect()
+            await self._smtp.send_message(message)
+
+    async def _connect(self) -> None:
+        await self._disconnect()
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            timeout=settings.MAIL_TIMEOUT,
+        )
+        await smtp.connect()
+        if settings.MAIL_USERNAME and smtp.supports_extension("auth"):
+            await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+        self._smtp = smtp
+
+    async def _disconnect(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+
+email_queue = EmailQueue()
 
 
 async def send_email(
@@ -35,16 +211,15 @@ async def send_email(
     template_name: str,
     template_body: Dict[str, Any],
 ):
-    message = MessageSchema(
-        subject=subject,
-        recipients=recipients,
-        template_body=template_body,
-        subtype=MessageType.html,
+    await email_queue.enqueue(
+        OutgoingEmail(
+            recipients=[str(r) for r in recipients],
+            subject=subject,
+            template_name=template_name,
+            template_body=template_body,
+        )
     )
 
-    fm = FastMail(conf)
-    await fm.send_message(message, template_name=template_name)
-
 
 async def send_verification_code_email(email_to: EmailStr, full_name: str, code: str):
     project_name = settings.MAIL_FROM_NAME
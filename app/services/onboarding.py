@@ -0,0 +1,100 @@
+from datetime import date
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.db.changes import track_change
+from app.models import Category, Expense, Income, User, Wallet
+from app.models.category import CategoryType
+
+# Дефолтные данные нового аккаунта (регистрация по email, Google, Apple)
+
+# (name, icon_name, color_hex); первый кошелёк — основной для расходов
+DEFAULT_WALLETS = [
+    ("Карта", "card", "#4F8A8B"),
+    ("Наличные", "cash", "#F9B208"),
+]
+DEFAULT_CURRENCY = "KZT"
+
+# (name, icon, color); для каждого шаблона создаётся одноимённая категория
+DEFAULT_INCOMES = [
+    ("Зарплата", "dollarsign.circle.fill", "#00FF00"),
+]
+DEFAULT_EXPENSES = [
+    ("Еда", "cart.fill", "#FF0000"),
+    ("Транспорт", "car.fill", "#00FF00"),
+    ("Продукты", "cart.fill", "#00FF00"),
+    ("Развлечения", "gamecontroller.fill", "#00FF00"),
+    ("Здоровье", "cross.case.fill", "#00FF00"),
+    ("Связь", "phone.fill", "#00FF00"),
+    ("Путешествия", "airplane", "#00FF00"),
+    ("Одежда", "tshirt.fill", "#00FF00"),
+    ("Красота", "scissors", "#00FF00"),
+]
+
+
+def create_default_data(db: Session, user: User) -> None:
+    """
+    Создаёт дефолтные кошельки, категории, доходы и расходы пользователя
+    четырьмя bulk INSERT (кошельки и категории — с RETURNING id) в одной транзакции.
+    """
+    today = date.today()
+
+    wallet_ids = db.scalars(
+        insert(Wallet).returning(Wallet.id, sort_by_parameter_order=True),
+        [
+            {
+                "name": name,
+                "balance": 0,
+                "icon_name": icon,
+                "color_hex": color,
+                "currency": DEFAULT_CURRENCY,
+                "user_id": user.id,
+            }
+            for name, icon, color in DEFAULT_WALLETS
+        ],
+    ).all()
+
+    categories = [(name, CategoryType.INCOME) for name, _, _ in DEFAULT_INCOMES]
+    categories += [(name, CategoryType.EXPENSE) for name, _, _ in DEFAULT_EXPENSES]
+    category_ids = db.scalars(
+        insert(Category).returning(Category.id, sort_by_parameter_order=True),
+        [{"name": name, "type": type_, "user_id": user.id} for name, type_ in categories],
+    ).all()
+    income_category_ids = category_ids[: len(DEFAULT_INCOMES)]
+    expense_category_ids = category_ids[len(DEFAULT_INCOMES):]
+
+    db.execute(
+        insert(Income),
+        [
+            {
+                "name": name,
+                "icon": icon,
+                "color": color,
+                "amount": 0,
+                "transaction_date": today,
+                "category_id": category_id,
+                "user_id": user.id,
+            }
+            for (name, icon, color), category_id in zip(DEFAULT_INCOMES, income_category_ids)
+        ],
+    )
+    db.execute(
+        insert(Expense),
+        [
+            {
+                "name": name,
+                "icon": icon,
+                "color": color,
+                "amount": 0,
+                "transaction_date": today,
+                "category_id": category_id,
+                "wallet_id": wallet_ids[0],
+                "user_id": user.id,
+            }
+            for (name, icon, color), category_id in zip(DEFAULT_EXPENSES, expense_category_ids)
+        ],
+    )
+    # Bulk insert идёт мимо flush — отмечаем изменения явно (кэш, data_version)
+    track_change(db, user.id, "wallets", "categories", "incomes", "expenses", "dashboard")
+    db.commit()
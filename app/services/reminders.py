@@ -0,0 +1,236 @@
+"""
+Напоминания о пополнении целей.
+
+У цели хранится next_reminder_at — ближайшее срабатывание в UTC, посчитанное
+по reminder_period / selected_* в часовом поясе пользователя. Тик воркера
+(app/worker.py) выбирает только созревшие цели по индексу next_reminder_at,
+пачками и с FOR UPDATE SKIP LOCKED (несколько воркеров не отправят одно
+напоминание дважды), отправляет их через ReminderSender и переносит
+next_reminder_at на следующий период.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import Goal, User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REMINDER_TIME = time(9, 0)
+
+
+def _user_zone(name: Optional[str]):
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def _parse_time(value: Optional[str]) -> time:
+    try:
+        hours, minutes = value.split(":")[:2]
+        return time(int(hours), int(minutes))
+    except (AttributeError, ValueError):
+        return DEFAULT_REMINDER_TIME
+
+
+def _month_day(year: int, month: int, day: int) -> date:
+    # 31-е в коротком месяце — последний день месяца
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return date(year, month, min(day, (next_month - timedelta(days=1)).day))
+
+
+def next_reminder_at(
+    *,
+    reminder_period: Optional[str],
+    selected_weekday: Optional[int],
+    selected_month_day: Optional[int],
+    selected_time: Optional[str],
+    user_timezone: Optional[str],
+    after: datetime,
+) -> Optional[datetime]:
+    """
+    Первое срабатывание строго позже after (naive UTC). Возвращает naive UTC
+    или None, если напоминание не настроено.
+    """
+    zone = _user_zone(user_timezone)
+    local_after = after.replace(tzinfo=timezone.utc).astimezone(zone)
+    at = _parse_time(selected_time)
+
+    if reminder_period == "week":
+        weekday = min(max((selected_weekday or 1) - 1, 0), 6)  # 1 — понедельник
+        day = local_after.date() + timedelta(days=(weekday - local_after.weekday()) % 7)
+        candidates = [day, day + timedelta(days=7)]
+    elif reminder_period == "month":
+        year, month = local_after.year, local_after.month
+        candidates = [
+            _month_day(year + (month - 1 + offset) // 12, (month - 1 + offset) % 12 + 1, selected_month_day or 1)
+            for offset in (0, 1)
+        ]
+    else:
+        return None
+
+    for day in candidates:
+        moment = datetime.combine(day, at, tzinfo=zone)
+        if moment > local_after:
+            return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return None
+
+
+def schedule_goal(goal: Goal, user_timezone: Optional[str], now: Optional[datetime] = None) -> None:
+    goal.next_reminder_at = next_reminder_at(
+        reminder_period=goal.reminder_period,
+        selected_weekday=goal.selected_weekday,
+        selected_month_day=goal.selected_month_day,
+        selected_time=goal.selected_time,
+        user_timezone=user_timezone,
+        after=now or datetime.utcnow(),
+    )
+
+
+@dataclass
+class Reminder:
+    user_id: int
+    goal_id: int
+    title: str
+    body: str
+
+
+class LoggingSender:
+    """
+    Только пишет напоминания в лог — по умолчанию и для локальной разработки.
+    """
+
+    async def send(self, reminders: List[Reminder]) -> None:
+        for reminder in reminders:
+            logger.info("Reminder to user %s: %s", reminder.user_id, reminder.body)
+
+
+class FakeSender:
+    """
+    Копит отправленное в памяти — для тестов.
+    """
+
+    def __init__(self) -> None:
+        self.sent: List[Reminder] = []
+
+    async def send(self, reminders: List[Reminder]) -> None:
+        self.sent.extend(reminders)
+
+
+class FirebaseSender:
+    """
+    Push через Firebase Cloud Messaging в топик user_<id>, на который
+    подписывается клиент пользователя.
+    """
+
+    # Ограничение FCM на один send_each
+    MAX_BATCH = 500
+
+    def __init__(self, credentials_path: str) -> None:
+        import firebase_admin
+        from firebase_admin import credentials, messaging
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(credentials_path))
+        self._messaging = messaging
+
+    async def send(self, reminders: List[Reminder]) -> None:
+        messages = [
+            self._messaging.Message(
+                topic=f"user_{reminder.user_id}",
+                notification=self._messaging.Notification(title=reminder.title, body=reminder.body),
+                data={"goal_id": str(reminder.goal_id)},
+            )
+            for reminder in reminders
+        ]
+        for start in range(0, len(messages), self.MAX_BATCH):
+            # firebase-admin синхронный — не блокируем event loop
+            response = await asyncio.to_thread(self._messaging.send_each, messages[start:start + self.MAX_BATCH])
+            if response.failure_count:
+                logger.warning("FCM: %s of %s reminders failed", response.failure_count, len(response.responses))
+
+
+_sender = None
+
+
+def get_sender():
+    global _sender
+    if _sender is None:
+        if settings.REMINDER_SENDER == "firebase":
+            _sender = FirebaseSender(settings.FIREBASE_CREDENTIALS)
+        else:
+            _sender = LoggingSender()
+    return _sender
+
+
+def _reminder_text(name: str, plan_amount: Optional[float], currency: str) -> str:
+    if plan_amount:
+        return f"Пора пополнить цель «{name}» на {plan_amount:g} {currency}"
+    return f"Пора пополнить цель «{name}»"
+
+
+async def send_due_reminders(sender=None, *, now: Optional[datetime] = None) -> int:
+    """
+    Один тик: отправляет все созревшие напоминания пачками по
+    REMINDER_BATCH_SIZE и возвращает их число.
+    """
+    sender = sender or get_sender()
+    now = now or datetime.utcnow()
+    sent = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.exec(
+                    select(Goal, User.timezone)
+                    .join(User, User.id == Goal.user_id)
+                    .where(Goal.next_reminder_at <= now)
+                    .order_by(Goal.next_reminder_at)
+                    .limit(settings.REMINDER_BATCH_SIZE)
+                    .with_for_update(of=Goal, skip_locked=True)
+                )
+            ).all()
+            if not rows:
+                return sent
+            await sender.send(
+                [
+                    Reminder(
+                        user_id=goal.user_id,
+                        goal_id=goal.id,
+                        title=goal.name,
+                        body=_reminder_text(goal.name, goal.plan_amount, goal.currency),
+                    )
+                    for goal, _ in rows
+                ]
+            )
+            # Bulk UPDATE по первичному ключу, мимо flush: служебное поле,
+            # данные пользователя (кэш, data_version) не меняются
+            await db.execute(
+                update(Goal),
+                [
+                    {
+                        "id": goal.id,
+                        "next_reminder_at": next_reminder_at(
+                            reminder_period=goal.reminder_period,
+                            selected_weekday=goal.selected_weekday,
+                            selected_month_day=goal.selected_month_day,
+                            selected_time=goal.selected_time,
+                            user_timezone=user_timezone,
+                            after=now,
+                        ),
+                    }
+                    for goal, user_timezone in rows
+                ],
+            )
+            await db.commit()
+        sent += len(rows)
+        if len(rows) < settings.REMINDER_BATCH_SIZE:
+            return sent
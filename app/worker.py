@@ -0,0 +1,98 @@
+"""
+Фоновые периодические задачи (напоминания о целях и т.п.).
+
+Отдельным процессом:
+
+    python -m app.worker
+
+или внутри API-процесса при SCHEDULER_ENABLED=true (см. lifespan в main.py).
+Задачи берут работу с FOR UPDATE SKIP LOCKED, так что несколько воркеров
+могут работать одновременно.
+"""
+import asyncio
+import logging
+import signal
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.session import async_engine
+from app.crud.crud_idempotency import purge_expired
+from app.services.reminders import send_due_reminders
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    interval: float
+    func: Callable[[], Awaitable[Any]]
+    runs: int = 0
+    failures: int = 0
+
+
+class Scheduler:
+    """
+    Запускает каждую задачу в своей asyncio-задаче раз в interval секунд.
+    Ошибка тика логируется и не останавливает задачу.
+    """
+
+    def __init__(self) -> None:
+        self.jobs: List[Job] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, interval: float, func: Callable[[], Awaitable[Any]]) -> None:
+        self.jobs.append(Job(name=name, interval=interval, func=func))
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._run(job), name=f"job-{job.name}") for job in self.jobs]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {job.name: {"runs": job.runs, "failures": job.failures} for job in self.jobs}
+
+    async def _run(self, job: Job) -> None:
+        while True:
+            try:
+                result = await job.func()
+                job.runs += 1
+                if result:
+                    logger.info("Job %s: %s", job.name, result)
+            except Exception:
+                job.failures += 1
+                logger.exception("Job %s failed", job.name)
+            await asyncio.sleep(job.interval)
+
+
+scheduler = Scheduler()
+scheduler.add_job("goal-reminders", settings.REMINDER_TICK_SECONDS, send_due_reminders)
+scheduler.add_job("idempotency-keys-cleanup", 3600, lambda: asyncio.to_thread(purge_expired))
+
+
+async def run(stop_event: Optional[asyncio.Event] = None) -> None:
+    stop_event = stop_event or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    scheduler.start()
+    logger.info("Worker started: %s", ", ".join(job.name for job in scheduler.jobs))
+    await stop_event.wait()
+    await scheduler.stop()
+    # Иначе соединения пула (и потоки драйвера) держат процесс после остановки
+    await async_engine.dispose()
+    logger.info("Worker stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run())
@@ -0,0 +1,80 @@
+"""
+Локальная заглушка Azure OpenAI chat completions для тестов и нагрузки без
+обращения к настоящей модели.
+
+    uvicorn benchmarks.azure_openai_stub:app --port 8090
+    AZURE_OPENAI_ENDPOINT=http://localhost:8090 AZURE_OPENAI_API_KEY=stub
+
+Разбирает сообщения вида "кофе 1500" в расход и отвечает в формате,
+который ждёт AIService.process_message. Поведение настраивается переменными
+окружения: STUB_LATENCY_MS (задержка ответа), STUB_FAILURE_RATE (доля 500-х).
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY = float(os.getenv("STUB_LATENCY_MS", "300")) / 1000
+FAILURE_RATE = float(os.getenv("STUB_FAILURE_RATE", "0"))
+
+app = FastAPI(title="Azure OpenAI stub")
+app.state.calls = 0
+
+MESSAGE_RE = re.compile(r'Сообщение пользователя: "(?P<text>.*?)"', re.S)
+
+
+def _answer(prompt: str) -> str:
+    match = MESSAGE_RE.search(prompt)
+    if match is None:
+        return "Сократите расходы на кафе и развлечения."
+    text = match.group("text")
+    amount = re.search(r"\d+(?:[.,]\d+)?", text)
+    if amount is None:
+        return json.dumps({"type": "question", "response": "Уточните сумму"}, ensure_ascii=False)
+    description = text.replace(amount.group(0), "").strip() or "Расход"
+    return json.dumps(
+        {
+            "type": "transaction",
+            "transaction": {
+                "type": "expense",
+                "amount": float(amount.group(0).replace(",", ".")),
+                "category": description,
+                "description": description,
+            },
+            "response": f"Записал расход {amount.group(0)}",
+        },
+        ensure_ascii=False,
+    )
+
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def chat_completions(deployment: str, request: Request):
+    app.state.calls += 1
+    body = await request.json()
+    await asyncio.sleep(LATENCY)
+    if random.random() < FAILURE_RATE:
+        return JSONResponse(status_code=500, content={"error": {"message": "stub failure"}})
+    return {
+        "id": f"chatcmpl-stub-{app.state.calls}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": deployment,
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": _answer(body["messages"][-1]["content"])},
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.get("/stats")
+def stats():
+    return {"calls": app.state.calls}
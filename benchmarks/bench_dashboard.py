@@ -0,0 +1,149 @@
+"""
+Бенчмарк GET /dashboard: старая схема (3 запроса по транзакциям) против чтения
+дневной сводки transaction_daily_rollup.
+
+Сидирует одного синтетического пользователя с N транзакциями, пересобирает
+ему сводку и замеряет get_dashboard_data на месячном и годовом диапазоне.
+
+    python -m benchmarks.bench_dashboard --sizes 10000,100000,1000000
+
+База берётся из SQLALCHEMY_DATABASE_URI (.env). Для локального прогона можно
+указать отдельную sqlite/postgres базу через --db; таблицы создаются, данные
+бенчмарка удаляются в конце.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, delete, func, insert
+from sqlmodel import Session, SQLModel, select
+
+import app.db.base  # noqa
+from app.core.config import settings
+from app.crud import crud_rollup
+from app.crud.crud_dashboard import get_dashboard_data
+from app.models import Category, Transaction, TransactionDailyRollup, User, Wallet
+
+CATEGORIES = ["Еда", "Транспорт", "Продукты", "Развлечения", "Здоровье", "Связь", "Путешествия", "Одежда", "Красота"]
+TYPES = ["expense"] * 7 + ["income"] * 2 + ["goal_transfer"]
+HISTORY_DAYS = 3 * 365
+CHUNK = 10_000
+
+
+def legacy_dashboard(db: Session, *, user: User, start_date: date, end_date: date):
+    """Прежняя реализация: две суммы и разбивка по категориям отдельными запросами."""
+    def period(type_):
+        return (
+            Transaction.user_id == user.id,
+            Transaction.type == type_,
+            Transaction.amount > 0,
+            Transaction.transaction_date >= start_date,
+            Transaction.transaction_date <= end_date,
+        )
+
+    total_income = db.exec(select(func.sum(Transaction.amount)).where(*period("income"))).one_or_none() or 0.0
+    total_expense = db.exec(select(func.sum(Transaction.amount)).where(*period("expense"))).one_or_none() or 0.0
+    by_category = db.exec(
+        select(Category.name, func.sum(Transaction.amount))
+        .join(Category, Transaction.to_category_id == Category.id)
+        .where(*period("expense"))
+        .group_by(Category.name)
+    ).all()
+    return total_income, total_expense, by_category
+
+
+def seed_user(db: Session, n_transactions: int, today: date) -> User:
+    user = User(email=f"bench-{n_transactions}-{random.getrandbits(32)}@growfi.local", is_email_verified=True)
+    db.add(user)
+    db.flush()
+    wallet = Wallet(name="Карта", user_id=user.id)
+    db.add(wallet)
+    categories = [Category(name=name, type="expense", user_id=user.id) for name in CATEGORIES]
+    db.add_all(categories)
+    db.flush()
+    category_ids = [c.id for c in categories]
+
+    rows = []
+    for _ in range(n_transactions):
+        type_ = random.choice(TYPES)
+        rows.append({
+            "user_id": user.id,
+            "from_wallet_id": wallet.id,
+            "to_category_id": random.choice(category_ids) if type_ != "goal_transfer" else None,
+            "amount": round(random.uniform(100, 50_000), 2),
+            "transaction_date": today - timedelta(days=random.randrange(HISTORY_DAYS)),
+            "type": type_,
+            "name": "bench",
+        })
+        if len(rows) == CHUNK:
+            db.execute(insert(Transaction), rows)
+            rows = []
+    if rows:
+        db.execute(insert(Transaction), rows)
+    # Bulk insert идёт мимо CRUD — сводку собираем как при бэкфилле
+    crud_rollup.rebuild(db, user_id=user.id)
+    db.commit()
+    return user
+
+
+def cleanup(db: Session, user: User) -> None:
+    db.execute(delete(TransactionDailyRollup).where(TransactionDailyRollup.user_id == user.id))
+    db.execute(delete(Transaction).where(Transaction.user_id == user.id))
+    db.execute(delete(Category).where(Category.user_id == user.id))
+    db.execute(delete(Wallet).where(Wallet.user_id == user.id))
+    db.execute(delete(User).where(User.id == user.id))
+    db.commit()
+
+
+def timeit(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def fmt(samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"p50={statistics.median(samples):8.2f}ms p95={p95:8.2f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=str(settings.SQLALCHEMY_DATABASE_URI))
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="не удалять сгенерированные данные")
+    args = parser.parse_args()
+
+    engine = create_engine(args.db)
+    SQLModel.metadata.create_all(engine)
+    today = date.today()
+    ranges = {
+        "month": (today.replace(day=1), today),
+        "year": (today - timedelta(days=365), today),
+    }
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with Session(engine) as db:
+            seed_start = time.perf_counter()
+            user = seed_user(db, size, today)
+            print(f"\n{size:>9,} transactions (seeded in {time.perf_counter() - seed_start:.1f}s)")
+            try:
+                for label, (start_date, end_date) in ranges.items():
+                    kwargs = dict(user=user, start_date=start_date, end_date=end_date)
+                    legacy = timeit(lambda: legacy_dashboard(db, **kwargs), args.repeat)
+                    rollup = timeit(lambda: get_dashboard_data(db, **kwargs), args.repeat)
+                    speedup = statistics.median(legacy) / statistics.median(rollup)
+                    print(f"  {label:<5} 3 queries: {fmt(legacy)} | rollup: {fmt(rollup)} | x{speedup:.2f}")
+            finally:
+                if not args.keep:
+                    cleanup(db, user)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Нагрузочный прогон API: смесь реальных запросов клиента и отчёт по
+пропускной способности и p50/p95/p99 на эндпоинт. Нужен как базовая линия
+при сравнении настроек пула, кэша, индексов и числа воркеров.
+
+1. Сидирование синтетических пользователей (load-<n>@growfi.local):
+   кошельки, категории, шаблоны доходов/расходов, цели и история транзакций.
+
+    python -m benchmarks.loadtest seed --users 20 --transactions 10000
+
+   База — SQLALCHEMY_DATABASE_URI (.env) или --db. Повторный seed
+   пропускает уже созданных пользователей; --reset пересоздаёт их.
+
+2. Прогон против запущенного API (или --base-url asgi — приложение в этом
+   же процессе через httpx.ASGITransport, без сети; генератор нагрузки
+   тогда делит CPU с приложением):
+
+    python -m benchmarks.loadtest run --base-url http://localhost:8000 \\
+        --users 20 --concurrency 32 --duration 60 --json baseline.json
+
+   Смесь задаётся весами: --mix feed=40,dashboard=25,wallets=10,assign_expense=10,assign_goal=5,login=10
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import create_engine, delete, insert
+from sqlmodel import Session, SQLModel, select
+
+import app.db.base  # noqa
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.crud import crud_rollup
+from app.models import (
+    Category,
+    Expense,
+    Goal,
+    IdempotencyKey,
+    Income,
+    Transaction,
+    TransactionDailyRollup,
+    User,
+    Wallet,
+)
+from benchmarks.bench_dashboard import CATEGORIES, CHUNK, HISTORY_DAYS
+
+PASSWORD = "loadtest-password"
+INCOME_CATEGORIES = ["Зарплата", "Фриланс"]
+WALLETS = ["Карта", "Наличные", "Депозит"]
+# Балансы и цели с запасом: списания прогона не должны упираться в 400
+BIG = 10 ** 12
+
+DEFAULT_MIX = "feed=40,dashboard=25,wallets=10,assign_expense=10,assign_goal=5,login=10"
+
+
+def user_email(index: int) -> str:
+    return f"load-{index}@growfi.local"
+
+
+# --- seed -------------------------------------------------------------------
+
+
+def seed_user(db: Session, email: str, hashed_password: str, n_transactions: int, today: date) -> None:
+    user = User(email=email, hashed_password=hashed_password, is_email_verified=True)
+    db.add(user)
+    db.flush()
+    wallets = [Wallet(name=name, balance=BIG, user_id=user.id) for name in WALLETS]
+    expense_categories = [Category(name=name, type="expense", user_id=user.id) for name in CATEGORIES]
+    income_categories = [Category(name=name, type="income", user_id=user.id) for name in INCOME_CATEGORIES]
+    goals = [
+        Goal(name=name, target_amount=BIG, icon="target", color="#4CAF50", user_id=user.id)
+        for name in ("Отпуск", "Машина")
+    ]
+    db.add_all([*wallets, *expense_categories, *income_categories, *goals])
+    db.flush()
+    db.add_all(
+        Expense(name=c.name, icon="cart", color="#F44336", user_id=user.id, category_id=c.id, wallet_id=wallets[0].id)
+        for c in expense_categories
+    )
+    db.add_all(
+        Income(name=c.name, icon="cash", color="#4CAF50", user_id=user.id, category_id=c.id, wallet_id=wallets[0].id)
+        for c in income_categories
+    )
+
+    rows = []
+    for _ in range(n_transactions):
+        kind = random.choices(("expense", "income", "goal_transfer"), weights=(7, 2, 1))[0]
+        wallet_id = random.choice(wallets).id
+        row = {
+            "user_id": user.id,
+            "amount": round(random.uniform(100, 50_000), 2),
+            "transaction_date": today - timedelta(days=random.randrange(HISTORY_DAYS)),
+            "type": kind,
+        }
+        if kind == "income":
+            category = random.choice(income_categories)
+            row.update(to_wallet_id=wallet_id, to_category_id=category.id, name=category.name)
+        elif kind == "expense":
+            category = random.choice(expense_categories)
+            row.update(from_wallet_id=wallet_id, to_category_id=category.id, name=category.name)
+        else:
+            goal = random.choice(goals)
+            row.update(from_wallet_id=wallet_id, to_goal_id=goal.id, name=goal.name, goal_name=goal.name)
+        rows.append(row)
+        if len(rows) == CHUNK:
+            db.execute(insert(Transaction), rows)
+            rows = []
+    if rows:
+        db.execute(insert(Transaction), rows)
+    # Bulk insert идёт мимо CRUD — сводку собираем как при бэкфилле
+    crud_rollup.rebuild(db, user_id=user.id)
+    db.commit()
+
+
+def delete_users(db: Session, user_ids: List[int]) -> None:
+    for model in (TransactionDailyRollup, Transaction, IdempotencyKey, Expense, Income, Goal, Wallet, Category):
+        db.execute(delete(model).where(model.user_id.in_(user_ids)))
+    db.execute(delete(User).where(User.id.in_(user_ids)))
+    db.commit()
+
+
+def seed(args) -> None:
+    random.seed(args.seed)
+    engine = create_engine(args.db)
+    SQLModel.metadata.create_all(engine)
+    today = date.today()
+    # bcrypt один раз на весь прогон: у всех пользователей один пароль
+    hashed_password = get_password_hash(PASSWORD)
+    emails = [user_email(i) for i in range(args.users)]
+    with Session(engine) as db:
+        existing = dict(db.exec(select(User.email, User.id).where(User.email.in_(emails))).all())
+        if existing and args.reset:
+            delete_users(db, list(existing.values()))
+            existing = {}
+        for email in emails:
+            if email in existing:
+                continue
+            start = time.perf_counter()
+            seed_user(db, email, hashed_password, args.transactions, today)
+            print(f"{email}: {args.transactions:,} transactions in {time.perf_counter() - start:.1f}s")
+    print(f"{len(emails) - len(existing)} users seeded, {len(existing)} already present")
+
+
+# --- run --------------------------------------------------------------------
+
+
+@dataclass
+class Client:
+    email: str
+    headers: Dict[str, str]
+    wallet_ids: List[int]
+    goal_ids: List[int]
+    expense_ids: List[int]
+
+
+@dataclass
+class Samples:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+
+async def login(http: httpx.AsyncClient, email: str) -> httpx.Response:
+    return await http.post(
+        f"{settings.API_V1_STR}/auth/login", data={"username": email, "password": PASSWORD}
+    )
+
+
+async def prepare_client(http: httpx.AsyncClient, email: str) -> Client:
+    response = await login(http, email)
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    api = settings.API_V1_STR
+    wallets = (await http.get(f"{api}/wallet/", headers=headers)).json()
+    goals = (await http.get(f"{api}/goals/", headers=headers)).json()
+    expenses = (await http.get(f"{api}/expenses/", params={"size": 100}, headers=headers)).json()["items"]
+    return Client(
+        email=email,
+        headers=headers,
+        wallet_ids=[w["id"] for w in wallets],
+        goal_ids=[g["id"] for g in goals],
+        expense_ids=[e["id"] for e in expenses],
+    )
+
+
+def _dashboard_params() -> Dict[str, str]:
+    today = date.today()
+    if random.random() < 0.7:
+        return {}  # текущий месяц — как открывает приложение
+    return {"start_date": str(today - timedelta(days=365)), "end_date": str(today)}
+
+
+async def call(http: httpx.AsyncClient, name: str, client: Client) -> httpx.Response:
+    api = settings.API_V1_STR
+    today = str(date.today())
+    if name == "feed":
+        params = {"limit": 50}
+        if random.random() < 0.3:
+            params["type"] = random.choice(("income", "expense", "goal_transfer"))
+        return await http.get(f"{api}/transactions/", params=params, headers=client.headers)
+    if name == "dashboard":
+        return await http.get(f"{api}/dashboard/", params=_dashboard_params(), headers=client.headers)
+    if name == "wallets":
+        return await http.get(f"{api}/wallet/", headers=client.headers)
+    if name == "assign_expense":
+        return await http.patch(
+            f"{api}/wallet/{random.choice(client.wallet_ids)}/assign-expense",
+            json={"expense_id": random.choice(client.expense_ids), "amount": 10, "date": today},
+            headers=client.headers,
+        )
+    if name == "assign_goal":
+        return await http.patch(
+            f"{api}/wallet/{random.choice(client.wallet_ids)}/assign-goal",
+            json={"goal_id": random.choice(client.goal_ids), "amount": 10, "date": today},
+            headers=client.headers,
+        )
+    if name == "login":
+        return await login(http, client.email)
+    raise ValueError(f"Unknown endpoint in mix: {name}")
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    # Nearest-rank, без интерполяции
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+def report(results: Dict[str, Samples], elapsed: float) -> Dict[str, dict]:
+    summary = {}
+    print(f"\n{'endpoint':<16}{'count':>8}{'errors':>8}{'rps':>9}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+    for name, samples in sorted(results.items()):
+        if not samples.latencies:
+            continue
+        values = sorted(samples.latencies)
+        row = {
+            "count": len(values),
+            "errors": samples.errors,
+            "rps": round(len(values) / elapsed, 2),
+            "mean_ms": round(statistics.fmean(values), 2),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+        summary[name] = row
+        print(
+            f"{name:<16}{row['count']:>8}{row['errors']:>8}{row['rps']:>9.1f}{row['mean_ms']:>9.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+        )
+    total = sum(row["count"] for row in summary.values())
+    errors = sum(row["errors"] for row in summary.values())
+    print(f"\n{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s, {errors} errors")
+    return summary
+
+
+def make_http(base_url: str, concurrency: int) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(60.0)
+    if base_url == "asgi":
+        from app.main import app
+
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout)
+
+
+async def run_load(args) -> None:
+    random.seed(args.seed)
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    results = {name: Samples() for name in names}
+
+    async with make_http(args.base_url, args.concurrency) as http:
+        clients = await asyncio.gather(*(prepare_client(http, user_email(i)) for i in range(args.users)))
+        print(f"{len(clients)} users logged in, mix: {args.mix}")
+
+        deadline = time.perf_counter() + args.duration
+        remaining = args.requests
+
+        async def worker() -> None:
+            nonlocal remaining
+            while time.perf_counter() < deadline:
+                if args.requests:
+                    if remaining <= 0:
+                        return
+                    remaining -= 1
+                name = random.choices(names, weights)[0]
+                samples = results[name]
+                start = time.perf_counter()
+                try:
+                    response = await call(http, name, random.choice(clients))
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                samples.latencies.append((time.perf_counter() - start) * 1000)
+                samples.errors += failed
+
+        for _ in range(args.warmup):
+            await call(http, random.choices(names, weights)[0], random.choice(clients))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    if args.base_url == "asgi":
+        from app.db.session import async_engine
+
+        # Иначе потоки драйвера (aiosqlite) держат процесс после прогона
+        await async_engine.dispose()
+
+    summary = report(results, elapsed)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "base_url": args.base_url,
+                    "users": args.users,
+                    "concurrency": args.concurrency,
+                    "mix": mix,
+                    "elapsed_seconds": round(elapsed, 2),
+                    "endpoints": summary,
+                },
+                f,
+                indent=2,
+            )
+        print(f"Saved to {args.json}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--seed", type=int, default=42, help="seed генератора случайных чисел")
+
+    seed_parser = commands.add_parser("seed", parents=[common], help="создать синтетических пользователей")
+    seed_parser.add_argument("--db", default=str(settings.SQLALCHEMY_DATABASE_URI))
+    seed_parser.add_argument("--users", type=int, default=10)
+    seed_parser.add_argument("--transactions", type=int, default=10_000, help="транзакций на пользователя")
+    seed_parser.add_argument("--reset", action="store_true", help="пересоздать уже существующих")
+
+    run_parser = commands.add_parser("run", parents=[common], help="прогнать нагрузку")
+    run_parser.add_argument("--base-url", default="http://localhost:8000", help='URL API или "asgi"')
+    run_parser.add_argument("--users", type=int, default=10, help="сколько засиженных пользователей использовать")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--duration", type=float, default=30.0, help="секунд")
+    run_parser.add_argument("--requests", type=int, default=0, help="остановиться после N запросов (0 — по времени)")
+    run_parser.add_argument("--warmup", type=int, default=20, help="запросов до начала замера")
+    run_parser.add_argument("--mix", default=DEFAULT_MIX)
+    run_parser.add_argument("--json", help="сохранить отчёт для сравнения прогонов")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        seed(args)
+    else:
+        asyncio.run(run_load(args))
+
+
+if __name__ == "__main__":
+    main()
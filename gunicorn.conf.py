@@ -0,0 +1,66 @@
+"""
+Продакшен-запуск API: gunicorn-мастер и N uvicorn-воркеров (uvloop + httptools
+из uvicorn[standard]), по одному процессу на ядро.
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Всё настраивается переменными окружения (значения по умолчанию — ниже).
+
+Каждый воркер держит свои пулы БД (DB_POOL_SIZE + DB_MAX_OVERFLOW на sync
+и async движок), кэш в памяти и метрики: WEB_CONCURRENCY * 2 *
+(DB_POOL_SIZE + DB_MAX_OVERFLOW) должно помещаться в max_connections Postgres.
+Кэш ответов (CACHE_BACKEND=memory) у каждого воркера свой, но ключуется
+общей User.data_version из БД, поэтому запись в одном воркере не оставляет
+устаревших ответов в других; CACHE_BACKEND=redis делит и сами записи.
+Фоновые задачи лучше держать отдельным процессом (python -m app.worker), а не
+включать SCHEDULER_ENABLED в каждом воркере.
+"""
+import multiprocessing
+import os
+import sys
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = _env_int("WEB_CONCURRENCY", multiprocessing.cpu_count())
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Воркер, не ответивший мастеру дольше timeout, перезапускается;
+# при рестарте/деплое запросы дорабатывают graceful_timeout секунд
+timeout = _env_int("GUNICORN_TIMEOUT", 60)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+# Дольше, чем idle timeout балансировщика перед нами (у AWS ALB — 60 с),
+# иначе он иногда шлёт запрос в уже закрытое соединение
+keepalive = _env_int("GUNICORN_KEEPALIVE", 75)
+
+# Плановый перезапуск воркера после N запросов (утечки памяти, фрагментация);
+# jitter — чтобы воркеры не перезапускались одновременно
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 10_000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 1_000)
+
+# preload: приложение импортируется один раз в мастере (быстрее старт,
+# общая память), но тогда движки создаются до fork — см. post_fork
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+# X-Forwarded-* от прокси/балансировщика
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "*")
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # С preload_app пулы соединений созданы в мастере: соединения, открытые
+    # до fork, нельзя делить между процессами. dispose(close=False) забывает
+    # их, не закрывая (их закроет владелец), — воркер откроет свои.
+    if "app.db.session" not in sys.modules:
+        return
+    from app.db.session import async_engine, engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    server.log.info("Worker %s: database pools reset after fork", worker.pid)
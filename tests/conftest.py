@@ -0,0 +1,137 @@
+"""
+Тесты идут на SQLite во временном каталоге. Окружение задаётся здесь,
+до первого импорта app: settings и движки создаются при импорте.
+"""
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="growfi-tests-")
+
+# Базу задаём всегда — тесты не должны попасть в базу из .env
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ.pop("ASYNC_SQLALCHEMY_DATABASE_URI", None)
+os.environ["CACHE_BACKEND"] = "memory"
+
+for name, value in {
+    "SECRET_KEY": "test-secret",
+    "DATABASE_URL": "sqlite://",
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_FROM": "noreply@example.com",
+    "MAIL_SERVER": "localhost",
+    "MAIL_FROM_NAME": "GrowFi",
+    "MAIL_CONSOLE": "true",
+    "EMAIL_TEMPLATES_DIR": os.path.join(os.path.dirname(__file__), "..", "app", "templates", "email"),
+}.items():
+    os.environ.setdefault(name, value)
+
+# Бюджет запросов и поиск N+1 (app/db/query_debug.py) проверяются в каждом тесте API
+os.environ.setdefault("QUERY_DEBUG", "raise")
+
+from types import SimpleNamespace  # noqa: E402
+
+import pytest  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    import app.db.base  # noqa: F401  (все модели в metadata)
+    from app.main import app
+
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    from app.db.session import async_engine
+
+    with TestClient(app) as client:
+        yield client
+        # aiosqlite держит поток на соединение — закрываем в цикле клиента
+        client.portal.call(async_engine.dispose)
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    from app.core.cache import response_cache, user_cache
+    from app.db.session import engine
+
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    response_cache.backend.clear()
+    user_cache.clear()
+    yield
+
+
+@pytest.fixture
+def db():
+    from app.db.session import engine
+
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+def user(db):
+    """
+    Пользователь с кошельком, целью, расходом и доходом; headers — Bearer-токен.
+    """
+    from app import models
+    from app.core import security
+
+    user = models.User(email="user@example.com", hashed_password="x", is_email_verified=True)
+    db.add(user)
+    db.flush()
+    wallet = models.Wallet(name="Карта", balance=1000, user_id=user.id)
+    expense_category = models.Category(name="Еда", type="expense", user_id=user.id)
+    income_category = models.Category(name="Зарплата", type="income", user_id=user.id)
+    goal = models.Goal(name="Машина", target_amount=500, icon="car", color="#0f0", user_id=user.id)
+    db.add_all([wallet, expense_category, income_category, goal])
+    db.flush()
+    expense = models.Expense(
+        name="Продукты", icon="cart", color="#f00", user_id=user.id, category_id=expense_category.id
+    )
+    income = models.Income(
+        name="Зарплата", icon="$", color="#0f0", user_id=user.id, category_id=income_category.id
+    )
+    db.add_all([expense, income])
+    db.commit()
+    return SimpleNamespace(
+        id=user.id,
+        wallet_id=wallet.id,
+        goal_id=goal.id,
+        expense_id=expense.id,
+        expense_category_id=expense_category.id,
+        income_id=income.id,
+        income_category_id=income_category.id,
+        headers={"Authorization": f"Bearer {security.create_access_token(user.id)}"},
+    )
+
+
+@pytest.fixture
+def run_async():
+    """
+    Выполняет корутину в своём цикле событий. Соединения async_engine
+    привязаны к циклу, поэтому пул закрывается в том же цикле.
+    """
+    import asyncio
+
+    from app.db.session import async_engine
+
+    def run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await async_engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,85 @@
+import pytest
+
+from app.services.ai_parser import build_keyword_map, is_confident, parse_amount, parse_message
+
+USER_DATA = {
+    "categories": [
+        {"id": 1, "name": "Еда", "type": "expense"},
+        {"id": 2, "name": "Зарплата", "type": "income"},
+        {"id": 3, "name": "Транспорт", "type": "expense"},
+    ],
+    "wallets": [{"id": 1, "name": "Карта"}],
+    "currency": "KZT",
+}
+KEYWORDS = {"такс": [3, 1.0]}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("такси 2000", [2000.0]),
+        ("зарплата 300 000", [300000.0]),
+        ("кофе 1,5к", [1500.0]),
+        ("обед 3.5 тыс", [3500.0]),
+        ("без суммы", []),
+    ],
+)
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+def test_category_by_name():
+    parsed = parse_message("еда 2500", USER_DATA, KEYWORDS)
+    assert is_confident(parsed)
+    assert (parsed.type, parsed.amount, parsed.category["id"]) == ("expense", 2500.0, 1)
+
+
+def test_category_by_keyword():
+    parsed = parse_message("такси 2000", USER_DATA, KEYWORDS)
+    assert is_confident(parsed)
+    assert parsed.category["id"] == 3
+    assert parsed.description == "Такси"
+
+
+def test_income_with_wallet():
+    parsed = parse_message("зарплата 300 000 на карту", USER_DATA, KEYWORDS)
+    assert is_confident(parsed)
+    assert (parsed.type, parsed.amount, parsed.wallet["id"]) == ("income", 300000.0, 1)
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "сколько я потратил на еду 2024",
+        "еда 2024?",
+        "Сколько ушло на такси в 2024",
+        "что с зарплатой 2024",
+        "покажи расходы на еду за 2024",
+    ],
+)
+def test_questions_go_to_model(message):
+    assert parse_message(message, USER_DATA, KEYWORDS) is None
+
+
+@pytest.mark.parametrize("message", ["еда 3000 в ресторане с друзьями", "такси 2000 домой"])
+def test_unmatched_words_lower_confidence(message):
+    parsed = parse_message(message, USER_DATA, KEYWORDS)
+    assert parsed is not None
+    assert not is_confident(parsed)
+
+
+@pytest.mark.parametrize("message", ["перевод 5000 на карту", "еда 100 и такси 200", "еда"])
+def test_not_parsed(message):
+    assert parse_message(message, USER_DATA, KEYWORDS) is None
+
+
+def test_build_keyword_map():
+    rows = [
+        ("Такси", None, 3, 5),
+        ("Такси", "в аэропорт", 1, 1),
+        ("Кофе", None, 1, 1),
+    ]
+    keywords = build_keyword_map(rows)
+    assert keywords["такс"] == [3, 0.83]
+    # Встречалось один раз — не ключевое
+    assert "коф" not in keywords
@@ -0,0 +1,168 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import AsyncAzureOpenAI
+
+from app.services import ai_service as ai_service_module
+from app.services.ai_service import AIService, AIUnavailable, CircuitBreaker
+from benchmarks import azure_openai_stub as stub
+
+USER_DATA = {
+    "categories": [{"id": 1, "name": "Еда", "type": "expense"}],
+    "wallets": [{"id": 1, "name": "Карта"}],
+    "currency": "KZT",
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """
+    AIService, чей HTTP-клиент ходит в заглушку Azure OpenAI в памяти процесса.
+    """
+    monkeypatch.setattr(stub, "LATENCY", 0)
+    monkeypatch.setattr(stub, "FAILURE_RATE", 0)
+    stub.app.state.calls = 0
+    service = AIService()
+    service.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    service._http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub.app))
+    service._client = AsyncAzureOpenAI(
+        api_key="stub",
+        api_version="2024-12-01-preview",
+        azure_endpoint="http://stub",
+        http_client=service._http_client,
+        max_retries=0,
+    )
+    return service
+
+
+def _run(service, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await service.aclose()
+
+    return asyncio.run(main())
+
+
+def test_confident_message_skips_model(service):
+    result = _run(service, service.process_message("еда 1500", USER_DATA, user_id=1))
+    assert result["source"] == "local"
+    assert result["transaction"]["amount"] == 1500
+    assert stub.app.state.calls == 0
+
+
+def test_model_answer_is_cached(service):
+    async def twice():
+        first = await service.process_message("кофе 1500 с друзьями", USER_DATA, user_id=1)
+        second = await service.process_message("Кофе  1500 с друзьями", USER_DATA, user_id=1)
+        return first, second
+
+    first, second = _run(service, twice())
+    assert first["type"] == "transaction"
+    assert first["transaction"]["amount"] == 1500
+    assert second == first
+    # Второе сообщение отличается только регистром и пробелами — ответ из кэша
+    assert stub.app.state.calls == 1
+
+
+def test_breaker_opens_after_failures(service, monkeypatch):
+    monkeypatch.setattr(stub, "FAILURE_RATE", 1.0)
+
+    async def ask(n):
+        return [await service.process_message(f"кофе {100 + i} с друзьями", USER_DATA, user_id=1) for i in range(n)]
+
+    results = _run(service, ask(4))
+    assert all(result["type"] == "error" for result in results)
+    assert service.breaker.state == "open"
+    # Третий и четвёртый запросы до заглушки не дошли
+    assert stub.app.state.calls == 2
+    assert "temporarily unavailable" in results[-1]["response"]
+
+
+def test_analyze_expenses(service):
+    answer = _run(service, service.analyze_expenses("Еда: 10000 KZT", "month"))
+    assert answer == "Сократите расходы на кафе и развлечения."
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ai_service_module.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_half_open_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert (breaker.state, breaker.allow()) == ("open", False)
+
+    clock.now += 30
+    assert breaker.state == "half-open"
+    assert breaker.allow() is True
+    # Пока пробный запрос не завершился, остальные не пропускаются
+    assert breaker.allow() is False
+
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == ("closed", 0)
+
+
+def test_breaker_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow() is True
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 29
+    assert breaker.allow() is False
+
+
+def test_queue_timeout_releases_probe(service, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "AI_QUEUE_TIMEOUT_SECONDS", 0.01)
+
+    async def busy():
+        service._semaphore = asyncio.Semaphore(0)
+        with pytest.raises(AIUnavailable):
+            await service._complete([{"role": "user", "content": "x"}], temperature=0, max_tokens=1)
+
+    _run(service, busy())
+    assert service.breaker.state == "closed"
+    assert stub.app.state.calls == 0
+
+
+@pytest.mark.parametrize("stage", ["queue", "request"])
+def test_cancelled_probe_is_released(service, monkeypatch, stage):
+    monkeypatch.setattr(stub, "LATENCY", 10)
+    service.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    service.breaker.record_failure()
+
+    async def cancelled_probe():
+        if stage == "queue":
+            service._semaphore = asyncio.Semaphore(0)
+        task = asyncio.create_task(
+            service._complete([{"role": "user", "content": "x"}], temperature=0, max_tokens=1)
+        )
+        await asyncio.sleep(0.05)
+        assert service.breaker.allow() is False
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    _run(service, cancelled_probe())
+    # Отменённая проба не считается ни успехом, ни отказом — следующая пропускается
+    assert service.breaker.failures == 1
+    assert service.breaker.allow() is True
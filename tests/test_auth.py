@@ -0,0 +1,66 @@
+from sqlmodel import Session, select
+
+from app import models
+from app.api.v1.endpoints import auth
+from app.core.config import settings
+
+
+def test_register_commits_before_sending_email(client, monkeypatch):
+    seen = {}
+
+    async def fake_send(email_to, full_name, code):
+        # Письмо уходит из другой сессии: пользователь и код уже должны быть в базе
+        from app.db.session import engine
+
+        with Session(engine) as other:
+            user = other.exec(select(models.User).where(models.User.email == email_to)).first()
+            seen["code"] = user.email_verification_code if user else None
+            if user is not None:
+                seen["categories"] = len(
+                    other.exec(select(models.Category).where(models.Category.user_id == user.id)).all()
+                )
+        seen["sent_code"] = code
+
+    monkeypatch.setattr(auth, "send_verification_code_email", fake_send)
+    # Категории онбординга: на SQLite INSERT ... RETURNING с порядком строк идёт
+    # по одной строке, на Postgres — одним запросом
+    monkeypatch.setattr(settings, "QUERY_REPEAT_LIMIT", 20)
+    response = client.post(
+        "/api/v1/auth/register", json={"email": "new@example.com", "password": "s3cretpass"}
+    )
+    assert response.status_code == 200, response.text
+    assert seen["code"] is not None
+    assert seen["code"] == seen["sent_code"]
+    assert seen["categories"] > 0
+
+
+def test_register_duplicate_email(client, user):
+    response = client.post(
+        "/api/v1/auth/register", json={"email": "user@example.com", "password": "s3cretpass"}
+    )
+    assert response.status_code == 400
+
+
+def _login(client, password):
+    return client.post(
+        "/api/v1/auth/login", data={"username": "login@example.com", "password": password}
+    )
+
+
+def test_login(client, db):
+    from app.core import security
+
+    db.add(models.User(
+        email="login@example.com",
+        hashed_password=security.get_password_hash("s3cretpass"),
+        is_email_verified=True,
+    ))
+    db.commit()
+
+    response = _login(client, "s3cretpass")
+    assert response.status_code == 200, response.text
+    assert response.json()["token_type"] == "bearer"
+    assert _login(client, "wrong").json()["detail"] == "Incorrect email or password"
+    assert client.post(
+        "/api/v1/auth/login", data={"username": "nobody@example.com", "password": "s3cretpass"}
+    ).status_code == 400
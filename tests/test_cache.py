@@ -0,0 +1,109 @@
+import pytest
+
+from app import models
+from app.core.cache import MemoryCache, ResponseCache, response_cache
+
+
+class BrokenBackend:
+    """
+    Как RedisCache при недоступном сервере: любая операция падает.
+    """
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("cache is down")
+
+        return fail
+
+
+def test_memory_cache_lru():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_memory_cache_ttl(monkeypatch):
+    import app.core.cache as cache_module
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = MemoryCache()
+    cache.set("a", 1, ttl=10)
+    now[0] += 11
+    assert cache.get("a") is None
+
+
+def test_invalidate_changes_key():
+    cache = ResponseCache(MemoryCache(), ttl=60)
+    key = cache.key("goals", 1)
+    cache.set(key, [1])
+    cache.invalidate(1, ["goals"])
+    assert cache.key("goals", 1) != key
+    # Другие пространства и пользователи не затронуты
+    assert cache.key("wallets", 1) == ResponseCache(MemoryCache(), ttl=60).key("wallets", 1)
+
+
+def test_data_version_key_ignores_local_counter():
+    cache = ResponseCache(MemoryCache(), ttl=60)
+    key = cache.key("goals", 1, version=5)
+    cache.invalidate(1, ["goals"])
+    assert cache.key("goals", 1, version=5) == key
+    assert cache.key("goals", 1, version=6) != key
+
+
+def test_broken_backend_is_skipped():
+    cache = ResponseCache(BrokenBackend(), ttl=60)
+    key = cache.key("goals", 1)
+    assert key is None
+    assert cache.get(key) is None
+    assert cache.get("growfi:goals:1:0:") is None
+    assert cache.set(key, {"a": 1}) == {"a": 1}
+    assert cache.set("growfi:goals:1:0:", {"a": 1}) == {"a": 1}
+    cache.invalidate(1, ["goals", "wallets"])
+
+
+@pytest.fixture
+def broken_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", BrokenBackend())
+
+
+def test_api_works_without_cache(client, user, broken_cache):
+    assert client.get("/api/v1/goals/", headers=user.headers).status_code == 200
+    # invalidate в after_commit не превращает выполненную запись в 500
+    response = client.post(
+        "/api/v1/goals/",
+        json={"name": "Отпуск", "target_amount": 1000, "currency": "KZT", "icon": "plane", "color": "#00f"},
+        headers=user.headers,
+    )
+    assert response.status_code == 200, response.text
+    names = [goal["name"] for goal in client.get("/api/v1/goals/", headers=user.headers).json()]
+    assert "Отпуск" in names
+
+
+def test_cached_list_follows_writes(client, user):
+    url = "/api/v1/wallet/"
+    assert [w["name"] for w in client.get(url, headers=user.headers).json()] == ["Карта"]
+    client.post(url, json={"name": "Наличные", "balance": 0}, headers=user.headers)
+    assert [w["name"] for w in client.get(url, headers=user.headers).json()] == ["Карта", "Наличные"]
+
+
+def test_write_in_another_worker_is_visible(client, db, user, monkeypatch):
+    # Другой воркер: запись и коммит без invalidate в этом процессе
+    url = "/api/v1/goals/"
+    assert [g["name"] for g in client.get(url, headers=user.headers).json()] == ["Машина"]
+    etag = client.get(url, headers=user.headers).headers["ETag"]
+
+    monkeypatch.setattr(response_cache, "invalidate", lambda *args, **kwargs: None)
+    goal = db.get(models.Goal, user.goal_id)
+    goal.name = "Дом"
+    db.add(goal)
+    db.commit()
+
+    response = client.get(url, headers={**user.headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [g["name"] for g in response.json()] == ["Дом"]
@@ -0,0 +1,118 @@
+import asyncio
+import socket
+from email import message_from_bytes
+from email.header import decode_header, make_header
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+from app.core.config import settings  # noqa: E402
+from app.services.email_service import EmailQueue, send_verification_code_email  # noqa: E402
+from app.services import email_service  # noqa: E402
+
+
+class Recorder:
+    """
+    Обработчик aiosmtpd: запоминает письма и SMTP-сессии (соединения).
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.messages.append(message_from_bytes(envelope.content))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    recorder = Recorder()
+    controller = aiosmtpd_controller.Controller(recorder, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "MAIL_CONSOLE", False)
+    monkeypatch.setattr(settings, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "MAIL_PORT", controller.port)
+    monkeypatch.setattr(settings, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(settings, "MAIL_SSL_TLS", False)
+    monkeypatch.setattr(settings, "MAIL_TIMEOUT", 5.0)
+    yield recorder
+    controller.stop()
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = EmailQueue()
+    monkeypatch.setattr(email_service, "email_queue", queue)
+    return queue
+
+
+def _subject(message) -> str:
+    return str(make_header(decode_header(message["Subject"])))
+
+
+def test_queue_reuses_one_connection(smtp, queue):
+    async def main():
+        queue.start()
+        for n in range(3):
+            await send_verification_code_email(f"user{n}@example.com", f"User {n}", f"12345{n}")
+        await queue.stop()
+
+    asyncio.run(main())
+    assert len(smtp.messages) == 3
+    assert len(smtp.sessions) == 1
+    assert queue.stats()["sent"] == 3
+
+    message = smtp.messages[0]
+    assert message["To"] == "user0@example.com"
+    assert "Код подтверждения" in _subject(message)
+    assert "123450" in message.get_payload(decode=True).decode()
+
+
+def test_without_worker_sends_immediately(smtp, queue):
+    asyncio.run(send_verification_code_email("now@example.com", "Now", "999999"))
+    assert [message["To"] for message in smtp.messages] == ["now@example.com"]
+
+
+def test_unreachable_server_drops_after_retries(queue, monkeypatch):
+    monkeypatch.setattr(settings, "MAIL_CONSOLE", False)
+    monkeypatch.setattr(settings, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "MAIL_PORT", _free_port())
+    monkeypatch.setattr(settings, "MAIL_TIMEOUT", 1.0)
+    monkeypatch.setattr(settings, "MAIL_MAX_RETRIES", 1)
+
+    async def main():
+        queue.start()
+        await send_verification_code_email("lost@example.com", "Lost", "000000")
+        await queue.stop()
+
+    asyncio.run(main())
+    assert (queue.stats()["sent"], queue.stats()["failed"]) == (0, 1)
+
+
+def test_full_queue_drops_instead_of_blocking(queue, monkeypatch):
+    monkeypatch.setattr(settings, "MAIL_QUEUE_MAX_SIZE", 1)
+
+    async def main():
+        # Воркер не разбирает очередь: первое письмо занимает единственное место
+        queue._queue = asyncio.Queue(maxsize=settings.MAIL_QUEUE_MAX_SIZE)
+        queue._worker = asyncio.create_task(asyncio.sleep(3600))
+        try:
+            for n in range(3):
+                await asyncio.wait_for(
+                    send_verification_code_email(f"user{n}@example.com", "User", "123456"), timeout=1
+                )
+            return queue.stats()
+        finally:
+            queue._worker.cancel()
+
+    stats = asyncio.run(main())
+    assert (stats["queued"], stats["dropped"]) == (1, 2)
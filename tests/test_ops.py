@@ -0,0 +1,55 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.deps import require_ops_access
+from app.core.config import settings
+
+OPS_PATHS = ["/metrics", "/health/db", "/health/hashing", "/health/email", "/health/ai", "/health/jobs"]
+
+
+def _request(host, authorization=None):
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    return Request({"type": "http", "method": "GET", "path": "/metrics", "headers": headers, "client": (host, 1234)})
+
+
+def test_liveness_is_public(client):
+    assert client.get("/health").json() == {"status": "ok"}
+
+
+@pytest.mark.parametrize("path", OPS_PATHS)
+def test_ops_endpoints_closed_by_default(client, path):
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize("path", OPS_PATHS)
+def test_ops_endpoints_with_token(client, path, monkeypatch):
+    monkeypatch.setattr(settings, "OPS_TOKEN", "ops-secret")
+    assert client.get(path, headers={"Authorization": "Bearer ops-secret"}).status_code == 200
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 404
+
+
+def test_metrics_render(client, monkeypatch):
+    monkeypatch.setattr(settings, "OPS_TOKEN", "ops-secret")
+    client.get("/health")
+    body = client.get("/metrics", headers={"Authorization": "Bearer ops-secret"}).text
+    assert 'growfi_http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert "# TYPE growfi_http_request_duration_seconds histogram" in body
+
+
+def test_allowed_networks(monkeypatch):
+    monkeypatch.setattr(settings, "OPS_ALLOWED_NETWORKS", ["10.0.0.0/8", "::1"])
+    require_ops_access(_request("10.1.2.3"))
+    require_ops_access(_request("::1"))
+    for host in ("192.168.0.1", "testclient"):
+        with pytest.raises(HTTPException) as exc:
+            require_ops_access(_request(host))
+        assert exc.value.status_code == 404
+
+
+def test_token_check(monkeypatch):
+    monkeypatch.setattr(settings, "OPS_TOKEN", "ops-secret")
+    require_ops_access(_request("203.0.113.5", "Bearer ops-secret"))
+    for header in (None, "Basic ops-secret", "Bearer ops-secre", "Bearer ёж"):
+        with pytest.raises(HTTPException):
+            require_ops_access(_request("203.0.113.5", header))
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.query_debug import QueryBudgetExceeded, QueryDebugMiddleware, QueryLog, statement_shape
+
+pytestmark = pytest.mark.skipif(settings.QUERY_DEBUG == "off", reason="QUERY_DEBUG=off: слушатели не подключены")
+
+
+def test_statement_shape():
+    assert statement_shape("SELECT *\n  FROM goal WHERE id IN (?, ?, ?)") == "SELECT * FROM goal WHERE id IN (...)"
+    assert statement_shape("SELECT * FROM goal WHERE id IN ($1, $2)") == statement_shape(
+        "SELECT * FROM goal WHERE id IN ($1, $2, $3, $4)"
+    )
+    # Один параметр — не список
+    assert statement_shape("SELECT * FROM goal WHERE id = ?") == "SELECT * FROM goal WHERE id = ?"
+
+
+def test_query_log_problems():
+    log = QueryLog()
+    for _ in range(settings.QUERY_REPEAT_LIMIT + 1):
+        log.total += 1
+        log.statements["SELECT * FROM wallet WHERE id = ?"] += 1
+    log.total += 1
+    log.statements["SELECT * FROM goal"] += 1
+
+    problems = log.problems(budget=2)
+    assert problems[0] == f"{log.total} queries, budget 2"
+    assert problems[1].startswith(f"{settings.QUERY_REPEAT_LIMIT + 1}x same query (N+1?): SELECT * FROM wallet")
+    assert len(problems) == 2
+    assert log.problems(budget=100)[1:] == []
+
+
+def _app_with_queries(count: int):
+    from app.db.session import engine
+
+    async def app(scope, receive, send):
+        with engine.connect() as conn:
+            for n in range(count):
+                conn.execute(text("SELECT :n"), {"n": n})
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+def _call(app, path="/api/v1/probe"):
+    scope = {"type": "http", "method": "GET", "path": path}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(QueryDebugMiddleware(app)(scope, receive, send))
+    return sent
+
+
+def test_repeated_query_raises(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_DEBUG", "raise")
+    with pytest.raises(QueryBudgetExceeded, match="same query"):
+        _call(_app_with_queries(settings.QUERY_REPEAT_LIMIT + 1))
+
+
+def test_within_budget_passes(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_DEBUG", "raise")
+    assert _call(_app_with_queries(settings.QUERY_REPEAT_LIMIT))[0]["status"] == 200
+
+
+def test_route_budget(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_DEBUG", "raise")
+    monkeypatch.setattr(settings, "QUERY_REPEAT_LIMIT", 100)
+    monkeypatch.setattr(settings, "QUERY_BUDGETS", {"/api/v1/probe": 2})
+    with pytest.raises(QueryBudgetExceeded, match="3 queries, budget 2"):
+        _call(_app_with_queries(3))
+    # Другой маршрут — общий QUERY_BUDGET
+    _call(_app_with_queries(3), path="/api/v1/other")
+
+
+def test_warn_mode_logs(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_DEBUG", "warn")
+    with caplog.at_level(logging.WARNING, logger="app.db.query_debug"):
+        _call(_app_with_queries(settings.QUERY_REPEAT_LIMIT + 1))
+    assert "N+1?" in caplog.text
+
+
+def test_slow_query_logged_with_plan(db, user, monkeypatch, caplog):
+    from app import crud
+
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="app.db.query_debug"):
+        crud.crud_wallet.get_multi_by_user(db=db, user_id=user.id)
+    assert "Slow query" in caplog.text
+    # EXPLAIN QUERY PLAN на SQLite
+    assert "wallet" in caplog.text.lower() and ("SCAN" in caplog.text or "SEARCH" in caplog.text)
+
+
+def test_api_list_endpoints_have_no_n_plus_one(client, db, user):
+    from datetime import date
+
+    from app import models
+
+    # Больше строк, чем QUERY_REPEAT_LIMIT: ленивые связи дали бы повторы запросов
+    for n in range(settings.QUERY_REPEAT_LIMIT * 2):
+        db.add(models.Wallet(name=f"Кошелёк {n}", balance=10, user_id=user.id))
+        db.add(
+            models.Transaction(
+                user_id=user.id, from_wallet_id=user.wallet_id, to_category_id=user.expense_category_id,
+                amount=5, transaction_date=date(2026, 10, n + 1), type="expense", name=f"Расход {n}",
+            )
+        )
+    db.commit()
+    for url in ("/api/v1/wallet/", "/api/v1/goals/", "/api/v1/categories/", "/api/v1/transactions/", "/api/v1/dashboard/"):
+        assert client.get(url, headers=user.headers).status_code == 200, url
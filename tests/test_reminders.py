@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.services.reminders import FakeSender, next_reminder_at, schedule_goal, send_due_reminders
+
+
+def _next(period, *, after, weekday=None, month_day=None, at="09:00", tz="UTC"):
+    return next_reminder_at(
+        reminder_period=period,
+        selected_weekday=weekday,
+        selected_month_day=month_day,
+        selected_time=at,
+        user_timezone=tz,
+        after=after,
+    )
+
+
+def test_weekly_later_today():
+    # 2026-10-19 — понедельник
+    assert _next("week", weekday=1, after=datetime(2026, 10, 19, 8, 0)) == datetime(2026, 10, 19, 9, 0)
+
+
+def test_weekly_already_passed_moves_to_next_week():
+    assert _next("week", weekday=1, after=datetime(2026, 10, 19, 9, 0)) == datetime(2026, 10, 26, 9, 0)
+
+
+def test_weekly_other_day():
+    # Пятница (5) после понедельника той же недели
+    assert _next("week", weekday=5, after=datetime(2026, 10, 19, 12, 0)) == datetime(2026, 10, 23, 9, 0)
+
+
+def test_user_timezone():
+    # 09:00 в Алматы (UTC+5) — 04:00 UTC; в 03:00 UTC там уже понедельник 08:00
+    assert _next("week", weekday=1, tz="Asia/Almaty", after=datetime(2026, 10, 19, 3, 0)) == datetime(
+        2026, 10, 19, 4, 0
+    )
+    # Локально уже вторник 00:30 — следующее срабатывание через неделю
+    assert _next("week", weekday=1, tz="Asia/Almaty", after=datetime(2026, 10, 19, 19, 30)) == datetime(
+        2026, 10, 26, 4, 0
+    )
+
+
+def test_monthly_short_month_uses_last_day():
+    assert _next("month", month_day=31, after=datetime(2027, 2, 1)) == datetime(2027, 2, 28, 9, 0)
+    assert _next("month", month_day=31, after=datetime(2027, 2, 28, 10, 0)) == datetime(2027, 3, 31, 9, 0)
+
+
+def test_monthly_year_rollover():
+    assert _next("month", month_day=15, after=datetime(2026, 12, 20)) == datetime(2027, 1, 15, 9, 0)
+
+
+@pytest.mark.parametrize(
+    "period, at, tz, expected",
+    [
+        (None, "09:00", "UTC", None),
+        ("day", "09:00", "UTC", None),
+        # Некорректные время и пояс — значения по умолчанию (09:00, UTC)
+        ("week", "soon", "UTC", datetime(2026, 10, 19, 9, 0)),
+        ("week", "09:00", "Mars/Base", datetime(2026, 10, 19, 9, 0)),
+    ],
+)
+def test_fallbacks(period, at, tz, expected):
+    assert _next(period, weekday=1, at=at, tz=tz, after=datetime(2026, 10, 19, 8, 0)) == expected
+
+
+@pytest.fixture
+def due_goals(db, user):
+    goals = []
+    for n, due in enumerate([datetime(2026, 10, 19, 8, 0), datetime(2026, 10, 19, 8, 30), None]):
+        goal = models.Goal(
+            name=f"Цель {n}", target_amount=1000, icon="star", color="#fff", user_id=user.id,
+            reminder_period="week", selected_weekday=1, selected_time="08:00", plan_amount=5000,
+            next_reminder_at=due,
+        )
+        db.add(goal)
+        goals.append(goal)
+    db.commit()
+    return goals
+
+
+def test_send_due_reminders(db, due_goals, run_async):
+    sender = FakeSender()
+    now = datetime(2026, 10, 19, 9, 0)
+    assert run_async(send_due_reminders(sender, now=now)) == 2
+    assert [reminder.goal_id for reminder in sender.sent] == [due_goals[0].id, due_goals[1].id]
+    assert sender.sent[0].body == "Пора пополнить цель «Цель 0» на 5000 KZT"
+
+    db.expire_all()
+    rescheduled = [db.get(models.Goal, goal.id).next_reminder_at for goal in due_goals[:2]]
+    assert rescheduled == [datetime(2026, 10, 26, 8, 0)] * 2
+
+    # Повторный тик в ту же минуту ничего не отправляет
+    assert run_async(send_due_reminders(sender, now=now)) == 0
+    assert len(sender.sent) == 2
+
+
+def test_send_due_reminders_in_batches(db, due_goals, run_async, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "REMINDER_BATCH_SIZE", 1)
+    sender = FakeSender()
+    assert run_async(send_due_reminders(sender, now=datetime(2026, 10, 19, 9, 0))) == 2
+    assert len(sender.sent) == 2
+
+
+def test_schedule_goal():
+    goal = models.Goal(
+        name="Цель", target_amount=1, icon="i", color="c", user_id=1,
+        reminder_period="month", selected_month_day=1, selected_time="10:00",
+    )
+    schedule_goal(goal, "UTC", now=datetime(2026, 10, 19))
+    assert goal.next_reminder_at == datetime(2026, 11, 1, 10, 0)
+    goal.reminder_period = None
+    schedule_goal(goal, "UTC")
+    assert goal.next_reminder_at is None
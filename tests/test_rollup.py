@@ -0,0 +1,107 @@
+from datetime import date
+
+import pytest
+from sqlmodel import select
+
+from app import models
+from app.crud import crud_rollup
+from app.models.rollup import TransactionDailyRollup
+
+
+def _rollup(db):
+    rows = db.exec(
+        select(TransactionDailyRollup).order_by(
+            TransactionDailyRollup.day, TransactionDailyRollup.type, TransactionDailyRollup.category_id
+        )
+    ).all()
+    return [(r.day, r.type, r.category_id, r.amount, r.tx_count) for r in rows]
+
+
+def _tx(user, amount, day=date(2026, 10, 1), type="expense", category_id=None):
+    return models.Transaction(
+        user_id=user.id, from_wallet_id=user.wallet_id, amount=amount, transaction_date=day, type=type,
+        to_category_id=category_id if category_id is not None else user.expense_category_id,
+    )
+
+
+@pytest.fixture(params=["upsert", "portable"])
+def rollup_mode(request, monkeypatch):
+    if request.param == "portable":
+        # Как на диалекте без ON CONFLICT
+        monkeypatch.setattr(crud_rollup, "_UPSERT_INSERTS", {})
+    return request.param
+
+
+def test_add_and_remove(db, user, rollup_mode):
+    first, second = _tx(user, 100), _tx(user, 50)
+    other_day = _tx(user, 20, day=date(2026, 10, 2))
+    db.add_all([first, second, other_day])
+    db.flush()
+    for tx in (first, second, other_day):
+        crud_rollup.add_transaction(db, tx)
+    cat = user.expense_category_id
+    assert _rollup(db) == [
+        (date(2026, 10, 1), "expense", cat, 150, 2),
+        (date(2026, 10, 2), "expense", cat, 20, 1),
+    ]
+
+    crud_rollup.remove_transaction(db, first)
+    crud_rollup.remove_transaction(db, other_day)
+    # Опустевшая строка удаляется
+    assert _rollup(db) == [(date(2026, 10, 1), "expense", cat, 50, 1)]
+
+
+def test_non_positive_amounts_are_skipped(db, user, rollup_mode):
+    tx = _tx(user, 0)
+    db.add(tx)
+    db.flush()
+    crud_rollup.add_transaction(db, tx)
+    assert _rollup(db) == []
+
+
+def test_portable_insert_race(db, user, monkeypatch):
+    monkeypatch.setattr(crud_rollup, "_UPSERT_INSERTS", {})
+    tx = _tx(user, 10)
+    db.add(tx)
+    db.flush()
+    crud_rollup.add_transaction(db, tx)
+
+    # Строку вставил параллельный запрос между нашими UPDATE и INSERT:
+    # первый UPDATE «не видит» её, INSERT ловит уникальный ключ, повторный UPDATE её находит
+    real_execute = db.execute
+    calls = []
+
+    class Missed:
+        rowcount = 0
+
+    def execute(statement, *args, **kwargs):
+        calls.append(statement)
+        if len(calls) == 1:
+            return Missed()
+        return real_execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", execute)
+    crud_rollup.add_transaction(db, tx)
+    monkeypatch.undo()
+    assert _rollup(db) == [(date(2026, 10, 1), "expense", user.expense_category_id, 20, 2)]
+
+
+def test_rebuild_matches_incremental(db, user):
+    txs = [_tx(user, 100), _tx(user, 50), _tx(user, 30, type="income", category_id=user.income_category_id)]
+    db.add_all(txs)
+    db.flush()
+    for tx in txs:
+        crud_rollup.add_transaction(db, tx)
+    incremental = _rollup(db)
+    assert crud_rollup.rebuild(db, user_id=user.id) == 2
+    assert _rollup(db) == incremental
+
+
+def test_rollup_follows_api_writes(client, db, user):
+    client.patch(
+        f"/api/v1/wallet/{user.wallet_id}/assign-expense",
+        json={"expense_id": user.expense_id, "amount": 300, "date": "2026-10-01"},
+        headers=user.headers,
+    )
+    db.expire_all()
+    assert _rollup(db) == [(date(2026, 10, 1), "expense", user.expense_category_id, 300, 1)]
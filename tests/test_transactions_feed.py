@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app import models
+from app.api.v1.endpoints.transactions import _decode_cursor, _encode_cursor, _feed_item
+
+
+@pytest.fixture
+def feed(db, user):
+    """
+    12 расходов по одному в день (по два на дату — для проверки id в курсоре) и один доход.
+    """
+    start = date(2026, 9, 1)
+    for n in range(12):
+        db.add(
+            models.Transaction(
+                user_id=user.id, from_wallet_id=user.wallet_id, to_category_id=user.expense_category_id,
+                amount=10 + n, transaction_date=start + timedelta(days=n // 2), type="expense", name=f"Покупка {n}",
+            )
+        )
+    db.add(
+        models.Transaction(
+            user_id=user.id, to_wallet_id=user.wallet_id, to_category_id=user.income_category_id,
+            amount=500, transaction_date=start, type="income", name="Зарплата",
+        )
+    )
+    db.commit()
+    return user
+
+
+def test_cursor_roundtrip():
+    cursor = _encode_cursor(date(2026, 10, 1), 42)
+    assert _decode_cursor(cursor) == (date(2026, 10, 1), 42)
+
+
+def test_invalid_cursor(client, user):
+    response = client.get("/api/v1/transactions/", params={"cursor": "not-a-cursor"}, headers=user.headers)
+    assert response.status_code == 400
+
+
+def test_pages_cover_feed_once(client, feed):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/v1/transactions/", params=params, headers=feed.headers).json()
+        seen += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 13
+    assert len({item["id"] for item in seen}) == 13
+    keys = [(item["date"], item["id"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_filter_by_type(client, feed):
+    page = client.get("/api/v1/transactions/", params={"type": "income"}, headers=feed.headers).json()
+    assert [(item["type"], item["title"]) for item in page["items"]] == [("income", "Зарплата")]
+
+
+def test_feed_item_unknown_type():
+    tx = models.Transaction(id=1, user_id=1, amount=10, transaction_date=date(2026, 10, 1), type="wallet_transfer")
+    item = _feed_item(tx, None, None, None, None, None, None)
+    assert item["type"] == "wallet_transfer"
+    assert item["title"] == "Удалено"
+    assert item["icon"] and item["color"]
+
+
+def test_unknown_type_filter_is_rejected(client, user):
+    response = client.get("/api/v1/transactions/", params={"type": "wallet_transfer"}, headers=user.headers)
+    assert response.status_code == 422
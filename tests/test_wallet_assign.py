@@ -0,0 +1,157 @@
+import pytest
+from sqlmodel import select
+
+from app import models
+
+
+def _transactions(db):
+    db.expire_all()
+    return db.exec(select(models.Transaction).order_by(models.Transaction.id)).all()
+
+
+def test_assign_goal(client, db, user):
+    response = client.patch(
+        f"/api/v1/wallet/{user.wallet_id}/assign-goal",
+        json={"goal_id": user.goal_id, "amount": 200, "date": "2026-10-01"},
+        headers=user.headers,
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["wallet"]["balance"] == 800
+    assert body["goal"]["current_amount"] == 200
+
+    [tx] = _transactions(db)
+    assert (tx.type, tx.amount, tx.goal_name) == ("goal_transfer", 200, "Машина")
+    # Имя кошелька сохраняется в транзакции: лента показывает его и после удаления кошелька
+    assert tx.wallet_name == "Карта"
+
+
+def test_assign_goal_over_target(client, db, user):
+    response = client.patch(
+        f"/api/v1/wallet/{user.wallet_id}/assign-goal",
+        json={"goal_id": user.goal_id, "amount": 600, "date": "2026-10-01"},
+        headers=user.headers,
+    )
+    assert response.status_code == 400
+    assert "Max available: 500" in response.json()["detail"]
+    assert _transactions(db) == []
+    assert db.get(models.Wallet, user.wallet_id).balance == 1000
+
+
+def test_assign_expense(client, db, user):
+    response = client.patch(
+        f"/api/v1/wallet/{user.wallet_id}/assign-expense",
+        json={"expense_id": user.expense_id, "amount": 300, "date": "2026-10-01"},
+        headers=user.headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["wallet"]["balance"] == 700
+
+    [tx] = _transactions(db)
+    assert (tx.type, tx.to_category_id, tx.name) == ("expense", user.expense_category_id, "Продукты")
+    assert tx.wallet_name == "Карта"
+
+
+def test_assign_expense_not_enough_funds(client, db, user):
+    response = client.patch(
+        f"/api/v1/wallet/{user.wallet_id}/assign-expense",
+        json={"expense_id": user.expense_id, "amount": 5000, "date": "2026-10-01"},
+        headers=user.headers,
+    )
+    assert response.status_code == 400
+    assert _transactions(db) == []
+
+
+def test_idempotency_replay(client, db, user):
+    headers = {**user.headers, "Idempotency-Key": "assign-1"}
+    payload = {"expense_id": user.expense_id, "amount": 100, "date": "2026-10-01"}
+    url = f"/api/v1/wallet/{user.wallet_id}/assign-expense"
+
+    first = client.patch(url, json=payload, headers=headers)
+    replay = client.patch(url, json=payload, headers=headers)
+    assert first.status_code == replay.status_code == 200
+    assert replay.json() == first.json()
+    # Операция выполнена один раз
+    assert len(_transactions(db)) == 1
+    assert db.get(models.Wallet, user.wallet_id).balance == 900
+
+
+def test_idempotency_key_reused_for_other_request(client, user):
+    headers = {**user.headers, "Idempotency-Key": "assign-2"}
+    url = f"/api/v1/wallet/{user.wallet_id}/assign-expense"
+    client.patch(url, json={"expense_id": user.expense_id, "amount": 100, "date": "2026-10-01"}, headers=headers)
+    response = client.patch(
+        url, json={"expense_id": user.expense_id, "amount": 200, "date": "2026-10-01"}, headers=headers
+    )
+    assert response.status_code == 409
+
+
+def test_failed_request_does_not_store_key(client, db, user):
+    headers = {**user.headers, "Idempotency-Key": "assign-3"}
+    url = f"/api/v1/wallet/{user.wallet_id}/assign-expense"
+    too_much = client.patch(
+        url, json={"expense_id": user.expense_id, "amount": 5000, "date": "2026-10-01"}, headers=headers
+    )
+    assert too_much.status_code == 400
+    # Ошибка откатила и запись ключа: тот же запрос выполняется заново
+    again = client.patch(
+        url, json={"expense_id": user.expense_id, "amount": 5000, "date": "2026-10-01"}, headers=headers
+    )
+    assert again.status_code == 400
+    assert db.exec(select(models.IdempotencyKey)).all() == []
+
+
+def test_assign_batch(client, db, user):
+    response = client.post(
+        "/api/v1/wallet/assign-batch",
+        json={
+            "items": [
+                {"wallet_id": user.wallet_id, "goal_id": user.goal_id, "amount": 100, "date": "2026-10-01"},
+                {"wallet_id": user.wallet_id, "expense_id": user.expense_id, "amount": 250, "date": "2026-10-02"},
+            ]
+        },
+        headers=user.headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["wallets"][0]["balance"] == 650
+
+    transactions = _transactions(db)
+    assert [tx.type for tx in transactions] == ["goal_transfer", "expense"]
+    assert {tx.wallet_name for tx in transactions} == {"Карта"}
+
+
+def test_assign_batch_is_atomic(client, db, user):
+    response = client.post(
+        "/api/v1/wallet/assign-batch",
+        json={
+            "items": [
+                {"wallet_id": user.wallet_id, "expense_id": user.expense_id, "amount": 900, "date": "2026-10-01"},
+                {"wallet_id": user.wallet_id, "expense_id": user.expense_id, "amount": 200, "date": "2026-10-01"},
+            ]
+        },
+        headers=user.headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Item 1: Not enough funds in wallet"
+    assert _transactions(db) == []
+    assert db.get(models.Wallet, user.wallet_id).balance == 1000
+
+
+def test_assign_expense_rejects_non_positive_amount(client, db, user):
+    from app import crud
+
+    for amount in (-500, 0):
+        response = client.patch(
+            f"/api/v1/wallet/{user.wallet_id}/assign-expense",
+            json={"expense_id": user.expense_id, "amount": amount, "date": "2026-10-01"},
+            headers=user.headers,
+        )
+        assert response.status_code == 422
+    # И в обход схемы: отрицательное списание пополнило бы кошелёк
+    with pytest.raises(ValueError, match="Amount must be positive"):
+        crud.crud_wallet.assign_expense(
+            db, wallet_id=user.wallet_id, expense_id=user.expense_id, amount=-500, date="2026-10-01"
+        )
+    db.rollback()
+    assert _transactions(db) == []
+    assert db.get(models.Wallet, user.wallet_id).balance == 1000